@@ -0,0 +1,180 @@
+"""
+Espressif Vendor Wizard - Admission Control
+Bounds how many upstream-bound requests the backend works on at once, so a
+slow Langchao makes excess requests fail fast instead of piling up until
+the process runs out of threads or memory.
+
+Up to `max_in_flight` requests run at a time. Up to `max_queue` more wait
+(at most `queue_timeout` seconds, and never past the client's deadline)
+for a slot to free up. Anything beyond that is shed at once with
+503 Service Unavailable and a Retry-After header estimating when the
+queue will have drained, from the recent time requests take.
+
+A shed request has done nothing yet, so clients can safely resubmit it
+after Retry-After.
+
+KeyedAdmission keeps one such controller per key (the server keys by
+tenant), so a burst from one tenant fills only its own slots and queue and
+never sheds another tenant's requests.
+"""
+
+import functools
+import math
+import threading
+import time
+
+from flask import jsonify
+
+from deadline import remaining
+
+
+OVERLOADED = "overloaded"
+
+
+class AdmissionController:
+    """
+    In-flight limit with a bounded wait queue.
+
+    Args:
+        max_in_flight: Requests processed concurrently
+        max_queue: Requests allowed to wait for a slot; more are shed at once
+        queue_timeout: Seconds a queued request waits before it is shed
+        retry_after: (min, max) seconds suggested in Retry-After
+        alpha: Weight of the newest sample in the service time EWMA
+    """
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 64, queue_timeout: float = 5.0,
+                 retry_after: tuple = (1, 30), alpha: float = 0.2):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after_bounds = retry_after
+        self.alpha = alpha
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "queue_timeout": 0}
+        self.service_seconds = None   # EWMA of admitted request durations
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> str:
+        """Take a slot, waiting up to `timeout` seconds; returns None or why the request was shed."""
+        with self._cond:
+            if self.in_flight < self.max_in_flight and not self.queued:
+                self.in_flight += 1
+                self.admitted += 1
+                return None
+            if self.queued >= self.max_queue or timeout <= 0:
+                self.shed["queue_full"] += 1
+                return "queue_full"
+            self.queued += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.in_flight < self.max_in_flight, timeout)
+            finally:
+                self.queued -= 1
+            if not admitted:
+                self.shed["queue_timeout"] += 1
+                return "queue_timeout"
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+    def release(self, elapsed: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self.service_seconds = elapsed if self.service_seconds is None else (
+                self.alpha * elapsed + (1 - self.alpha) * self.service_seconds)
+            self._cond.notify()
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        low, high = self.retry_after_bounds
+        with self._cond:
+            backlog = self.in_flight + self.queued + 1
+            service = self.service_seconds or 1.0
+        return int(min(max(math.ceil(backlog * service / self.max_in_flight), low), high))
+
+    def limited(self, view):
+        """Decorator: run the view only once admitted, otherwise answer 503."""
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return self.run(view, *args, **kwargs)
+
+        return wrapper
+
+    def run(self, view, *args, **kwargs):
+        """Call `view` once admitted; returns its response, or a 503 when shed."""
+        wait = self.queue_timeout
+        budget = remaining()
+        if budget is not None:
+            wait = min(wait, budget)
+        reason = self.acquire(wait)
+        if reason is not None:
+            seconds = self.retry_after()
+            print(f"[WARN] Shed {view.__name__} ({reason}, {self.in_flight} in flight, "
+                  f"{self.queued} queued), retry after {seconds}s")
+            return jsonify({
+                "success": False,
+                "error": OVERLOADED,
+                "message": f"Server is busy, retry in {seconds} s",
+                "retry_after": seconds,
+            }), 503, {"Retry-After": str(seconds)}
+
+        start = time.monotonic()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            self.release(time.monotonic() - start)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "admitted": self.admitted,
+                "shed": dict(self.shed),
+                "service_ms": None if self.service_seconds is None else round(self.service_seconds * 1000, 1),
+            }
+
+
+class KeyedAdmission:
+    """
+    One AdmissionController per key, created on first use.
+
+    Args:
+        key: Callable returning the current request's key (e.g. its tenant name)
+        **settings: AdmissionController arguments, applied to every key
+    """
+
+    def __init__(self, key, **settings):
+        self.key = key
+        self.settings = settings
+        self._controllers = {}
+        self._lock = threading.Lock()
+
+    def controller(self, key) -> AdmissionController:
+        with self._lock:
+            controller = self._controllers.get(key)
+            if controller is None:
+                controller = self._controllers[key] = AdmissionController(**self.settings)
+            return controller
+
+    def items(self) -> list:
+        """(key, controller) pairs of the keys seen so far."""
+        with self._lock:
+            return list(self._controllers.items())
+
+    def limited(self, view):
+        """Decorator: admit the view through the current key's controller."""
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            return self.controller(self.key()).run(view, *args, **kwargs)
+
+        return wrapper
+
+    def snapshot(self) -> dict:
+        return {key: controller.snapshot() for key, controller in self.items()}
@@ -0,0 +1,323 @@
+"""
+Espressif Vendor Wizard - Submission Audit Log
+Append-only record of every customer submission sent to Langchao and the
+upstream response, kept across restarts.
+
+Entries are appended to size-rotated segment files. Each entry is written
+as its own gzip member, so a segment is still an ordinary .gz file (zcat
+audit-000001.log.gz prints every entry as JSON lines) while any single
+entry can be read back by seeking to its offset and inflating just that
+member.
+
+A sidecar SQLite index maps tenant, vendor_id, customer name and date to
+(segment, offset, length), so looking up a historical submission costs
+one index probe and one small read -- no scanning or decompressing of
+whole segments. Exports (see export.py) walk the same index in sequence
+order, a page at a time. If the process dies between writing an entry and
+indexing it, the unindexed tail of the newest segment is re-indexed (and a
+torn final member truncated) on startup.
+"""
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+
+_SEGMENT_NAME = re.compile(r"^audit-(\d{6})\.log\.gz$")
+
+
+def _utc_date(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+class AuditLog:
+    """
+    Segmented, compressed, indexed append-only log.
+
+    Args:
+        directory: Where segments and the index live
+        segment_bytes: Compressed size after which a new segment is started
+        fsync: fsync every append (durable across power loss, slower)
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024, fsync: bool = False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    seq      INTEGER PRIMARY KEY,
+                    ts       REAL NOT NULL,
+                    date     TEXT NOT NULL,
+                    kind     TEXT NOT NULL,
+                    success  INTEGER,
+                    tenant   TEXT,
+                    segment  INTEGER NOT NULL,
+                    offset   INTEGER NOT NULL,
+                    length   INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date);
+                CREATE INDEX IF NOT EXISTS idx_entries_position ON entries(segment, offset);
+                CREATE TABLE IF NOT EXISTS keys (
+                    seq        INTEGER NOT NULL,
+                    vendor_id  TEXT,
+                    name_lower TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_keys_vendor ON keys(vendor_id);
+                CREATE INDEX IF NOT EXISTS idx_keys_name ON keys(name_lower);
+            """)
+            if "tenant" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(entries)")}:
+                self._index_tenants()
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_tenant ON entries(tenant, seq)")
+
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 1
+        self._recover()
+        row = self._conn.execute("SELECT MAX(seq) AS seq FROM entries").fetchone()
+        self._next_seq = (row["seq"] or 0) + 1
+
+    # -------------------------------------------------------------------------
+    # Segments
+    # -------------------------------------------------------------------------
+
+    def _segments(self) -> list:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"audit-{segment:06d}.log.gz")
+
+    def _index_tenants(self) -> None:
+        """Add the tenant column to an index created before it existed."""
+        self._conn.execute("ALTER TABLE entries ADD COLUMN tenant TEXT")
+        rows = self._conn.execute("SELECT seq, segment, offset, length FROM entries").fetchall()
+        self._conn.executemany("UPDATE entries SET tenant = ? WHERE seq = ?",
+                               [(self._read(row).get("tenant"), row["seq"]) for row in rows])
+        print(f"[INFO] Audit log: indexed the tenant of {len(rows)} entries")
+
+    def _recover(self) -> None:
+        """Index entries of the newest segment that were written but not indexed."""
+        path = self._segment_path(self._segment)
+        if not os.path.exists(path):
+            return
+        row = self._conn.execute(
+            "SELECT MAX(offset + length) AS end FROM entries WHERE segment = ?", (self._segment,)
+        ).fetchone()
+        offset = row["end"] or 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+
+        recovered = 0
+        while tail:
+            inflater = zlib.decompressobj(wbits=31)
+            try:
+                payload = inflater.decompress(tail)
+            except zlib.error:
+                payload = None
+            if payload is None or not inflater.eof:
+                # Torn write at the end: drop it
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+                print(f"[WARN] Audit log: truncated torn entry at {path}:{offset}")
+                break
+            length = len(tail) - len(inflater.unused_data)
+            self._index(json.loads(payload), self._segment, offset, length)
+            recovered += 1
+            offset += length
+            tail = inflater.unused_data
+        if recovered:
+            self._conn.commit()
+            print(f"[INFO] Audit log: re-indexed {recovered} entries")
+
+    # -------------------------------------------------------------------------
+    # Writing
+    # -------------------------------------------------------------------------
+
+    def _index(self, entry: dict, segment: int, offset: int, length: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (seq, ts, date, kind, success, tenant, segment, offset, length) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (entry["seq"], entry["ts"], _utc_date(entry["ts"]), entry.get("kind", ""),
+             None if entry.get("success") is None else int(bool(entry["success"])),
+             entry.get("tenant"), segment, offset, length),
+        )
+        self._conn.executemany(
+            "INSERT INTO keys (seq, vendor_id, name_lower) VALUES (?, ?, ?)",
+            [(entry["seq"], key.get("vendor_id"), (key.get("name") or "").casefold() or None)
+             for key in entry.get("keys") or []],
+        )
+
+    def append(self, kind: str, keys: list, body: dict, success: bool = None) -> int:
+        """
+        Append an entry.
+
+        Args:
+            kind: Entry type, e.g. "create"
+            keys: [{"vendor_id": ..., "name": ...}] the entry is indexed under
+            body: Entry payload (request, response, ...)
+            success: Outcome, indexed for filtering
+
+        Returns:
+            The entry's sequence number
+        """
+        with self._lock:
+            seq = self._next_seq
+            entry = dict(body, seq=seq, ts=time.time(), kind=kind, success=success, keys=keys)
+            member = gzip.compress(
+                (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8"),
+                compresslevel=6,
+            )
+
+            path = self._segment_path(self._segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+                self._segment += 1
+                path = self._segment_path(self._segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+            with self._conn:
+                self._index(entry, self._segment, offset, len(member))
+            self._next_seq += 1
+            return seq
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+
+    def _read(self, row) -> dict:
+        with open(self._segment_path(row["segment"]), "rb") as f:
+            f.seek(row["offset"])
+            return json.loads(gzip.decompress(f.read(row["length"])))
+
+    def get(self, seq: int, tenant: str = None):
+        """The entry with sequence number `seq` (only if it belongs to `tenant`, if given)."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM entries WHERE seq = ?", (seq,)).fetchone()
+        if row is None or (tenant is not None and row["tenant"] != tenant):
+            return None
+        return self._read(row)
+
+    @staticmethod
+    def _filters(vendor_id: str = None, name: str = None, date_from: str = None,
+                 date_to: str = None, success: bool = None, kind: str = None,
+                 tenant: str = None) -> tuple:
+        """SQL conditions and arguments for the entry filters of search()."""
+        clauses, args = [], []
+        if tenant:
+            clauses.append("tenant = ?")
+            args.append(tenant)
+        if vendor_id or name:
+            sub, sub_args = [], []
+            if vendor_id:
+                sub.append("vendor_id = ?")
+                sub_args.append(vendor_id)
+            if name:
+                prefix = name.casefold()
+                sub.append("name_lower >= ? AND name_lower < ?")
+                sub_args.extend([prefix, prefix + "\U0010ffff"])
+            clauses.append(f"seq IN (SELECT seq FROM keys WHERE {' AND '.join(sub)})")
+            args.extend(sub_args)
+        if date_from:
+            clauses.append("date >= ?")
+            args.append(date_from)
+        if date_to:
+            clauses.append("date <= ?")
+            args.append(date_to)
+        if success is not None:
+            clauses.append("success = ?")
+            args.append(int(success))
+        if kind:
+            clauses.append("kind = ?")
+            args.append(kind)
+        return clauses, args
+
+    def search(self, vendor_id: str = None, name: str = None, date_from: str = None,
+               date_to: str = None, success: bool = None, tenant: str = None, limit: int = 50) -> list:
+        """
+        Entries matching all given filters, newest first.
+
+        `name` is a case-insensitive prefix match; dates are inclusive
+        YYYY-MM-DD (UTC).
+        """
+        clauses, args = self._filters(vendor_id, name, date_from, date_to, success, tenant=tenant)
+        sql = "SELECT * FROM entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        args.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [self._read(row) for row in rows]
+
+    def iter_entries(self, page_size: int = 1000, **filters):
+        """
+        Yield the entries matching search()'s filters (plus `kind`), oldest first.
+
+        Index rows are fetched a page at a time (keyset pagination on seq) and
+        entries are read one member at a time, so memory stays flat however
+        many entries match. Entries appended while iterating are included.
+        """
+        clauses, args = self._filters(**filters)
+        sql = "SELECT * FROM entries WHERE " + " AND ".join(clauses + ["seq > ?"]) + " ORDER BY seq LIMIT ?"
+        after = 0
+        segment, f = None, None
+        try:
+            while True:
+                with self._lock:
+                    rows = self._conn.execute(sql, args + [after, page_size]).fetchall()
+                for row in rows:
+                    if row["segment"] != segment:
+                        if f:
+                            f.close()
+                        segment = row["segment"]
+                        f = open(self._segment_path(segment), "rb")
+                    f.seek(row["offset"])
+                    yield json.loads(gzip.decompress(f.read(row["length"])))
+                if len(rows) < page_size:
+                    return
+                after = rows[-1]["seq"]
+        finally:
+            if f:
+                f.close()
+
+    def scan(self):
+        """Yield every entry, oldest first, by streaming through the segments."""
+        for segment in self._segments():
+            with gzip.open(self._segment_path(segment), "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def status(self) -> dict:
+        """Entry count and segment sizes of the whole log."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) AS n FROM entries").fetchone()["n"]
+        segments = self._segments()
+        return {
+            "entries": count,
+            "segments": len(segments),
+            "active_segment": self._segment,
+            "bytes": sum(os.path.getsize(self._segment_path(s)) for s in segments),
+        }
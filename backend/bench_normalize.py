@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Espressif Vendor Wizard - Normalization Benchmark
+Times the columnar normalization stage (normalize.py) on generated messy
+import rows and compares it with running the same checks row by row.
+
+Usage:
+    python bench_normalize.py                  # 1,000,000 rows
+    python bench_normalize.py --rows 100000 --row-by-row 20000
+"""
+
+import argparse
+import random
+import time
+
+import normalize
+from normalize import EMAIL_FIELDS, PHONE_FIELDS, TAX_FIELD, normalize_records
+
+# Messy but mostly valid, with about 2% bad values per field
+PHONES = [
+    "(021) 6215-8800 转 {n}", "138 {a} {b}", "+86 139-{a}-{b}", "0086 21 6215{a}",
+    "１３８{a}{b}", "+1 (415) 555-{a} x12", "13{a}{b}1, 0755-2671{a}",
+]
+BAD_PHONES = ["{a}", "n/a"]
+EMAILS = [
+    "Sales{n}@Example.COM", " ops{n}@example.cn ; Finance@Example.cn", "ＰＵＲＣＨＡＳＥ{n}＠ACME.COM",
+    "mailto:ap{n}@acme.com",
+]
+BAD_EMAILS = ["invoice{n}@", "无"]
+TAX_IDS = ["91350100M000100Y43", "9135 0100-M000100Y43", "91110000600037341L", "123456789012345"]
+BAD_TAX_IDS = ["91350100M000100Y44", "{n}"]
+CURRENCIES = ["rmb", "RMB", "CNY", "USD", "usd", "美元", "人民币"]
+BAD_CURRENCIES = ["Euro"]
+BAD_RATE = 0.02
+
+
+def pick(rng, good: list, bad: list) -> str:
+    return rng.choice(bad if rng.random() < BAD_RATE else good)
+
+
+def generate(rows: int, seed: int) -> list:
+    rng = random.Random(seed)
+    records = []
+    for n in range(rows):
+        a, b = f"{rng.randrange(10000):04d}", f"{rng.randrange(10000):04d}"
+        record = {"name": f"Customer {n}", "country_name": "中国",
+                  "currency_name": pick(rng, CURRENCIES, BAD_CURRENCIES)}
+        for field in PHONE_FIELDS:
+            record[field] = pick(rng, PHONES, BAD_PHONES).format(n=n % 1000, a=a, b=b)
+        for field in EMAIL_FIELDS:
+            record[field] = pick(rng, EMAILS, BAD_EMAILS).format(n=n)
+        record[TAX_FIELD] = pick(rng, TAX_IDS, BAD_TAX_IDS).format(n=n)
+        records.append(record)
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk field normalization")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows for the columnar run")
+    parser.add_argument("--row-by-row", type=int, default=100_000,
+                        help="Rows for the row-by-row comparison (0 skips it)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"numpy: {'yes' if normalize.np is not None else 'no'}")
+    print(f"Generating {args.rows:,} rows...")
+    records = generate(args.rows, args.seed)
+
+    start = time.perf_counter()
+    report = normalize_records(records)
+    elapsed = time.perf_counter() - start
+    invalid_rows = len({entry["row"] for entry in report})
+    print(f"Columnar:   {args.rows:,} rows in {elapsed:.2f} s "
+          f"({args.rows / elapsed:,.0f} rows/s), {len(report):,} errors in {invalid_rows:,} rows")
+
+    if args.row_by_row:
+        records = generate(args.row_by_row, args.seed)
+        start = time.perf_counter()
+        for record in records:
+            normalize_records([record])
+        per_row = time.perf_counter() - start
+        rate = args.row_by_row / per_row
+        print(f"Row by row: {args.row_by_row:,} rows in {per_row:.2f} s ({rate:,.0f} rows/s), "
+              f"columnar is {args.rows / elapsed / rate:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Espressif Vendor Wizard - Upstream Transport Benchmark
+Runs create_customer_in_langchao against the local emulator at several
+concurrency levels, once per transport (see transport.py), and reports
+throughput, latency and the number of client connections the emulator saw.
+The tenant's upstream scheduler (see scheduler.py) is sized to the highest
+concurrency level for the run, so it does not cap what is being measured;
+the output says so.
+The emulator runs in its own process so it doesn't compete with the
+client for the GIL.
+
+HTTP/2 needs httpx[http2] (client) and h2 (emulator); without them only
+HTTP/1.1 is measured.
+
+Usage:
+    python bench_transport.py                      # 1, 50 and 500 concurrent calls
+    python bench_transport.py --latency 100 --pool-size 50 --concurrency 1 10 100
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def emulator_connections(base_url: str, reset: bool = False) -> int:
+    import requests
+    response = requests.request("DELETE" if reset else "GET", f"{base_url}/_emulator/connections", timeout=5)
+    return response.json()["connections"]
+
+
+def start_emulator(port: int, latency: float) -> subprocess.Popen:
+    base_url = f"http://127.0.0.1:{port}"
+    emulator = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "emulator.py"),
+         "--port", str(port), "--latency", str(latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            emulator_connections(base_url)
+            return emulator
+        except Exception:
+            time.sleep(0.1)
+    emulator.terminate()
+    raise RuntimeError(f"emulator did not start on port {port}")
+
+
+def run(server, base_url: str, tenant, concurrency: int, calls: int) -> dict:
+    """Make `calls` creates with `concurrency` in flight; returns the measurements."""
+    counter = iter(range(calls))
+    counter_lock = threading.Lock()
+    latencies, failures = [], []
+
+    def worker():
+        while True:
+            with counter_lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            start = time.perf_counter()
+            result = server.create_customer_in_langchao([{"name": f"Bench Customer {n}"}], tenant=tenant)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not result.get("success"):
+                failures.append(result.get("error") or result.get("status_code"))
+
+    emulator_connections(base_url, reset=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(worker)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed": elapsed,
+        "rate": calls / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "connections": emulator_connections(base_url),
+        "failures": len(failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upstream HTTP transports against the emulator")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--calls", type=int, default=1000, help="Calls per run (at least one per worker)")
+    parser.add_argument("--latency", type=float, default=50, help="Emulated upstream latency (ms)")
+    parser.add_argument("--pool-size", type=int, default=10, help="Tenant connection pool size")
+    parser.add_argument("--port", type=int, default=18500, help="Port for the emulator")
+    args = parser.parse_args()
+
+    # server.py reads its upstream and storage settings at import
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ["LANGCHAO_BASE_URL_INTERNAL"] = base_url
+    os.environ["LANGCHAO_BASE_URL_EXTERNAL"] = base_url
+    os.environ["VENDOR_WIZARD_DATA_DIR"] = tempfile.mkdtemp(prefix="bench-transport-")
+    os.environ["MIRROR_SYNC_INTERVAL"] = "0"
+    os.environ["COALESCE_WINDOW_MS"] = "0"
+
+    import emulator
+    import server
+    import transport
+
+    transports = {"HTTP/1.1": lambda: transport.Http1Transport(args.pool_size)}
+    if transport.httpx is not None and emulator.h2 is not None:
+        transports["HTTP/2"] = lambda: transport.Http2Transport(args.pool_size)
+    else:
+        print("HTTP/2: skipped (needs httpx[http2] and h2)")
+
+    emulator_process = start_emulator(args.port, args.latency)
+
+    tenant = server.tenant_registry.default
+    # call_langchao first takes a slot from the tenant's scheduler, which
+    # would otherwise hold every run to UPSTREAM_CONCURRENCY calls in flight
+    default_cap = server.UPSTREAM_CONCURRENCY
+    server.UPSTREAM_CONCURRENCY = max(default_cap, *args.concurrency)
+    server.upstream_schedulers.pop(tenant.name, None)
+    print(f"Emulator latency {args.latency:g} ms, pool size {args.pool_size}, {args.calls} calls per run")
+    print(f"Upstream scheduler cap raised from {default_cap} to {server.UPSTREAM_CONCURRENCY} calls "
+          f"in flight for this benchmark")
+    print(f"{'transport':<10} {'concurrency':>11} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'connections':>11} {'failures':>8}")
+    try:
+        for name, make in transports.items():
+            for concurrency in args.concurrency:
+                tenant.transport = make()
+                result = run(server, base_url, tenant, concurrency, max(args.calls, concurrency))
+                tenant.transport.close()
+                print(f"{name:<10} {concurrency:>11} {result['rate']:>9.1f} {result['p50']:>8.1f} "
+                      f"{result['p99']:>8.1f} {result['connections']:>11} {result['failures']:>8}")
+    finally:
+        emulator_process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Espressif Vendor Wizard - Product Catalog
+Serves the ESP product catalog (families, modules, SoCs, dev kits, variants
+and the BVI routing list) from a JSON data file instead of constants
+compiled into the frontend.
+
+Every MPN and variant is indexed in a character trie for typeahead search.
+Keys are normalised (case-folded, punctuation removed) so "esp32s3wr"
+finds ESP32-S3-WROOM-1/1U, and every segment start is indexed too so
+"wroom" finds all WROOM modules. Exact lookups (family, SoC, BVI) are a
+dict hit.
+
+The catalog version is a hash of the file content and doubles as the
+ETag. The file is re-read when it changes on disk (checked at most once
+per `reload_interval`), so catalog updates need no redeploy.
+
+Data file format (see data/product_catalog.json):
+
+    {"families": [{"family": "ESP32-S3",
+                   "groups": [{"label": "SoCs", "products": ["ESP32-S3"]}]}],
+     "variants": {"ESP32-S3": ["ESP32-S3-MINI-1/1U"]},
+     "soc_variants": {"ESP32-S3": ["ESP32-S3 SOC"]},
+     "bvi_products": ["ESP32-S3 SOC"]}
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]")
+_SEGMENT = re.compile(r"[\s\-/()]+")
+
+SOC_GROUP = "SoCs"
+
+
+def normalize_key(text: str) -> str:
+    """Search key: case-folded with punctuation and spaces removed."""
+    return _NON_ALNUM.sub("", text.casefold())
+
+
+# =============================================================================
+# PREFIX INDEX
+# =============================================================================
+
+class PrefixIndex:
+    """
+    Character trie mapping normalised key prefixes to entry ids.
+
+    Each node keeps the ids of all entries below it (in insertion order,
+    capped at `max_per_node`), so a query is one walk down the trie with no
+    subtree traversal.
+    """
+
+    def __init__(self, max_per_node: int = 64):
+        self.max_per_node = max_per_node
+        self.root = {"ids": [], "children": {}}
+
+    def add(self, key: str, entry_id: int) -> None:
+        node = self.root
+        for char in key:
+            node = node["children"].setdefault(char, {"ids": [], "children": {}})
+            ids = node["ids"]
+            # Ids arrive in increasing order, so a repeat can only be the last one
+            if len(ids) < self.max_per_node and (not ids or ids[-1] != entry_id):
+                ids.append(entry_id)
+
+    def find(self, prefix: str) -> list:
+        node = self.root
+        for char in prefix:
+            node = node["children"].get(char)
+            if node is None:
+                return []
+        return node["ids"]
+
+
+# =============================================================================
+# CATALOG
+# =============================================================================
+
+class _Snapshot:
+    """One loaded catalog version with its indexes (immutable once built)."""
+
+    def __init__(self, data: dict, version: str):
+        self.data = data
+        self.version = version
+        self.entries = []
+        self.by_mpn = {}
+        self.name_index = PrefixIndex()
+        self.segment_index = PrefixIndex()
+
+        bvi = set(data.get("bvi_products") or [])
+        for family in data.get("families") or []:
+            for group in family.get("groups") or []:
+                for mpn in group.get("products") or []:
+                    self._add(mpn, family["family"], group["label"], group["label"] == SOC_GROUP, bvi)
+        for key, kind, soc in (("variants", "Module variants", False), ("soc_variants", "SoC variants", True)):
+            for family, mpns in (data.get(key) or {}).items():
+                for mpn in mpns:
+                    self._add(mpn, family, kind, soc, bvi)
+
+    def _add(self, mpn: str, family: str, group: str, soc: bool, bvi: set) -> None:
+        if mpn in self.by_mpn:
+            return
+        entry = {"mpn": mpn, "family": family, "group": group, "soc": soc, "bvi": mpn in bvi}
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        self.by_mpn[mpn] = entry
+
+        self.name_index.add(normalize_key(mpn), entry_id)
+        segments = [s for s in _SEGMENT.split(mpn) if s]
+        for i in range(1, len(segments)):
+            self.segment_index.add(normalize_key("".join(segments[i:])), entry_id)
+
+
+class ProductCatalog:
+    """
+    Hot-reloading product catalog with typeahead search.
+
+    Args:
+        path: Catalog JSON file
+        reload_interval: Minimum seconds between checks of the file's mtime
+    """
+
+    def __init__(self, path: str, reload_interval: float = 2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.loaded_at = None
+        self.last_error = None
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._load()
+        if self._snapshot is None:
+            raise ValueError(f"product catalog {path} could not be loaded: {self.last_error}")
+
+    def _load(self) -> None:
+        try:
+            # Remembered even if the content is broken, so it is retried only
+            # after the next edit
+            self._mtime = os.path.getmtime(self.path)
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            snapshot = _Snapshot(json.loads(raw), hashlib.sha256(raw).hexdigest()[:16])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the previous version if an edit is broken
+            self.last_error = str(e)
+            print(f"[WARN] Product catalog not (re)loaded: {e}")
+            return
+        if self._snapshot is None or snapshot.version != self._snapshot.version:
+            print(f"[INFO] Product catalog {snapshot.version}: {len(snapshot.entries)} products")
+        self._snapshot = snapshot
+        self.loaded_at = time.time()
+        self.last_error = None
+
+    def current(self) -> _Snapshot:
+        """The current catalog version, reloading it first if the file changed."""
+        now = time.monotonic()
+        if now - self._checked >= self.reload_interval:
+            with self._lock:
+                if now - self._checked >= self.reload_interval:
+                    self._checked = now
+                    try:
+                        changed = os.path.getmtime(self.path) != self._mtime
+                    except OSError:
+                        changed = False
+                    if changed:
+                        self._load()
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def data(self) -> dict:
+        snapshot = self.current()
+        return dict(snapshot.data, version=snapshot.version)
+
+    def lookup(self, mpn: str):
+        """Family/group/SoC/BVI info of an exact MPN, or None."""
+        return self.current().by_mpn.get(mpn)
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        Typeahead search.
+
+        MPNs starting with the query come first, then MPNs where a later
+        segment (e.g. "WROOM") starts with it, each in catalog order.
+        """
+        snapshot = self.current()
+        key = normalize_key(query)
+        if not key:
+            return snapshot.entries[:limit]
+        results, seen = [], set()
+        for index in (snapshot.name_index, snapshot.segment_index):
+            for entry_id in index.find(key):
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    results.append(snapshot.entries[entry_id])
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def status(self) -> dict:
+        """Version served and the outcome of the last reload (for deep health)."""
+        snapshot = self.current()
+        return {
+            "version": snapshot.version,
+            "products": len(snapshot.entries),
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,127 @@
+"""
+Espressif Vendor Wizard - Upstream Clock Skew Compensation
+Estimates the offset between our clock and the inSuite server's clock so
+signing timestamps match what the server expects.
+
+Every upstream response (API calls and health probes) carries an HTTP Date
+header. The header only has one-second resolution, so each response bounds
+the offset to an interval:
+
+    server time at reply  in [date, date + 1)
+    our time at reply     in [sent_at, received_at]
+    => offset             in [date - received_at, date + 1 - sent_at]
+
+Intersecting the intervals of recent responses narrows the estimate well
+below one second; if they stop overlapping (a clock was stepped), the
+window restarts from the newest sample.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+
+# One IMF-fixdate; a Date header repeated by a proxy arrives comma-joined
+_HTTP_DATE = re.compile(r"[A-Z][a-z]{2}, \d{2} [A-Z][a-z]{2} \d{4} \d{2}:\d{2}:\d{2} GMT")
+
+
+class ClockSkew:
+    """
+    Server clock offset estimator.
+
+    Args:
+        tolerance: Absolute skew in seconds above which an alert is raised
+        window: Number of recent samples intersected for the estimate
+        apply_threshold: Minimum skew (seconds) before timestamps are corrected;
+            smaller offsets are below the Date header's resolution
+    """
+
+    def __init__(self, tolerance: float = 30.0, window: int = 16, apply_threshold: float = 1.0):
+        self.tolerance = tolerance
+        self.apply_threshold = apply_threshold
+        self.samples = deque(maxlen=window)
+        self.offset = None
+        self.uncertainty = None
+        self.last_sample = None
+        self.resets = 0
+        self.alerting = False
+        self._lock = threading.Lock()
+
+    def observe(self, date_header: str, sent_at: float, received_at: float) -> bool:
+        """
+        Add a sample from a response's Date header.
+
+        Args:
+            date_header: Value of the Date response header (may be None)
+            sent_at: time.time() just before the request was sent
+            received_at: time.time() just after the response arrived
+
+        Returns:
+            True if the header was usable
+        """
+        dates = _HTTP_DATE.findall(date_header or "")
+        if not dates:
+            return False
+        try:
+            # With several values, the last one is the origin's own
+            server_time = parsedate_to_datetime(dates[-1]).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+        with self._lock:
+            self.samples.append((server_time - received_at, server_time + 1 - sent_at))
+            low = max(s[0] for s in self.samples)
+            high = min(s[1] for s in self.samples)
+            if low > high:
+                # Samples disagree: one of the clocks jumped, start over
+                self.samples.clear()
+                self.samples.append((server_time - received_at, server_time + 1 - sent_at))
+                low, high = self.samples[0]
+                self.resets += 1
+            self.offset = (low + high) / 2
+            self.uncertainty = (high - low) / 2
+            self.last_sample = received_at
+            self._check_alert()
+        return True
+
+    def _check_alert(self) -> None:
+        alerting = abs(self.offset) > self.tolerance
+        if alerting and not self.alerting:
+            print(f"[WARN] Clock skew vs inSuite is {self.offset:+.1f} s "
+                  f"(tolerance {self.tolerance:.0f} s); signing timestamps are being corrected")
+        elif self.alerting and not alerting:
+            print(f"[INFO] Clock skew back within tolerance ({self.offset:+.1f} s)")
+        self.alerting = alerting
+
+    @property
+    def correction(self) -> float:
+        """Seconds added to our clock when signing (0 below the apply threshold)."""
+        offset = self.offset
+        if offset is None or abs(offset) < self.apply_threshold:
+            return 0.0
+        return offset
+
+    def now(self) -> float:
+        """Estimated current server time."""
+        return time.time() + self.correction
+
+    def timestamp(self) -> int:
+        """Signing timestamp in server time."""
+        return int(self.now())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "offset_seconds": round(self.offset, 3) if self.offset is not None else None,
+                "uncertainty_seconds": round(self.uncertainty, 3) if self.uncertainty is not None else None,
+                "correction_seconds": round(self.correction, 3),
+                "tolerance_seconds": self.tolerance,
+                "alerting": self.alerting,
+                "samples": len(self.samples),
+                "resets": self.resets,
+                "last_sample_age_seconds": (
+                    round(time.time() - self.last_sample, 1) if self.last_sample else None
+                ),
+            }
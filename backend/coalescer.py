@@ -0,0 +1,91 @@
+"""
+Espressif Vendor Wizard - Submission Coalescing
+Merges concurrent single-customer submissions into one multi-record
+upstream call.
+
+The first submission for a key (tenant + endpoint override) opens a batch
+and waits up to `window` seconds; submissions arriving meanwhile join it.
+The batch is flushed when the window ends or it reaches `max_batch`
+records, on the thread of the submission that opened it, and each caller
+receives its own record's result. No extra threads are used: at peak, N
+wizard users submitting in the same instant cost one signed call instead
+of N, at the price of at most one window of added latency.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.full = threading.Event()
+
+
+class Coalescer:
+    """
+    Leader-based micro-batcher.
+
+    Args:
+        flush: Callable(key, items) returning one result per item, in order
+        window: Seconds the first item of a batch waits for company
+        max_batch: Items that trigger an immediate flush
+    """
+
+    def __init__(self, flush, window: float = 0.02, max_batch: int = 50):
+        self.flush = flush
+        self.window = window
+        self.max_batch = max_batch
+        self.flushes = 0
+        self.items = 0
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, item):
+        """Add an item to the open batch for `key` and wait for its result."""
+        future = Future()
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch:
+                # Close the batch; the leader flushes it right away
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._run(key, batch)
+        return future.result()
+
+    def _run(self, key, batch: _Batch) -> None:
+        with self._lock:
+            self.flushes += 1
+            self.items += len(batch.items)
+        if len(batch.items) > 1:
+            print(f"[INFO] Coalesced {len(batch.items)} submissions into one call")
+        try:
+            results = self.flush(key, batch.items)
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "flushes": self.flushes,
+                "items": self.items,
+                "open_batches": len(self._open),
+            }
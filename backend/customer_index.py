@@ -0,0 +1,269 @@
+"""
+Espressif Vendor Wizard - Duplicate Customer Detection
+In-memory index of known customers for spotting duplicates before a new
+customer is created in Langchao.
+
+Tax IDs are matched exactly through a hash lookup. Company names (name,
+foreign name and invoice title) are normalized and matched fuzzily using
+character trigrams, which works the same for Latin and CJK names. Entries
+are appended to a JSONL file and reloaded on startup; a customer number
+seen again replaces its earlier entry instead of adding another.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+
+
+# =============================================================================
+# NORMALIZATION
+# =============================================================================
+
+# Legal forms that carry no identifying information. Only legal forms are
+# dropped: words like "Technology" or "电子" tell customers apart. Latin
+# forms are stripped as whole trailing words ("Co., Ltd.", "S.A."), never
+# from inside a word; CJK names have no word breaks, so CJK forms are
+# stripped from the end of the name, longest first.
+LEGAL_FORMS = {
+    "co", "ltd", "coltd", "limited", "inc", "incorporated", "corp", "corporation",
+    "llc", "gmbh", "pte", "bv", "sa", "ag", "plc", "company",
+}
+CJK_LEGAL_FORMS = ("股份有限公司", "有限责任公司", "有限公司", "公司")
+
+NAME_FIELDS = ("name", "X_char_gzcp4gjmhi", "inv_title")
+TAX_FIELD = "inv_tax_number"
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_name(value) -> str:
+    """
+    Normalize a company name for comparison.
+
+    Applies NFKC (full-width -> half-width), case folding, drops punctuation
+    and whitespace, and strips trailing legal forms such as "有限公司" or
+    "Co., Ltd." (see LEGAL_FORMS).
+    """
+    if not isinstance(value, str):
+        return ""
+    words = [word for word in _NON_WORD.split(unicodedata.normalize("NFKC", value).casefold()) if word]
+    while len(words) > 1:
+        if words[-1] in LEGAL_FORMS:
+            words.pop()
+        elif len(words) > 2 and words[-2] + words[-1] in LEGAL_FORMS:
+            # Dotted abbreviations: "S.A." -> "s", "a"
+            del words[-2:]
+        else:
+            break
+    text = "".join(words)
+    for suffix in CJK_LEGAL_FORMS:
+        if text.endswith(suffix) and len(text) > len(suffix):
+            return text[:-len(suffix)]
+    return text
+
+
+def normalize_tax_id(value) -> str:
+    """Upper-case a tax ID and drop spaces and separators."""
+    if not isinstance(value, str):
+        return ""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", value)).upper()
+
+
+def validate_entry(record) -> list:
+    """
+    Check a known customer before it is indexed.
+
+    Returns:
+        A list of error strings; empty if the record can be indexed
+    """
+    if not isinstance(record, dict):
+        return ["record must be a JSON object"]
+    errors = [f"{field} must be a string" for field in NAME_FIELDS + (TAX_FIELD, "number")
+              if record.get(field) not in (None, False) and not isinstance(record[field], str)]
+    if not errors and not any(record.get(field) for field in NAME_FIELDS + (TAX_FIELD,)):
+        errors.append(f"record needs a name or {TAX_FIELD}")
+    return errors
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of a normalized name (whole string if shorter)."""
+    if len(text) < 3:
+        return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# =============================================================================
+# CUSTOMER INDEX
+# =============================================================================
+
+class CustomerIndex:
+    """
+    Exact tax-ID and fuzzy-name index over known customers.
+
+    Args:
+        path: JSONL file the index is persisted to (None for memory only)
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._customers = []          # entry id -> customer summary
+        self._by_tax = {}             # normalized tax ID -> set of entry ids
+        self._by_trigram = {}         # trigram -> set of entry ids
+        self._names = []              # entry id -> {field: (normalized name, trigrams)}
+        self._by_number = {}          # customer number -> entry id
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self._add(json.loads(line))
+
+    @staticmethod
+    def summarize(record: dict, source: str) -> dict:
+        """Keep only the fields used for matching and display."""
+        summary = {field: record.get(field) or "" for field in NAME_FIELDS + (TAX_FIELD,)}
+        summary["number"] = record.get("number") or ""
+        summary["source"] = source
+        return summary
+
+    def _add(self, summary: dict):
+        """Index a summary; returns its entry id, or None if it was already indexed as is."""
+        entry_id = self._by_number.get(summary.get("number"))
+        if entry_id is None:
+            entry_id = len(self._customers)
+            self._customers.append(summary)
+            self._names.append({})
+            if summary.get("number"):
+                self._by_number[summary["number"]] = entry_id
+        elif self._customers[entry_id] == summary:
+            return None
+        else:
+            # The customer changed: replace its entry
+            self._unindex(entry_id)
+            self._customers[entry_id] = summary
+
+        tax_id = normalize_tax_id(summary.get(TAX_FIELD))
+        if tax_id:
+            self._by_tax.setdefault(tax_id, set()).add(entry_id)
+
+        names = {}
+        for field in NAME_FIELDS:
+            normalized = normalize_name(summary.get(field))
+            if normalized:
+                grams = trigrams(normalized)
+                names[field] = (normalized, grams)
+                for gram in grams:
+                    self._by_trigram.setdefault(gram, set()).add(entry_id)
+        self._names[entry_id] = names
+        return entry_id
+
+    def _unindex(self, entry_id: int) -> None:
+        tax_id = normalize_tax_id(self._customers[entry_id].get(TAX_FIELD))
+        if tax_id:
+            self._by_tax.get(tax_id, set()).discard(entry_id)
+        for _, grams in self._names[entry_id].values():
+            for gram in grams:
+                self._by_trigram.get(gram, set()).discard(entry_id)
+        self._names[entry_id] = {}
+
+    def add(self, records: list, source: str = "submitted") -> int:
+        """
+        Add customer records (Langchao API field names) to the index.
+
+        Records without any name or tax ID are ignored. A record whose
+        customer number is already indexed replaces that entry, or is
+        skipped if nothing it is matched on changed.
+
+        Returns:
+            Number of records added or updated
+        """
+        added = 0
+        with self._lock:
+            lines = []
+            for record in records:
+                if not isinstance(record, dict):
+                    continue
+                summary = self.summarize(record, source)
+                if not any(summary[field] for field in NAME_FIELDS + (TAX_FIELD,)):
+                    continue
+                if self._add(summary) is None:
+                    continue
+                lines.append(json.dumps(summary, ensure_ascii=False))
+                added += 1
+            if self.path and lines:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+        return added
+
+    def match(self, record: dict, threshold: float = 0.6, limit: int = 10) -> list:
+        """
+        Find known customers that look like `record`.
+
+        Name similarity is the Dice coefficient of the trigram sets, taking
+        the best pair across name, foreign name and invoice title. An exact
+        tax ID match always scores 1.0.
+
+        Returns:
+            Up to `limit` matches sorted by score, each with the matched
+            customer and the reasons it matched
+        """
+        tax_id = normalize_tax_id(record.get(TAX_FIELD))
+        query = {}
+        for field in NAME_FIELDS:
+            normalized = normalize_name(record.get(field))
+            if normalized:
+                query[field] = (normalized, trigrams(normalized))
+
+        with self._lock:
+            scores = {}
+            reasons = {}
+
+            for entry_id in self._by_tax.get(tax_id, ()) if tax_id else ():
+                scores[entry_id] = 1.0
+                reasons.setdefault(entry_id, []).append(f"{TAX_FIELD} exact")
+
+            # Prefix filtering: a candidate with Dice >= threshold shares at
+            # least ceil(t*|q| / (2-t)) of the query's trigrams, so it must
+            # contain one of the |q| - that + 1 rarest ones. Common trigrams
+            # (e.g. from "深圳市" or "Technology") then never enumerate the
+            # whole index.
+            candidates = set()
+            for _, grams in query.values():
+                min_shared = max(1, math.ceil(threshold * len(grams) / (2 - threshold)))
+                rarest = sorted(grams, key=lambda g: len(self._by_trigram.get(g, ())))
+                for gram in rarest[:len(grams) - min_shared + 1]:
+                    candidates.update(self._by_trigram.get(gram, ()))
+
+            for entry_id in candidates:
+                best, best_reason = 0.0, None
+                for q_field, (q_text, q_grams) in query.items():
+                    for c_field, (c_text, c_grams) in self._names[entry_id].items():
+                        if q_text == c_text:
+                            score = 1.0
+                        else:
+                            score = 2 * len(q_grams & c_grams) / (len(q_grams) + len(c_grams))
+                        if score > best:
+                            best, best_reason = score, f"{q_field} ~ {c_field}"
+                if best >= threshold:
+                    scores[entry_id] = max(scores.get(entry_id, 0.0), best)
+                    reasons.setdefault(entry_id, []).append(f"{best_reason} ({best:.2f})")
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [
+                {
+                    "score": round(score, 3),
+                    "reasons": reasons[entry_id],
+                    "customer": dict(self._customers[entry_id]),
+                }
+                for entry_id, score in ranked
+            ]
@@ -0,0 +1,93 @@
+"""
+Espressif Vendor Wizard - Request Deadlines
+Carries the caller's time budget through a request, so upstream calls never
+outlive the client waiting for them.
+
+A client sends the milliseconds it is still willing to wait in the
+X-Request-Timeout header (relative, so client and server clocks need not
+agree). The absolute deadline is kept on the request; code asks
+`remaining()` for the budget left before starting slow work (and loops
+that make several upstream calls check `expired()` before each one) and
+gives up with DEADLINE_EXCEEDED once it is spent, instead of doing work
+nobody will read the result of.
+
+Outside a request, or when the client sends no header, there is no
+deadline and `remaining()` returns None.
+"""
+
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, jsonify, request
+
+
+DEADLINE_HEADER = "X-Request-Timeout"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+
+def current_deadline():
+    """The current request's deadline (time.monotonic() value), or None."""
+    if has_request_context():
+        return getattr(g, "deadline", None)
+    return None
+
+
+def remaining():
+    """Seconds left until the current deadline, or None without one."""
+    deadline = current_deadline()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """Whether the current deadline has passed (False without one)."""
+    budget = remaining()
+    return budget is not None and budget <= 0
+
+
+def deadline_exceeded(stage: str) -> dict:
+    """Result returned when work is abandoned because the caller gave up."""
+    return {"success": False, "error": DEADLINE_EXCEEDED,
+            "message": f"Client deadline exceeded before {stage}"}
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Run a block under another deadline (None: no deadline)."""
+    if not has_request_context():
+        yield
+        return
+    previous = getattr(g, "deadline", None)
+    g.deadline = deadline
+    try:
+        yield
+    finally:
+        g.deadline = previous
+
+
+class Deadlines:
+    """
+    Installs a request hook that reads the client's deadline header.
+
+    Args:
+        app: The Flask app
+        maximum: Upper bound in seconds on any client budget
+    """
+
+    def __init__(self, app, maximum: float = 120.0):
+        self.maximum = maximum
+        app.before_request(self._start)
+
+    def _start(self):
+        header = request.headers.get(DEADLINE_HEADER)
+        g.deadline = None
+        if header is None:
+            return None
+        try:
+            budget = float(header) / 1000
+        except ValueError:
+            return None
+        if budget <= 0:
+            return jsonify({"success": False, "error": DEADLINE_EXCEEDED,
+                            "message": "Request arrived after its deadline"}), 504
+        g.deadline = time.monotonic() + min(budget, self.maximum)
+        return None
@@ -0,0 +1,176 @@
+"""
+Espressif Vendor Wizard - Server-side Wizard Drafts
+Persists in-progress wizard submissions keyed by vendor id, so a lost tab
+can be resumed and the final submit does not have to re-send every field.
+
+The wizard PATCHes only the fields that changed at each step (JSON merge
+patch semantics: a null value removes the field). The draft holds both the
+raw wizard form state (for resuming) and the mapped Langchao API record, so
+committing a draft is a tiny call that reuses the stored record.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+# =============================================================================
+# DRAFT STORE
+# =============================================================================
+
+class DraftConflict(Exception):
+    """Raised when a draft is not in a state that allows the operation."""
+
+
+class DraftStore:
+    """
+    SQLite-backed draft storage.
+
+    Args:
+        path: SQLite database file
+        ttl_days: Uncommitted drafts untouched for longer than this are purged
+    """
+
+    def __init__(self, path: str, ttl_days: float = 30):
+        self.path = path
+        self.ttl_days = ttl_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS drafts (
+                    vendor_id   TEXT PRIMARY KEY,
+                    record      TEXT NOT NULL DEFAULT '{}',
+                    form        TEXT NOT NULL DEFAULT '{}',
+                    metadata    TEXT NOT NULL DEFAULT '{}',
+                    step        TEXT,
+                    version     INTEGER NOT NULL DEFAULT 0,
+                    status      TEXT NOT NULL DEFAULT 'draft',
+                    result      TEXT,
+                    created_at  REAL NOT NULL,
+                    updated_at  REAL NOT NULL
+                )
+            """)
+        self.purge_expired()
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        return {
+            "vendor_id": row["vendor_id"],
+            "record": json.loads(row["record"]),
+            "form": json.loads(row["form"]),
+            "metadata": json.loads(row["metadata"]),
+            "step": row["step"],
+            "version": row["version"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    @staticmethod
+    def _merge(current: dict, delta: dict) -> dict:
+        """Apply a top-level JSON merge patch (None removes the key)."""
+        merged = dict(current)
+        for key, value in delta.items():
+            if value is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = value
+        return merged
+
+    def get(self, vendor_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM drafts WHERE vendor_id = ?", (vendor_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def patch(self, vendor_id: str, record: dict = None, form: dict = None,
+              metadata: dict = None, step: str = None, base_version: int = None) -> dict:
+        """
+        Merge deltas into a draft, creating it if needed.
+
+        Raises:
+            DraftConflict: The draft is already committed, or base_version
+                does not match the stored version
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM drafts WHERE vendor_id = ?", (vendor_id,)
+            ).fetchone()
+            draft = self._to_dict(row) if row else {
+                "record": {}, "form": {}, "metadata": {}, "step": None,
+                "version": 0, "status": "draft", "created_at": now,
+            }
+            if draft["status"] != "draft":
+                raise DraftConflict(f"draft is {draft['status']}")
+            if base_version is not None and base_version != draft["version"]:
+                raise DraftConflict(f"version mismatch (stored {draft['version']})")
+
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO drafts
+                    (vendor_id, record, form, metadata, step, version, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, 'draft', ?, ?)
+                """,
+                (
+                    vendor_id,
+                    json.dumps(self._merge(draft["record"], record or {}), ensure_ascii=False),
+                    json.dumps(self._merge(draft["form"], form or {}), ensure_ascii=False),
+                    json.dumps(self._merge(draft["metadata"], metadata or {}), ensure_ascii=False),
+                    step if step is not None else draft["step"],
+                    draft["version"] + 1,
+                    draft["created_at"],
+                    now,
+                ),
+            )
+        return self.get(vendor_id)
+
+    def begin_commit(self, vendor_id: str) -> dict:
+        """
+        Atomically move a draft from "draft" to "committing".
+
+        Guarantees only one concurrent commit can submit the record upstream.
+
+        Raises:
+            DraftConflict: The draft is not in the "draft" state
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE drafts SET status = 'committing', updated_at = ? "
+                "WHERE vendor_id = ? AND status = 'draft'",
+                (time.time(), vendor_id),
+            )
+            if cursor.rowcount == 0:
+                raise DraftConflict("draft is not open for commit")
+        return self.get(vendor_id)
+
+    def finish_commit(self, vendor_id: str, success: bool, result: dict) -> None:
+        """Record the upstream result; failed commits reopen the draft for retry."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE drafts SET status = ?, result = ?, updated_at = ? WHERE vendor_id = ?",
+                (
+                    "committed" if success else "draft",
+                    json.dumps(result, ensure_ascii=False),
+                    time.time(),
+                    vendor_id,
+                ),
+            )
+
+    def delete(self, vendor_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM drafts WHERE vendor_id = ?", (vendor_id,))
+        return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl_days * 86400
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM drafts WHERE status = 'draft' AND updated_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Espressif Vendor Wizard - Local Langchao inSuite Emulator
+A small stand-in for the inSuite special API, for exercising the backend
+(mirror sync, batch submission, benchmarks) without touching the real ERP.
+
+Implements the create1, update1 and read (search1) routes with the same
+request signing as the real API, keeping customers in memory. --clock-offset skews
+the emulated server clock (Date header and timestamp check) to exercise
+clock skew compensation.
+
+Cleartext HTTP/2 (prior knowledge) is served on the same port as HTTP/1.1
+when the optional h2 package is installed, so the HTTP/2 transport can be
+exercised too (see transport.py). HTTP/1.1 connections are kept alive
+like a real gateway's, and the client connections used are counted for
+the transport benchmark.
+
+Usage:
+    python emulator.py --port 5002 --latency 50
+    LANGCHAO_BASE_URL_INTERNAL=http://localhost:5002 python server.py
+"""
+
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask, request, jsonify
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:   # optional dependency
+    h2 = None
+
+app = Flask(__name__)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Must match the credentials configured in server.py
+CLIENT_ID = "uJgCcz2rNYAQPIfRFR6JaMo5doYShnyR"
+SECRET_KEY = "RoGUu7QpClCS8p8AwEhvtYoBqPleHXIQ"
+
+CREATE_ROUTE = "/studio/api_special/insuite/mdm_customer/create1"
+READ_ROUTE = "/studio/api_special/insuite/mdm_customer/search1"
+UPDATE_ROUTE = "/studio/api_special/insuite/mdm_customer/update1"
+
+# Simulated behaviour (set from the command line)
+LATENCY_MS = 0          # added to every API call
+FAIL_RATE = 0.0         # fraction of calls answered with a transient 503
+CLOCK_OFFSET = 0.0      # seconds the emulated server clock is ahead of ours
+TIMESTAMP_TOLERANCE = 300   # signed timestamps further off than this are rejected
+
+# In-memory customer master
+customers = {}
+customers_lock = threading.Lock()
+next_id = itertools.count(1)
+
+# Client connections seen, as (address, port)
+connections = set()
+connections_lock = threading.Lock()
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def get_msg_auth_code(api_route: str, secret_key: str, timestamp: int, json_str: str, method: str = 'post') -> str:
+    """Same signature algorithm as the real API (see server.py)."""
+    secret = f"ts@{timestamp}|route@{api_route}|sec@{secret_key}|method@{method}"
+    mac_key = hashlib.sha512(secret.encode('utf-8')).digest()
+    return hmac.new(mac_key, json_str.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def server_time() -> float:
+    return time.time() + CLOCK_OFFSET
+
+
+def now_str() -> str:
+    return datetime.fromtimestamp(server_time(), timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def rpc_result(result):
+    return jsonify({"jsonrpc": "2.0", "id": None, "result": result})
+
+
+def rpc_error(code: int, message: str, status: int = 200, detail: str = None):
+    error = {"code": code, "message": message}
+    if detail:
+        error["data"] = {"name": "odoo.exceptions.ValidationError", "message": detail}
+    return jsonify({"jsonrpc": "2.0", "id": None, "error": error}), status
+
+
+def record_error(record, numbers: set):
+    """Why the ERP would reject this record, or None (mirrors create1's checks)."""
+    if not isinstance(record, dict) or not str(record.get("name") or "").strip():
+        return "name is required"
+    number = record.get("number")
+    if number and number in numbers:
+        return f"customer number {number} already exists"
+    return None
+
+
+def read_signed_params(route: str):
+    """
+    Parse and verify a signed request.
+
+    Returns:
+        (param, None) on success or (None, error_response) on failure
+    """
+    if LATENCY_MS:
+        time.sleep(LATENCY_MS / 1000)
+    if FAIL_RATE and random.random() < FAIL_RATE:
+        return None, rpc_error(503, "Service temporarily unavailable", status=503)
+
+    body = request.get_json(silent=True) or {}
+    params = body.get("params") or {}
+    param = params.get("param")
+    if params.get("client_id") != CLIENT_ID or not isinstance(param, list):
+        return None, rpc_error(400, "invalid request")
+
+    try:
+        timestamp = int(params.get("timestamp"))
+    except (TypeError, ValueError):
+        return None, rpc_error(400, "invalid timestamp")
+    if abs(server_time() - timestamp) > TIMESTAMP_TOLERANCE:
+        return None, rpc_error(401, "timestamp expired")
+
+    param_json = json.dumps(param, separators=(',', ':'), ensure_ascii=False)
+    expected = get_msg_auth_code(route, SECRET_KEY, params.get("timestamp"), param_json, 'post')
+    if not hmac.compare_digest(expected, str(params.get("sign", ""))):
+        return None, rpc_error(401, "invalid sign")
+    return param, None
+
+
+# =============================================================================
+# ROUTES
+# =============================================================================
+
+@app.before_request
+def count_connection():
+    if request.path.startswith("/_emulator/"):
+        return
+    with connections_lock:
+        connections.add((request.environ.get("REMOTE_ADDR"), request.environ.get("REMOTE_PORT")))
+
+
+@app.after_request
+def add_date_header(response):
+    """Report the emulated server clock, like the real gateway's Date header."""
+    response.headers["Date"] = formatdate(server_time(), usegmt=True)
+    return response
+
+
+@app.route('/', methods=['GET'])
+def index():
+    """Answer health probes."""
+    return "Langchao inSuite emulator", 200
+
+
+@app.route(CREATE_ROUTE, methods=['POST'])
+def create1():
+    param, error = read_signed_params(CREATE_ROUTE)
+    if error:
+        return error
+
+    created = []
+    with customers_lock:
+        # create1 runs in one transaction: any invalid record rejects the call
+        numbers = {c["number"] for c in customers.values()}
+        for position, record in enumerate(param):
+            error = record_error(record, numbers)
+            if error:
+                return rpc_error(200, "Odoo Server Error", detail=f"record {position}: {error}")
+            if record.get("number"):
+                numbers.add(record["number"])
+        for record in param:
+            customer_id = next(next_id)
+            customer = dict(record)
+            customer["id"] = customer_id
+            customer["number"] = record.get("number") or f"CUST{customer_id:06d}"
+            customer["write_date"] = now_str()
+            customers[customer_id] = customer
+            created.append({"id": customer_id, "number": customer["number"]})
+    return rpc_result({"code": 200, "data": created})
+
+
+@app.route(UPDATE_ROUTE, methods=['POST'])
+def update1():
+    param, error = read_signed_params(UPDATE_ROUTE)
+    if error:
+        return error
+
+    updated = []
+    with customers_lock:
+        # Like create1, one transaction: check every record before applying any
+        by_number = {c["number"]: c for c in customers.values()}
+        changes = []
+        for position, entry in enumerate(param):
+            entry = entry if isinstance(entry, dict) else {}
+            customer = customers.get(entry.get("id")) or by_number.get(entry.get("number"))
+            values = entry.get("values")
+            if customer is None:
+                return rpc_error(200, "Odoo Server Error", detail=f"record {position}: customer not found")
+            if not isinstance(values, dict):
+                return rpc_error(200, "Odoo Server Error", detail=f"record {position}: values are required")
+            error = record_error(dict(customer, **values), set())
+            if error:
+                return rpc_error(200, "Odoo Server Error", detail=f"record {position}: {error}")
+            changes.append((customer, values))
+        for customer, values in changes:
+            customer.update({k: v for k, v in values.items() if k not in ("id", "number", "write_date")})
+            customer["write_date"] = now_str()
+            updated.append({"id": customer["id"], "number": customer["number"],
+                            "write_date": customer["write_date"]})
+    return rpc_result({"code": 200, "data": updated})
+
+
+@app.route(READ_ROUTE, methods=['POST'])
+def search1():
+    param, error = read_signed_params(READ_ROUTE)
+    if error:
+        return error
+
+    query = param[0] if param and isinstance(param[0], dict) else {}
+    since = query.get("modified_since") or ""
+    after_id = int(query.get("after_id") or 0)
+    limit = min(int(query.get("limit") or 500), 5000)
+    numbers = set(query.get("numbers") or []) | ({query["number"]} if query.get("number") else set())
+    names = set(query.get("names") or [])
+
+    def wanted(customer):
+        if not numbers and not names:
+            return True
+        return customer["number"] in numbers or customer.get("name") in names
+
+    with customers_lock:
+        changed = sorted(
+            (c for c in customers.values()
+             if (c["write_date"], c["id"]) > (since, after_id) and wanted(c)),
+            key=lambda c: (c["write_date"], c["id"]),
+        )
+    page = changed[:limit]
+    return rpc_result({"records": page, "has_more": len(changed) > limit})
+
+
+@app.route('/_emulator/connections', methods=['GET', 'DELETE'])
+def client_connections():
+    """Client connections seen (for bench_transport.py); DELETE resets the count."""
+    with connections_lock:
+        count = len(connections)
+        if request.method == 'DELETE':
+            connections.clear()
+    return jsonify({"connections": count})
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+# Werkzeug's development server closes the connection after every
+# response, unlike a real gateway. This small server keeps HTTP/1.1
+# connections alive and, with h2 installed, also speaks cleartext HTTP/2
+# (prior knowledge) on the same port.
+
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "upgrade"}
+
+
+def call_app(method: str, target: str, headers: dict, body: bytes, client_address, protocol: str):
+    """Run one request through the Flask app; returns (status code, headers, body)."""
+    path, _, query = target.partition("?")
+    environ = EnvironBuilder(path=path, query_string=query, method=method, data=body,
+                             headers=headers).get_environ()
+    environ.update(REMOTE_ADDR=client_address[0], REMOTE_PORT=client_address[1],
+                   SERVER_PROTOCOL=protocol)
+    app_iter, status, response_headers = run_wsgi_app(app, environ, buffered=True)
+    return int(status.split()[0]), [
+        (name, value) for name, value in response_headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    ], b"".join(app_iter)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 with persistent connections."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def dispatch(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        status, headers, payload = call_app(self.command, self.path, dict(self.headers), body,
+                                            self.client_address, self.request_version)
+        self.send_response_only(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.log_request(status, len(payload))
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = dispatch
+
+
+class H2Connection:
+    """
+    One cleartext HTTP/2 connection; every stream is answered by the Flask
+    app on its own thread, so slow calls don't hold up the others.
+    """
+
+    def __init__(self, sock, client_address):
+        self.sock = sock
+        self.client_address = client_address
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.lock = threading.Lock()
+        self.window_open = threading.Condition(self.lock)
+        self.streams = {}
+
+    def _flush(self) -> None:
+        data = self.conn.data_to_send()
+        if data:
+            self.sock.sendall(data)
+
+    def serve(self) -> None:
+        with self.lock:
+            self.conn.initiate_connection()
+            self._flush()
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            with self.lock:
+                try:
+                    events = self.conn.receive_data(data)
+                except h2.exceptions.ProtocolError:
+                    self._flush()
+                    return
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        self.streams[event.stream_id] = (dict(event.headers), bytearray())
+                    elif isinstance(event, h2.events.DataReceived):
+                        self.streams[event.stream_id][1].extend(event.data)
+                        self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, body = self.streams.pop(event.stream_id)
+                        threading.Thread(target=self.respond, args=(event.stream_id, headers, bytes(body)),
+                                         daemon=True).start()
+                    elif isinstance(event, (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged)):
+                        self.window_open.notify_all()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        self._flush()
+                        return
+                self._flush()
+
+    def respond(self, stream_id: int, headers: dict, body: bytes) -> None:
+        status, response_headers, payload = call_app(
+            headers.get(":method", "GET"), headers.get(":path", "/"),
+            {name: value for name, value in headers.items() if not name.startswith(":")},
+            body, self.client_address, "HTTP/2")
+
+        with self.lock:
+            try:
+                self.conn.send_headers(stream_id, [(":status", str(status))] + [
+                    (name.lower(), value) for name, value in response_headers])
+                # Send as much as the client's flow control window allows
+                while True:
+                    window = min(self.conn.local_flow_control_window(stream_id),
+                                 self.conn.max_outbound_frame_size)
+                    if len(payload) <= window:
+                        self.conn.send_data(stream_id, payload, end_stream=True)
+                        break
+                    if window > 0:
+                        self.conn.send_data(stream_id, payload[:window])
+                        payload = payload[window:]
+                    self._flush()
+                    if window <= 0:
+                        self.window_open.wait()
+                self._flush()
+            except (h2.exceptions.ProtocolError, OSError):
+                # Stream reset or connection gone meanwhile
+                pass
+
+
+class EmulatorServer(ThreadingHTTPServer):
+    """Threaded server that hands connections opening with the HTTP/2 preface to H2Connection."""
+
+    daemon_threads = True
+
+    def finish_request(self, request, client_address):
+        if h2 is not None:
+            try:
+                preface = request.recv(len(H2_PREFACE), socket.MSG_PEEK | socket.MSG_WAITALL)
+            except OSError:
+                return
+            if preface == H2_PREFACE:
+                H2Connection(request, client_address).serve()
+                return
+        super().finish_request(request, client_address)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 5002) -> EmulatorServer:
+    """The emulator's server (HTTP/1.1, plus HTTP/2 with h2), not yet serving."""
+    return EmulatorServer((host, port), KeepAliveHandler)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Langchao inSuite API emulator')
+    parser.add_argument('--port', type=int, default=5002, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0, help='Added latency per call (ms)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of calls failing with 503')
+    parser.add_argument('--clock-offset', type=float, default=0.0,
+                        help='Seconds the emulated server clock is ahead (negative = behind)')
+    args = parser.parse_args()
+
+    LATENCY_MS = args.latency
+    FAIL_RATE = args.fail_rate
+    CLOCK_OFFSET = args.clock_offset
+
+    print(f"Langchao emulator on http://localhost:{args.port} "
+          f"(latency {LATENCY_MS} ms, fail rate {FAIL_RATE}, HTTP/2 {'on' if h2 else 'off'})")
+    make_server('0.0.0.0', args.port).serve_forever()
@@ -0,0 +1,370 @@
+"""
+Espressif Vendor Wizard - Upstream Endpoint Selection
+Tracks the health and latency of the Langchao inSuite base URLs and picks the
+best one for each call.
+
+Each endpoint keeps an exponentially weighted moving average (EWMA) of its
+observed latency, fed both by real API calls and by a lightweight background
+probe. An endpoint is marked unhealthy after a few consecutive failures,
+which opens its circuit: calls skip it while the prober keeps checking it.
+After reset_timeout the circuit is half-open and a single trial call may use
+it again; the trial's outcome closes or re-opens the circuit. A dropped VPN
+thus costs one short probe timeout instead of a 30 s timeout on every
+customer call.
+
+The results of the last probe cycle are cached so the deep health check can
+report upstream reachability without generating any upstream traffic.
+
+Call timeouts adapt to the endpoint as well: TimeoutPolicy derives the
+connect timeout from recent probe round trips and the read timeout from
+recent call latencies (a high percentile times a safety factor), instead of
+waiting a fixed 30 s on every call.
+"""
+
+import threading
+import time
+from collections import deque
+
+import requests
+
+
+def _round(latency_ms):
+    return round(latency_ms, 1) if latency_ms is not None else None
+
+
+# =============================================================================
+# LATENCY PERCENTILES
+# =============================================================================
+
+class LatencyWindow:
+    """The most recent `size` latency samples, for percentile estimates."""
+
+    def __init__(self, size: int = 256):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency_ms: float) -> None:
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float):
+        """Nearest-rank q-quantile (0 < q <= 1) in ms, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, int(q * len(samples) + 0.5) - 1))]
+
+
+class TimeoutPolicy:
+    """
+    Connect and read timeouts derived from observed latency.
+
+    Each timeout is `multiplier` times the endpoint's `percentile` latency,
+    clamped to [minimum, maximum]. The connect timeout uses probe round trips
+    (a probe is one cheap GET, so its latency bounds the connect time); the
+    read timeout uses real calls. Until `min_samples` are seen the maximum is
+    used.
+
+    Args:
+        percentile: Latency quantile the timeouts are based on
+        multiplier: Safety factor applied to that quantile
+        connect: (minimum, maximum) connect timeout in seconds
+        read: (minimum, maximum) read timeout in seconds
+        min_samples: Samples needed before a timeout is adapted
+    """
+
+    def __init__(self, percentile: float = 0.99, multiplier: float = 3.0,
+                 connect: tuple = (0.5, 5.0), read: tuple = (5.0, 30.0), min_samples: int = 20):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.connect = connect
+        self.read = read
+        self.min_samples = min_samples
+
+    def _adapt(self, window: LatencyWindow, bounds: tuple) -> float:
+        minimum, maximum = bounds
+        if len(window) < self.min_samples:
+            return maximum
+        latency = window.percentile(self.percentile) / 1000 * self.multiplier
+        return min(max(latency, minimum), maximum)
+
+    def timeouts(self, endpoint, budget: float = None) -> tuple:
+        """
+        (connect, read) timeouts in seconds for a call to `endpoint`.
+
+        A caller's remaining `budget` caps both, so no call outlives the
+        caller. (requests applies the read timeout per socket read, so a
+        trickling response can still take somewhat longer.)
+        """
+        connect = self._adapt(endpoint.probe_latency, self.connect)
+        read = self._adapt(endpoint.call_latency, self.read)
+        if budget is not None:
+            connect, read = min(connect, budget), min(read, budget)
+        return connect, read
+
+
+# =============================================================================
+# ENDPOINT STATE
+# =============================================================================
+
+class Endpoint:
+    """Health and latency bookkeeping for a single base URL."""
+
+    def __init__(self, name: str, base_url: str, alpha: float, failure_threshold: int,
+                 reset_timeout: float = 30.0):
+        self.name = name
+        self.base_url = base_url
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.ewma_ms = None
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.last_checked = None
+        self.last_error = None
+        self.opened_at = None
+        self.trial_at = None
+        self.last_probe = None
+        self.call_latency = LatencyWindow()
+        self.probe_latency = LatencyWindow()
+        self._lock = threading.Lock()
+
+    def record_success(self, latency_ms: float, probe: bool = False) -> None:
+        """Fold a successful round trip into the EWMA and mark healthy."""
+        (self.probe_latency if probe else self.call_latency).add(latency_ms)
+        with self._lock:
+            if self.ewma_ms is None:
+                self.ewma_ms = latency_ms
+            else:
+                self.ewma_ms = self.alpha * latency_ms + (1 - self.alpha) * self.ewma_ms
+            self.healthy = True
+            self.consecutive_failures = 0
+            self.last_checked = time.time()
+            self.last_error = None
+            self.opened_at = None
+            self.trial_at = None
+
+    def record_failure(self, error: str) -> None:
+        """Count a failed round trip; too many in a row marks the endpoint down."""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_checked = time.time()
+            self.last_error = error
+            self.trial_at = None
+            if self.consecutive_failures >= self.failure_threshold:
+                # (Re-)open the circuit; a failed half-open trial restarts the wait
+                self.opened_at = self.last_checked
+                self.healthy = False
+
+    def record_probe(self, reachable: bool, latency_ms: float = None, status_code: int = None) -> None:
+        """Cache the outcome of the latest background probe."""
+        with self._lock:
+            self.last_probe = {
+                "at": time.time(),
+                "reachable": reachable,
+                "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+                "status_code": status_code,
+            }
+
+    @property
+    def circuit(self) -> str:
+        """
+        Circuit breaker state derived from the failure bookkeeping.
+
+        "closed" while healthy, "open" right after the endpoint is marked
+        down, and "half_open" once reset_timeout has passed and the next
+        call or probe is allowed to try it again.
+        """
+        if self.healthy:
+            return "closed"
+        if self.opened_at is not None and time.time() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allows_call(self) -> bool:
+        """
+        Whether a call may use this endpoint now.
+
+        Always while the circuit is closed, never while it is open. Half-open
+        admits one trial call at a time (a trial that never reports back
+        expires after reset_timeout); the caller must record its outcome.
+        """
+        with self._lock:
+            if self.healthy:
+                return True
+            now = time.time()
+            if self.opened_at is None or now - self.opened_at < self.reset_timeout:
+                return False
+            if self.trial_at is not None and now - self.trial_at < self.reset_timeout:
+                return False
+            self.trial_at = now
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "base_url": self.base_url,
+                "healthy": self.healthy,
+                "circuit": self.circuit,
+                "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+                "p50_ms": _round(self.call_latency.percentile(0.5)),
+                "p99_ms": _round(self.call_latency.percentile(0.99)),
+                "consecutive_failures": self.consecutive_failures,
+                "last_checked": self.last_checked,
+                "last_error": self.last_error,
+                "last_probe": dict(self.last_probe) if self.last_probe else None,
+            }
+
+
+# =============================================================================
+# ENDPOINT POOL
+# =============================================================================
+
+class EndpointPool:
+    """
+    Ranks the configured endpoints and probes them in the background.
+
+    Args:
+        endpoints: Mapping of endpoint name -> base URL, in tie-break order
+        alpha: EWMA smoothing factor (weight of the newest sample)
+        probe_interval: Seconds between background probes
+        probe_timeout: Timeout for a single probe request
+        failure_threshold: Consecutive failures before an endpoint is unhealthy
+        reset_timeout: Seconds an open circuit waits before going half-open
+        on_response: Optional callable(response, sent_at, received_at) invoked
+            with every probe response (wall-clock times, e.g. for clock skew)
+        timeout_policy: TimeoutPolicy for calls (default: TimeoutPolicy())
+    """
+
+    def __init__(self, endpoints: dict, alpha: float = 0.3, probe_interval: float = 15.0,
+                 probe_timeout: float = 3.0, failure_threshold: int = 2,
+                 reset_timeout: float = 30.0, on_response=None, timeout_policy: TimeoutPolicy = None):
+        self.endpoints = {
+            name: Endpoint(name, url, alpha, failure_threshold, reset_timeout)
+            for name, url in endpoints.items()
+        }
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.on_response = on_response
+        self.timeout_policy = timeout_policy or TimeoutPolicy()
+        self.last_probe_cycle = None
+        self._probe_thread = None
+        self._probe_lock = threading.Lock()
+
+    def get(self, name: str) -> Endpoint:
+        return self.endpoints[name]
+
+    def ranked(self, prefer: str = None) -> list:
+        """
+        Return endpoints in the order they should be tried.
+
+        A preferred endpoint (from the X-Use-Internal override) always goes
+        first. The rest are ordered healthy-before-unhealthy, then by EWMA
+        latency; endpoints with no samples yet keep their configured order.
+        Unhealthy endpoints are still listed: callers skip them unless
+        Endpoint.allows_call() admits a half-open trial.
+        """
+        order = list(self.endpoints.values())
+        position = {ep.name: i for i, ep in enumerate(order)}
+
+        def sort_key(ep):
+            latency = ep.ewma_ms if ep.ewma_ms is not None else float('inf')
+            return (not ep.healthy, latency, position[ep.name])
+
+        ranked = sorted(order, key=sort_key)
+        if prefer in self.endpoints:
+            ranked.remove(self.endpoints[prefer])
+            ranked.insert(0, self.endpoints[prefer])
+        return ranked
+
+    def best(self) -> Endpoint:
+        return self.ranked()[0]
+
+    def timeouts(self, endpoint: Endpoint, budget: float = None) -> tuple:
+        """(connect, read) timeouts for a call; see TimeoutPolicy.timeouts."""
+        return self.timeout_policy.timeouts(endpoint, budget)
+
+    # -------------------------------------------------------------------------
+    # Background probing
+    # -------------------------------------------------------------------------
+
+    def probe(self, endpoint: Endpoint):
+        """
+        Probe one endpoint with a cheap GET on its base URL.
+
+        Any HTTP response counts as reachable; only connection errors and
+        timeouts count as failures. Returns the response, or None on failure.
+        """
+        sent_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = requests.get(endpoint.base_url, timeout=self.probe_timeout)
+        except requests.exceptions.RequestException as e:
+            endpoint.record_failure(type(e).__name__)
+            endpoint.record_probe(reachable=False)
+            return None
+        latency_ms = (time.perf_counter() - start) * 1000
+        endpoint.record_success(latency_ms, probe=True)
+        endpoint.record_probe(reachable=True, latency_ms=latency_ms, status_code=response.status_code)
+        if self.on_response:
+            self.on_response(response, sent_at, sent_at + latency_ms / 1000)
+        return response
+
+    def probe_all(self) -> None:
+        for endpoint in self.endpoints.values():
+            self.probe(endpoint)
+        self.last_probe_cycle = time.time()
+
+    def _probe_loop(self) -> None:
+        while True:
+            try:
+                self.probe_all()
+            except Exception as e:
+                print(f"[WARN] Endpoint probe failed: {e}")
+            time.sleep(self.probe_interval)
+
+    def ensure_probing(self) -> None:
+        """Start the background prober once per process (not with probe_interval <= 0)."""
+        if self._probe_thread is not None or self.probe_interval <= 0:
+            return
+        with self._probe_lock:
+            if self._probe_thread is None:
+                self._probe_thread = threading.Thread(
+                    target=self._probe_loop, name="endpoint-prober", daemon=True
+                )
+                self._probe_thread.start()
+
+    def snapshot(self) -> list:
+        return [
+            dict(ep.snapshot(), timeouts=dict(zip(("connect", "read"), (round(t, 3) for t in self.timeouts(ep)))))
+            for ep in self.ranked()
+        ]
+
+    def health_report(self) -> dict:
+        """
+        Summarise cached upstream health for the deep health check.
+
+        Built purely from the last probe cycle and recent call outcomes; it
+        never contacts the upstream itself, so it is safe to poll often.
+        """
+        endpoints = self.snapshot()
+        reachable = [ep for ep in endpoints if ep["healthy"]]
+        if not reachable:
+            status = "down"
+        elif len(reachable) < len(endpoints):
+            status = "degraded"
+        else:
+            status = "ok"
+        age = time.time() - self.last_probe_cycle if self.last_probe_cycle else None
+        return {
+            "status": status,
+            "active_endpoint": reachable[0]["name"] if reachable else None,
+            "probe_interval": self.probe_interval,
+            "probe_age_seconds": round(age, 1) if age is not None else None,
+            "endpoints": endpoints,
+        }
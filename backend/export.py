@@ -0,0 +1,200 @@
+"""
+Espressif Vendor Wizard - Submission Export
+Streams historical submissions from the audit log (see audit.py) as CSV or
+Parquet, one row per customer record sent upstream.
+
+Everything is a generator: entries are read from the log one at a time,
+rows are encoded into blocks (about 64 KB of CSV, or one Parquet row group)
+and each block goes out as soon as it is ready, gzip-compressed on the fly
+if asked. Memory use is bounded by one block however large the export, so
+a full multi-gigabyte history streams like a small one.
+
+CSV starts with a UTF-8 byte order mark so Excel shows Chinese names
+correctly. Parquet needs pyarrow (optional); all its columns are strings,
+compressed inside the file (snappy by default).
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+
+from ingest import failure_message, iter_chunks
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:   # optional dependency
+    pa = None
+
+
+CSV = "csv"
+PARQUET = "parquet"
+
+CSV_COMPRESSIONS = ("none", "gzip")
+PARQUET_COMPRESSIONS = ("none", "snappy", "gzip", "zstd")
+
+# Columns describing the submission a row comes from
+ENTRY_COLUMNS = [
+    "seq", "submitted_at", "kind", "tenant", "success", "error", "trace_id",
+    "vendor_id", "assigned_vendor", "customer_id", "customer_number",
+]
+
+# Customer fields exported unless the caller picks others (API field names)
+DEFAULT_FIELDS = [
+    "name", "X_char_gzcp4gjmhi", "cust_group_number", "sale_user_number", "create_org_number",
+    "country_name", "currency_name", "inv_title", "inv_tax_number", "inv_telephone",
+    "X_char_5smvg51jqa", "X_char_ayuwxr8kn8", "X_char_0qgsyzxr8t", "X_char_xy0fi6varj", "note",
+]
+
+
+# =============================================================================
+# ROWS
+# =============================================================================
+
+def _cell(value) -> str:
+    if value is None or value is False:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _created(entry: dict, size: int) -> list:
+    """create1's {"id", "number"} per record of a create entry, if it returned them."""
+    data = (entry.get("response") or {}).get("data")
+    result = data.get("result") if isinstance(data, dict) else None
+    created = result.get("data") if isinstance(result, dict) else None
+    return created if isinstance(created, list) and len(created) == size else [{}] * size
+
+
+def _trace_id(entry: dict, position: int):
+    """Trace ID of a record's request (coalesced creates keep one per record)."""
+    trace_ids = entry.get("trace_ids") or []
+    return trace_ids[position] if position < len(trace_ids) else entry.get("trace_id")
+
+
+def _records(entry: dict):
+    """(record, metadata, created, error) for each customer record of an entry."""
+    if entry.get("kind") == "update":
+        errors = entry.get("errors") or []
+        for position, update in enumerate(entry.get("updates") or []):
+            meta = (entry.get("metadata") or [None] * (position + 1))[position]
+            error = errors[position] if position < len(errors) else None
+            yield (update.get("values") or {}, meta,
+                   {"id": update.get("id"), "number": update.get("number")}, error)
+        return
+
+    records = entry.get("records") or []
+    metadata = entry.get("metadata") or [None] * len(records)
+    error = None if entry.get("success") else failure_message(entry.get("response") or {})
+    for record, meta, created in zip(records, metadata, _created(entry, len(records))):
+        yield record, meta, created, error
+
+
+def iter_rows(entries, fields: list, vendor_id: str = None, name: str = None):
+    """
+    Flatten audit log entries into export rows of strings.
+
+    Args:
+        entries: Audit log entries (create and update), e.g. from AuditLog.iter_entries
+        fields: Customer fields to export after ENTRY_COLUMNS
+        vendor_id, name: Keep only these records of an entry (the log is
+            indexed per entry, and one create call may carry many records)
+
+    Yields:
+        One list of len(ENTRY_COLUMNS) + len(fields) strings per record
+    """
+    prefix = name.casefold() if name else None
+    for entry in entries:
+        submitted_at = datetime.fromtimestamp(entry["ts"], timezone.utc).isoformat(timespec="seconds")
+        keys = entry.get("keys") or []
+        for position, (record, meta, created, error) in enumerate(_records(entry)):
+            # Same per-record keys the audit index matched the entry on
+            key = keys[position] if position < len(keys) else {}
+            if vendor_id and key.get("vendor_id") != vendor_id:
+                continue
+            if prefix and not str(key.get("name") or "").casefold().startswith(prefix):
+                continue
+            meta = meta or {}
+            row = [
+                str(entry["seq"]), submitted_at, entry.get("kind") or "", _cell(entry.get("tenant")),
+                "false" if error else "true", error or "", _cell(_trace_id(entry, position)),
+                _cell(meta.get("vendor_id")), _cell(meta.get("assigned_vendor")),
+                _cell(created.get("id")), _cell(created.get("number")),
+            ]
+            row.extend(_cell(record.get(field)) for field in fields)
+            yield row
+
+
+# =============================================================================
+# ENCODERS
+# =============================================================================
+
+def csv_chunks(rows, columns: list, block_bytes: int = 64 * 1024):
+    """Encode rows as UTF-8 CSV (with BOM), in blocks of about `block_bytes`."""
+    buffer = io.StringIO()
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= block_bytes:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands out what was written so far (for ParquetWriter)."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets, so count everything ever written
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_chunks(rows, columns: list, row_group_size: int = 10000, compression: str = "snappy"):
+    """Encode rows as Parquet, yielding each row group as soon as it is written."""
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    try:
+        for block in iter_chunks(rows, row_group_size):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, pa.string()) for column in zip(*block)], schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def gzip_chunks(chunks, level: int = 6):
+    """Gzip a stream of byte chunks on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,473 @@
+"""
+Espressif Vendor Wizard - Batch Ingestion
+Incremental NDJSON parsing, record validation and chunked submission for
+large customer uploads (e.g. migrations from the old SAP customer list).
+
+Records are read one line at a time from the request stream and handed to the
+submitter in fixed-size chunks, so memory is bounded by the chunk size rather
+than by the size of the upload.
+
+Before submission, records are normalized a block at a time by the
+columnar stage in normalize.py (phones to E.164, emails lower-cased, tax ID
+checksums, currency names); values it cannot normalize are sent as given
+and reported as warnings.
+An optional screen can hold records of a chunk back (the server uses it for
+likely duplicates); they are reported as failed without being sent.
+
+create1 accepts or rejects a chunk as a whole. When a chunk is rejected for
+a record-level (permanent) reason, it is split in halves and resubmitted
+recursively, so k bad records in a chunk of n are isolated in O(k log n)
+calls while the good records still get created. A rejection that is not
+about the records (both halves fail with the same message) stops the
+bisection, and calls that never reached the ERP are retried. Neither
+starts another call once the request's deadline (see deadline.py) has
+passed.
+"""
+
+import json
+import time
+
+from deadline import DEADLINE_EXCEEDED, deadline_exceeded, expired, remaining
+from normalize import normalize_records, warnings_by_row
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+# Fields the create1 API requires on every record. Either the *_number /
+# *_name lookup form or the *_id form is accepted; the value may be False
+# where the API docs say "若值为空则传false".
+REQUIRED_FIELDS = [
+    ("name",),
+    ("create_org_number", "create_org_id"),
+    ("cust_group_number", "cust_group_id"),
+    ("country_name", "country_id"),
+    ("currency_name", "currency_id"),
+    ("sale_user_number", "sale_user_id"),
+]
+
+
+def validate_customer(record) -> list:
+    """
+    Check a single customer record before it is sent upstream.
+
+    Returns:
+        A list of error strings; empty if the record is valid
+    """
+    if not isinstance(record, dict):
+        return ["record must be a JSON object"]
+
+    errors = []
+    for alternatives in REQUIRED_FIELDS:
+        if not any(field in record for field in alternatives):
+            errors.append(f"missing field: {' / '.join(alternatives)}")
+
+    name = record.get("name")
+    if "name" in record and (not isinstance(name, str) or not name.strip()):
+        errors.append("name must be a non-empty string")
+
+    return errors
+
+
+def strip_metadata(record: dict) -> dict:
+    """Remove the frontend-only _metadata block (not accepted by the API)."""
+    record.pop("_metadata", None)
+    return record
+
+
+# =============================================================================
+# NDJSON STREAMING
+# =============================================================================
+
+def iter_ndjson(stream, max_line_bytes: int = 1024 * 1024):
+    """
+    Parse newline-delimited JSON incrementally from a binary stream.
+
+    Blank lines are skipped. Lines that are too long or not valid JSON are
+    reported instead of aborting the whole upload.
+
+    Yields:
+        (line_number, record, error) tuples; exactly one of record/error is set
+    """
+    line_no = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_no += 1
+
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            # Drain the rest of the oversized line without buffering it
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_bytes)
+            yield line_no, None, f"line exceeds {max_line_bytes} bytes"
+            continue
+
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+
+
+# =============================================================================
+# FAILURE CLASSIFICATION
+# =============================================================================
+
+TRANSIENT = "transient"   # worth resubmitting as-is later (network, overload)
+PERMANENT = "permanent"   # rejected because of the records' content
+FATAL = "fatal"           # rejected for every record (auth, signature, bad request)
+REJECTED = "rejected"     # held back locally by the screen (e.g. a likely duplicate)
+
+TRANSIENT_ERRORS = ("connection_failed", "connection_lost", "circuit_open", "timeout", "rate_limited")
+TRANSIENT_STATUS = (408, 429, 502, 503, 504)
+FATAL_STATUS = (401, 403)
+FATAL_MESSAGES = ("sign", "timestamp", "client_id", "unauthori")
+# 4xx statuses that depend on what was sent: a smaller chunk may pass
+SIZE_STATUS = (413,)
+# JSON-RPC reserved codes are protocol errors, except invalid params, which
+# can be caused by a record's values
+JSONRPC_PROTOCOL_CODES = range(-32768, -31999)
+JSONRPC_INVALID_PARAMS = -32602
+# Transient failures known not to have reached the ERP, so resubmitting
+# cannot create a record twice (unlike a read timeout or a 502/504)
+UNSENT_ERRORS = ("connection_failed", "circuit_open", "rate_limited")
+UNSENT_STATUS = (429, 503)
+
+
+def failure_message(result: dict) -> str:
+    """Best human-readable error of a failed create_customer_in_langchao result."""
+    error = (result.get("data") or {}).get("error") if isinstance(result.get("data"), dict) else None
+    if isinstance(error, dict):
+        detail = error.get("data")
+        if isinstance(detail, dict) and detail.get("message"):
+            return str(detail["message"])
+        if error.get("message"):
+            return str(error["message"])
+    return str(result.get("message") or result.get("error") or "Unknown error")
+
+
+def classify_failure(result: dict) -> str:
+    """
+    Classify a failed create_customer_in_langchao result.
+
+    Transport errors, timeouts, rate limiting and gateway/overload statuses
+    are transient. Authentication and signature errors, other 4xx statuses,
+    JSON-RPC protocol errors and a spent client deadline are fatal
+    (splitting the chunk cannot help). Anything else the server answered,
+    e.g. a JSON-RPC validation error, is treated as a permanent record-level
+    error.
+    """
+    if result.get("error") in TRANSIENT_ERRORS:
+        return TRANSIENT
+    if result.get("error") == DEADLINE_EXCEEDED:
+        return FATAL
+    status = result.get("status_code") or 0
+    if status in TRANSIENT_STATUS or status >= 500:
+        return TRANSIENT
+    if 400 <= status < 500 and status not in SIZE_STATUS:
+        return FATAL
+    error = (result.get("data") or {}).get("error") if isinstance(result.get("data"), dict) else None
+    code = error.get("code") if isinstance(error, dict) else None
+    if isinstance(code, int) and (400 <= code < 500 and code not in SIZE_STATUS
+                                  or code in JSONRPC_PROTOCOL_CODES and code != JSONRPC_INVALID_PARAMS):
+        return FATAL
+    message = failure_message(result).lower()
+    if any(marker in message for marker in FATAL_MESSAGES):
+        return FATAL
+    return PERMANENT
+
+
+def is_unsent(result: dict) -> bool:
+    """Whether a failed result certainly never reached the ERP (safe to resubmit)."""
+    return result.get("error") in UNSENT_ERRORS or result.get("status_code") in UNSENT_STATUS
+
+
+def submit_isolating(records: list, submit, retries: int = 2, retry_backoff: float = 0.5) -> tuple:
+    """
+    Submit records, bisecting permanently rejected chunks to find the bad ones.
+
+    A chunk is bisected while its halves fail for different reasons; when
+    both halves of a split are rejected with the same message, the
+    rejection is not about particular records and the whole range fails
+    with it. Transient failures that never reached the ERP (see is_unsent)
+    are resubmitted up to `retries` times, waiting retry_backoff seconds,
+    doubling, in between. Once the request's deadline has passed no call
+    is started; the records not yet settled fail with DEADLINE_EXCEEDED.
+
+    Args:
+        records: Customer dicts to create
+        submit: Callable taking a list of customer dicts and returning the
+            result dict of create_customer_in_langchao
+        retries: Resubmissions of a call that failed before reaching the ERP
+        retry_backoff: Seconds before the first resubmission
+
+    Returns:
+        (outcomes, calls): one {"success", "error", "kind", "result",
+        "position", "size"} dict per record, in order, and the number of
+        upstream calls made. `result` is the result of the call that decided
+        the record's fate, `position`/`size` its place in that call's param
+    """
+    outcomes = [None] * len(records)
+    calls = 0
+    fatal = None
+
+    def mark(lo, hi, success, error=None, kind=None, result=None):
+        for i in range(lo, hi):
+            outcomes[i] = {"success": success, "error": error, "kind": kind,
+                           "result": result, "position": i - lo, "size": hi - lo}
+
+    def send(lo, hi):
+        nonlocal calls, fatal
+        if fatal is not None:
+            # Every further call would fail the same way
+            mark(lo, hi, False, failure_message(fatal), FATAL, fatal)
+            return None
+        delay = retry_backoff
+        for attempt_no in range(retries + 1):
+            if expired():
+                result = deadline_exceeded("the next upstream call")
+                break
+            result = submit(records[lo:hi])
+            calls += 1
+            if result.get("success") or attempt_no == retries or not is_unsent(result):
+                break
+            budget = remaining()
+            time.sleep(delay if budget is None else max(min(delay, budget), 0))
+            delay *= 2
+        if not result.get("success") and classify_failure(result) == FATAL:
+            fatal = result
+        return result
+
+    def settle(lo, hi, result):
+        if result is None:
+            return   # skipped after a fatal error, already marked
+        if result.get("success"):
+            mark(lo, hi, True, result=result)
+            return
+        kind = classify_failure(result)
+        if kind == PERMANENT and hi - lo > 1:
+            mid = (lo + hi) // 2
+            left, right = send(lo, mid), send(mid, hi)
+            if left is not None and right is not None and not left.get("success") \
+                    and not right.get("success") and failure_message(left) == failure_message(right):
+                # The same rejection whatever is sent: not about particular records
+                mark(lo, hi, False, failure_message(left), classify_failure(left), left)
+                return
+            settle(lo, mid, left)
+            settle(mid, hi, right)
+            return
+        mark(lo, hi, False, failure_message(result), kind, result)
+
+    if records:
+        settle(0, len(records), send(0, len(records)))
+    return outcomes, calls
+
+
+# =============================================================================
+# CHUNKED SUBMISSION
+# =============================================================================
+
+def iter_chunks(items, size: int):
+    """Group an iterable into lists of at most `size` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def check_records(parsed, block_size: int = 50):
+    """
+    Validate and normalize parsed records a block at a time.
+
+    At most `block_size` records are read ahead of the consumer, so the
+    block size bounds memory as well as batching normalization. Values
+    that cannot be normalized are passed through unchanged and reported
+    as warnings; they do not make the record invalid.
+
+    Args:
+        parsed: Iterable of (line_number, record, error) tuples, e.g. from iter_ndjson
+        block_size: Records normalized together (see normalize.py); 0 skips
+            normalization
+
+    Yields:
+        (line_number, record, errors, warnings) tuples; errors is empty for
+        valid records
+    """
+    for block in iter_chunks(parsed, block_size or 1):
+        checked = []
+        for line_no, record, error in block:
+            checked.append((line_no, record, [error] if error else validate_customer(record), []))
+        if block_size:
+            valid = [(position, record) for position, (_, record, errors, _) in enumerate(checked) if not errors]
+            report = warnings_by_row(normalize_records([record for _, record in valid]))
+            for row, warnings in report.items():
+                checked[valid[row][0]][3].extend(warnings)
+        yield from checked
+
+
+def ingest_records(parsed, submit, chunk_size: int = 50, max_errors: int = 100,
+                   on_event=None, isolate_failures: bool = True, normalize_block: int = 50,
+                   screen=None, retries: int = 2, retry_backoff: float = 0.5) -> dict:
+    """
+    Validate parsed records and submit the valid ones in chunks.
+
+    Args:
+        parsed: Iterable of (line_number, record, error) tuples, e.g. from iter_ndjson
+        submit: Callable taking a list of customer dicts and returning the
+            result dict of create_customer_in_langchao
+        chunk_size: Records per upstream call
+        max_errors: Cap on per-line errors, per-record failures and failed
+            chunks kept in the summary
+        on_event: Optional callable(event_type, data) receiving "invalid",
+            "record" and "chunk" progress events as they happen; record
+            events carry the line's normalization warnings
+        isolate_failures: Bisect permanently rejected chunks (see submit_isolating)
+            instead of failing the whole chunk
+        normalize_block: Records normalized together before submission
+            (see check_records; a block is read before its first chunk is
+            sent, so it bounds the read-ahead); 0 disables normalization
+        screen: Optional callable taking a chunk's records and returning
+            {position: error message} for records that must not be sent,
+            e.g. likely duplicates. Those records fail with kind REJECTED
+            and the rest of the chunk is submitted without them
+        retries, retry_backoff: Resubmission of calls that never reached the
+            ERP (see submit_isolating)
+
+    Returns:
+        A summary dictionary with counts (records, chunks and upstream calls),
+        the failed chunks, line errors, normalization warnings and the
+        records rejected upstream.
+        Its size is bounded by max_errors, however long the input; the
+        outcome of every chunk goes to on_event.
+    """
+    summary = {
+        "records": 0,
+        "submitted": 0,
+        "failed": 0,
+        "invalid": 0,
+        "chunk_count": 0,
+        "calls": 0,
+        "chunks": [],
+        "chunks_truncated": False,
+        "errors": [],
+        "errors_truncated": False,
+        "failures": [],
+        "failures_truncated": False,
+        "warned": 0,
+        "warnings": [],
+        "warnings_truncated": False,
+    }
+
+    def emit(event_type, data):
+        if on_event is not None:
+            on_event(event_type, data)
+
+    def add_error(line_no, errors):
+        summary["invalid"] += 1
+        emit("invalid", {"line": line_no, "errors": errors})
+        if len(summary["errors"]) < max_errors:
+            summary["errors"].append({"line": line_no, "errors": errors})
+        else:
+            summary["errors_truncated"] = True
+
+    def add_warnings(line_no, warnings):
+        summary["warned"] += 1
+        if len(summary["warnings"]) < max_errors:
+            summary["warnings"].append({"line": line_no, "warnings": warnings})
+        else:
+            summary["warnings_truncated"] = True
+
+    def valid_records():
+        for line_no, record, errors, warnings in check_records(parsed, normalize_block):
+            summary["records"] += 1
+            if errors:
+                add_error(line_no, errors)
+                continue
+            if warnings:
+                add_warnings(line_no, warnings)
+            # _metadata is left on the record; the submitter strips it
+            yield line_no, record, warnings
+
+    def submit_chunk(records):
+        if isolate_failures:
+            return submit_isolating(records, submit, retries, retry_backoff)
+        result = submit(records)
+        if result.get("success"):
+            outcome = {"success": True, "error": None, "kind": None}
+        else:
+            outcome = {"success": False, "error": failure_message(result),
+                       "kind": classify_failure(result)}
+        return [outcome] * len(records), 1
+
+    def submit_screened(records):
+        rejected = screen(records) if screen is not None else {}
+        if not rejected:
+            return submit_chunk(records)
+        kept = [position for position in range(len(records)) if position not in rejected]
+        outcomes = [{"success": False, "error": rejected.get(position), "kind": REJECTED}
+                    for position in range(len(records))]
+        calls = 0
+        if kept:
+            sent, calls = submit_chunk([records[position] for position in kept])
+            for position, outcome in zip(kept, sent):
+                outcomes[position] = outcome
+        return outcomes, calls
+
+    for index, chunk in enumerate(iter_chunks(valid_records(), chunk_size)):
+        lines = [line_no for line_no, _, _ in chunk]
+        outcomes, calls = submit_screened([record for _, record, _ in chunk])
+        failed = sum(1 for outcome in outcomes if not outcome["success"])
+        summary["submitted"] += len(chunk) - failed
+        summary["failed"] += failed
+        first_error = next((o for o in outcomes if not o["success"]), None)
+        chunk_result = {
+            "chunk": index,
+            "first_line": lines[0],
+            "last_line": lines[-1],
+            "size": len(chunk),
+            "calls": calls,
+            "success": failed == 0,
+            "failed": failed,
+            "error": first_error["error"] if first_error else None,
+        }
+        summary["chunk_count"] += 1
+        summary["calls"] += calls
+        if failed:
+            if len(summary["chunks"]) < max_errors:
+                summary["chunks"].append(chunk_result)
+            else:
+                summary["chunks_truncated"] = True
+
+        for (line_no, record, warnings), outcome in zip(chunk, outcomes):
+            event = {
+                "line": line_no,
+                "name": record.get("name"),
+                "chunk": index,
+                "success": outcome["success"],
+                "error": outcome["error"],
+                "kind": outcome["kind"],
+                "warnings": warnings,
+            }
+            if not outcome["success"]:
+                if len(summary["failures"]) < max_errors:
+                    summary["failures"].append(event)
+                else:
+                    summary["failures_truncated"] = True
+            emit("record", event)
+        emit("chunk", dict(chunk_result, submitted=summary["submitted"], failed=summary["failed"],
+                           invalid=summary["invalid"]))
+        print(f"[INFO] Batch chunk {index}: lines {lines[0]}-{lines[-1]} "
+              f"({len(chunk)} records, {calls} calls) -> "
+              f"{'ok' if not failed else f'{failed} failed'}")
+
+    summary["success"] = summary["failed"] == 0 and summary["invalid"] == 0
+    return summary
@@ -0,0 +1,189 @@
+"""
+Espressif Vendor Wizard - Batch Jobs and Progress Events
+Runs batch submissions in the background and records an ordered event log
+per job, which clients follow as a Server-Sent Events (SSE) stream.
+
+Every event gets a monotonically increasing id. A client that loses its
+connection reconnects with Last-Event-ID and receives only the events it
+missed, instead of re-polling the whole job state.
+
+Only the most recent `max_events` events are kept (a million-record batch
+emits a million "record" events). A client whose Last-Event-ID has already
+been dropped first gets a "snapshot" event with the job status and event
+counts so far, then the events still kept.
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+
+# =============================================================================
+# BATCH JOB
+# =============================================================================
+
+class BatchJob:
+    """
+    Event log and status for a single background batch.
+
+    Args:
+        job_id: Job identifier
+        max_events: Most recent events kept for streaming and reconnects
+    """
+
+    def __init__(self, job_id: str, max_events: int = 10000):
+        self.id = job_id
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.summary = None
+        self.events = deque(maxlen=max_events)
+        self.last_event_id = 0
+        self.counts = {}   # event type -> events emitted, including dropped ones
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def emit(self, event_type: str, data: dict) -> None:
+        """Append an event and wake up any waiting streams."""
+        with self._cond:
+            self._append(event_type, data)
+
+    def finish(self, status: str, summary: dict) -> None:
+        """Mark the job finished; the final "done" event is appended atomically."""
+        with self._cond:
+            self.status = status
+            self.summary = summary
+            self.finished_at = time.time()
+            self._append("done", {"status": status, "summary": summary})
+
+    def _append(self, event_type: str, data: dict) -> None:
+        self.last_event_id += 1
+        self.counts[event_type] = self.counts.get(event_type, 0) + 1
+        self.events.append({"id": self.last_event_id, "event": event_type, "data": data})
+        self._cond.notify_all()
+
+    def events_after(self, last_event_id: int, timeout: float) -> list:
+        """
+        Return events newer than last_event_id, waiting up to `timeout`
+        seconds for new ones if there are none yet.
+
+        If some of them were already dropped, the kept ones are preceded by
+        a "snapshot" event whose id is that of the last dropped event.
+        """
+        with self._cond:
+            if self.last_event_id <= last_event_id and not self.done:
+                self._cond.wait(timeout)
+            first_kept = self.last_event_id - len(self.events) + 1
+            if last_event_id >= first_kept - 1:
+                return list(self.events)[max(last_event_id - first_kept + 1, 0):]
+            snapshot = {
+                "id": first_kept - 1,
+                "event": "snapshot",
+                "data": dict(self.to_dict(), counts=dict(self.counts), dropped=first_kept - 1 - last_event_id),
+            }
+            return [snapshot] + list(self.events)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "last_event_id": self.last_event_id,
+            "summary": self.summary,
+        }
+
+
+# =============================================================================
+# JOB REGISTRY
+# =============================================================================
+
+class JobRegistry:
+    """
+    In-memory registry of batch jobs.
+
+    Args:
+        ttl: Seconds a finished job (and its event log) is kept for reconnects
+        max_events: Events kept per job (see BatchJob)
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_events: int = 10000):
+        self.ttl = ttl
+        self.max_events = max_events
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def start(self, work) -> BatchJob:
+        """
+        Create a job and run `work(job)` on a background thread.
+
+        `work` returns the summary dict; an exception marks the job failed.
+        """
+        self._expire()
+        job = BatchJob(uuid.uuid4().hex[:12], self.max_events)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        def run():
+            job.status = "running"
+            job.emit("started", {"job_id": job.id})
+            try:
+                summary = work(job)
+            except Exception as e:
+                print(f"[ERROR] Batch job {job.id} failed: {e}")
+                job.finish("failed", {"error": "server_error", "message": str(e)})
+                return
+            job.finish("completed", summary)
+
+        threading.Thread(target=run, name=f"batch-{job.id}", daemon=True).start()
+        return job
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+
+# =============================================================================
+# SERVER-SENT EVENTS
+# =============================================================================
+
+def format_sse(event: dict) -> str:
+    """Encode one event in text/event-stream format."""
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['event']}\n"
+        f"data: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+    )
+
+
+def stream_events(job: BatchJob, last_event_id: int = 0, keepalive: float = 15.0):
+    """
+    Generate the SSE stream for a job, starting after last_event_id.
+
+    Sends a comment line every `keepalive` seconds while idle so proxies do
+    not close the connection, and ends after the final "done" event.
+    """
+    yield "retry: 3000\n\n"
+    while True:
+        events = job.events_after(last_event_id, timeout=keepalive)
+        if not events:
+            if job.done:
+                return
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            yield format_sse(event)
+            last_event_id = event["id"]
+        if job.done and last_event_id >= job.last_event_id:
+            return
@@ -0,0 +1,77 @@
+"""
+Espressif Vendor Wizard - Metrics
+Minimal Prometheus text-format exposition for /api/metrics.
+
+Metrics are registered with a collect function that is called on every
+scrape, so values are read straight from the objects that own them
+(endpoint pool, clock skew estimator, ...) instead of being copied around.
+"""
+
+import threading
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class MetricsRegistry:
+    """
+    Named metrics rendered in Prometheus text format.
+
+    Args:
+        namespace: Prefix added to every metric name
+    """
+
+    def __init__(self, namespace: str = "vendor_wizard"):
+        self.namespace = namespace
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, kind: str, help_text: str, collect) -> None:
+        """
+        Register a metric.
+
+        Args:
+            name: Metric name (without namespace)
+            kind: "gauge" or "counter"
+            help_text: One-line description
+            collect: Callable returning a number, None (metric omitted), or a
+                list of (labels dict, number) pairs
+        """
+        with self._lock:
+            self._metrics.append((f"{self.namespace}_{name}", kind, help_text, collect))
+
+    def gauge(self, name: str, help_text: str, collect) -> None:
+        self.register(name, "gauge", help_text, collect)
+
+    def counter(self, name: str, help_text: str, collect) -> None:
+        self.register(name, "counter", help_text, collect)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for name, kind, help_text, collect in metrics:
+            try:
+                value = collect()
+            except Exception as e:
+                print(f"[WARN] Metric {name} failed: {e}")
+                continue
+            if value is None:
+                continue
+            samples = value if isinstance(value, list) else [({}, value)]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, sample in samples:
+                if sample is not None:
+                    lines.append(f"{name}{_format_labels(labels)} {float(sample)!r}")
+        return "\n".join(lines) + "\n"
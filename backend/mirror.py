@@ -0,0 +1,278 @@
+"""
+Espressif Vendor Wizard - Local Customer Master Mirror
+Incrementally copies inSuite customer records into a local SQLite database
+so lookups (by number, name, organization or sales user) are answered
+locally instead of over the WAN.
+
+Sync protocol (read route, signed like create1):
+
+    param:  [{"modified_since": "2025-01-01 00:00:00", "after_id": 0, "limit": 500}]
+    result: {"records": [{"id": 1, "number": ..., "name": ..., "write_date": ...}, ...],
+             "has_more": true}
+
+Records come back ordered by (write_date, id). The last record of each page
+becomes the cursor for the next one, so a sync resumes exactly where the
+previous one stopped and only changed records are transferred. Adding
+"number" to the param restricts the result to that customer, which is how
+single records are read on demand (see updates.py); "numbers" and "names"
+lists restrict it to any of several (see verifier.py).
+emulator.py implements the same contract for local testing; the read
+route is not yet confirmed against the production inSuite API, so the
+server only syncs in the background when MIRROR_SYNC_INTERVAL is set.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _ref(value) -> str:
+    """
+    Flatten a many2one-style value to a string key.
+
+    Odoo returns references either as a plain id/number or as [id, name].
+    """
+    if value is None or value is False:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return str(value[0]) if value else ""
+    return str(value)
+
+
+# =============================================================================
+# CUSTOMER MIRROR
+# =============================================================================
+
+class CustomerMirror:
+    """
+    SQLite mirror of the inSuite customer master.
+
+    Args:
+        path: SQLite database file
+        fetch_page: Callable(param: dict) -> dict returning the `result` of one
+            read-route call, or raising RuntimeError on failure
+        page_size: Records requested per page
+    """
+
+    def __init__(self, path: str, fetch_page, page_size: int = 500):
+        self.path = path
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.last_sync = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._sync_thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS customers (
+                    id          INTEGER PRIMARY KEY,
+                    number      TEXT,
+                    name        TEXT,
+                    name_lower  TEXT,
+                    org         TEXT,
+                    sales_user  TEXT,
+                    write_date  TEXT,
+                    data        TEXT NOT NULL,
+                    mirrored_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_customers_number ON customers(number);
+                CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name_lower);
+                CREATE INDEX IF NOT EXISTS idx_customers_org ON customers(org);
+                CREATE INDEX IF NOT EXISTS idx_customers_sales_user ON customers(sales_user);
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(customers)")}
+            if "mirrored_at" not in columns:
+                # Mirrors created before rows were timestamped: all rows count as stale
+                self._conn.execute("ALTER TABLE customers ADD COLUMN mirrored_at REAL")
+
+    # -------------------------------------------------------------------------
+    # Sync
+    # -------------------------------------------------------------------------
+
+    def cursor(self) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = 'cursor'").fetchone()
+        return json.loads(row["value"]) if row else {"modified_since": "", "after_id": 0}
+
+    def upsert(self, records: list) -> list:
+        """
+        Insert or update records in the mirror.
+
+        Returns:
+            The records that were not in the mirror before
+        """
+        new_records = []
+        now = time.time()
+        with self._lock, self._conn:
+            for record in records:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM customers WHERE id = ?", (record["id"],)
+                ).fetchone()
+                if not exists:
+                    new_records.append(record)
+                name = record.get("name") or ""
+                self._conn.execute(
+                    """
+                    INSERT OR REPLACE INTO customers
+                        (id, number, name, name_lower, org, sales_user, write_date, data, mirrored_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        record["id"],
+                        record.get("number") or "",
+                        name,
+                        name.casefold(),
+                        _ref(record.get("use_org_id")),
+                        _ref(record.get("sale_user_id") or record.get("sale_user_number")),
+                        record.get("write_date") or "",
+                        json.dumps(record, ensure_ascii=False),
+                        now,
+                    ),
+                )
+        return new_records
+
+    def sync(self, on_new=None, max_pages: int = None) -> dict:
+        """
+        Pull all changes since the stored cursor.
+
+        Args:
+            on_new: Optional callable receiving each page's newly seen records
+            max_pages: Stop after this many pages (None = until caught up)
+
+        Returns:
+            Counts of pages and records fetched and the new cursor
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return {"success": False, "error": "sync_in_progress"}
+        try:
+            cursor = self.cursor()
+            pages = fetched = inserted = 0
+            while max_pages is None or pages < max_pages:
+                result = self.fetch_page(dict(cursor, limit=self.page_size))
+                records = result.get("records") or []
+                pages += 1
+                if records:
+                    new_records = self.upsert(records)
+                    fetched += len(records)
+                    inserted += len(new_records)
+                    if on_new and new_records:
+                        on_new(new_records)
+                    last = records[-1]
+                    cursor = {"modified_since": last.get("write_date") or "", "after_id": last["id"]}
+                    with self._lock, self._conn:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('cursor', ?)",
+                            (json.dumps(cursor),),
+                        )
+                if not result.get("has_more") or not records:
+                    break
+            self.last_sync = time.time()
+            self.last_error = None
+            return {"success": True, "pages": pages, "fetched": fetched,
+                    "inserted": inserted, "cursor": cursor}
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"[WARN] Customer mirror sync failed: {e}")
+            return {"success": False, "error": "sync_failed", "message": str(e)}
+        finally:
+            self._sync_lock.release()
+
+    def start_sync_loop(self, interval: float, on_new=None) -> None:
+        """Sync every `interval` seconds on a background thread (once per process)."""
+        if self._sync_thread is not None or interval <= 0:
+            return
+
+        def loop():
+            while True:
+                self.sync(on_new=on_new)
+                time.sleep(interval)
+
+        self._sync_thread = threading.Thread(target=loop, name="customer-mirror-sync", daemon=True)
+        self._sync_thread.start()
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def get_by_number(self, number: str, max_age: float = None):
+        """
+        A mirrored customer by number, or None if it isn't mirrored.
+
+        With `max_age` (seconds), a row is only returned while it is known
+        to be current: it was written, or a full sync completed, at most
+        that long ago. Older rows may miss edits made in inSuite since.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, mirrored_at FROM customers WHERE number = ?", (number,)
+            ).fetchone()
+        if row is None:
+            return None
+        if max_age is not None:
+            current_as_of = max(row["mirrored_at"] or 0, self.last_sync or 0)
+            if time.time() - current_as_of > max_age:
+                return None
+        return json.loads(row["data"])
+
+    def get_by_id(self, customer_id: int):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM customers WHERE id = ?", (customer_id,)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def search(self, number: str = None, name: str = None, org: str = None,
+               sales_user: str = None, limit: int = 50) -> list:
+        """
+        Search mirrored customers. All given filters must match.
+
+        `name` is a case-insensitive prefix match (index-backed); the other
+        filters are exact.
+        """
+        clauses, args = [], []
+        if number:
+            clauses.append("number = ?")
+            args.append(number)
+        if name:
+            clauses.append("name_lower >= ? AND name_lower < ?")
+            prefix = name.casefold()
+            args.extend([prefix, prefix + "\U0010ffff"])
+        if org:
+            clauses.append("org = ?")
+            args.append(str(org))
+        if sales_user:
+            clauses.append("sales_user = ?")
+            args.append(str(sales_user))
+
+        sql = "SELECT data FROM customers"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY name_lower LIMIT ?"
+        args.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def status(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) AS n FROM customers").fetchone()["n"]
+        return {
+            "customers": count,
+            "cursor": self.cursor(),
+            "last_sync": self.last_sync,
+            "last_error": self.last_error,
+            "syncing": self._sync_lock.locked(),
+        }
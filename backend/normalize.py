@@ -0,0 +1,311 @@
+"""
+Espressif Vendor Wizard - Bulk Field Normalization
+Column-at-a-time cleanup and validation of the contact, tax and currency
+fields of imported customer records (migration spreadsheets are messy:
+"(021) 6215-8800 转 801", "ＳＡＬＥＳ＠ACME.COM; ops@acme.com", "rmb").
+
+Instead of running a chain of checks per record, each field is pulled out
+as a column, the column is joined into one newline-separated string and
+every normalization step is a single str/bytes method or regex pass over
+that string, so the per-character work happens in C. Validation works the
+same way: valid lines are blanked out by one pass, and the remaining
+non-empty lines are the invalid rows. (Regexes are anchored on the "\n"
+line separator rather than ^/$, which lets the regex engine jump between
+line starts instead of trying every position.) Tax ID checksums are computed over the whole column
+as an integer matrix with numpy when it is installed (optional), otherwise
+per code.
+
+    report = normalize_records(records)   # records are updated in place
+    # [{"row": 17, "field": "inv_telephone", "value": "n/a",
+    #   "error": "not a valid phone number"}, ...]
+
+Values that cannot be normalized are passed through unchanged and only
+reported: callers surface the report as warnings rather than dropping
+the record, since a local-format foreign number or an unusual legacy ID
+is still what the customer gave us.
+
+Normalized forms:
+    phones      E.164 (+8613812345678); 00 becomes +, extensions are
+                dropped and only the first of several numbers is kept;
+                for customers in China, trunk prefixes and bare mobile
+                numbers get +86
+    emails      lower-cased, separators unified to ";" (several allowed)
+    tax IDs     upper-cased without spaces/dashes; Chinese unified social
+                credit codes (GB 32100-2015) must pass their checksum
+    currencies  the names the API looks up (人民币 / USD)
+"""
+
+import re
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError:   # optional dependency
+    np = None
+
+
+PHONE_FIELDS = ("X_char_vitg7ywwao", "X_char_9pex08hr7a", "inv_telephone")
+EMAIL_FIELDS = ("X_char_5smvg51jqa", "X_char_xy0fi6varj", "X_char_0qgsyzxr8t", "X_char_ayuwxr8kn8")
+TAX_FIELD = "inv_tax_number"
+CURRENCY_FIELD = "currency_name"
+COUNTRY_FIELD = "country_name"
+
+CHINA_NAMES = {"中国", "china", "cn", "prc"}
+
+CURRENCY_ALIASES = {
+    "人民币": "人民币", "rmb": "人民币", "cny": "人民币", "¥": "人民币", "元": "人民币",
+    "usd": "USD", "us$": "USD", "$": "USD", "美元": "USD", "us dollar": "USD", "us dollars": "USD",
+}
+
+# Phones: separators of further numbers and extension markers all become
+# "x", and everything from the first "x" of a line on is dropped
+_PHONE_CUT_MARKS = bytes.maketrans(b",;/#", b"xxxx")
+_PHONE_CUT = re.compile(rb"x[^\n]*")
+# Everything except digits, "+" and the line separator, as bytes to delete
+_PHONE_JUNK = bytes(b for b in range(256) if not (48 <= b <= 57 or b in b"+\n"))
+_PHONE_INNER_PLUS = re.compile(rb"\+(?<!\n\+)")
+_PHONE_CN_TRUNK = re.compile(rb"\n0(?=[1-9]\d{8,10}\n)")
+_PHONE_CN_BARE = re.compile(rb"\n(?:86)?(?=1[3-9]\d{9}\n)")
+_PHONE_VALID = re.compile(rb"\n\+[1-9]\d{6,14}(?=\n)")
+
+_EMAIL_SEPARATORS = (",", "、", " ", "\t")
+_EMAIL_ADDRESS = (r"[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+                  r"@(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,}")
+_EMAIL_VALID = re.compile(rf"\n{_EMAIL_ADDRESS}(?:;{_EMAIL_ADDRESS})*(?=\n)")
+
+_CURRENCY_CODE = re.compile(r"^[a-z]{3}$")
+
+# Unified social credit code: 17 characters plus a mod-31 check character
+_USCC_ALPHABET = "0123456789ABCDEFGHJKLMNPQRTUWXY"
+_USCC_VALUE = {char: value for value, char in enumerate(_USCC_ALPHABET)}
+_USCC_WEIGHTS = [pow(3, i, 31) for i in range(17)]
+# Per position: character -> weighted value
+_USCC_WEIGHTED = [{char: value * weight for char, value in _USCC_VALUE.items()} for weight in _USCC_WEIGHTS]
+_LEGACY_TAX_LENGTHS = (15, 20)
+
+
+def _is_china(country) -> bool:
+    return str(country or "").strip().casefold() in CHINA_NAMES
+
+
+# =============================================================================
+# COLUMNS
+# =============================================================================
+
+def _text_column(records: list, field: str) -> tuple:
+    """
+    (rows, values) of the non-empty values of `field`.
+
+    Integers are taken as text (phone numbers often arrive as numbers from
+    Excel); False/None/missing count as empty.
+    """
+    rows, values = [], []
+    for row, record in enumerate(records):
+        value = record.get(field)
+        if value and type(value) in (str, int):
+            rows.append(row)
+            values.append(str(value))
+    return rows, values
+
+
+def _join(values: list) -> str:
+    """
+    Values as one string, each line framed by newlines ("\na\nb\n").
+
+    Embedded newlines become spaces, and values that are not pure ASCII are
+    NFKC-normalized, which turns full-width forms (common in Chinese
+    spreadsheets: "１３８", "＠", the ideographic space) into ASCII.
+    """
+    if any("\n" in value for value in values):
+        values = [value.replace("\r", " ").replace("\n", " ") for value in values]
+    values = [value if value.isascii() else unicodedata.normalize("NFKC", value) for value in values]
+    return "\n" + "\n".join(values) + "\n"
+
+
+def _lines(text):
+    """Split a framed column string back into its values."""
+    return text[1:-1].split(b"\n" if isinstance(text, bytes) else "\n")
+
+
+def _invalid_lines(text, valid: re.Pattern) -> list:
+    """Positions of lines that are empty or not matched in full by `valid`."""
+    newline, empty, marked = ("\n", "\n\n", "\n!\n") if isinstance(text, str) else (b"\n", b"\n\n", b"\n!\n")
+    # Mark empty lines first, so they are not mistaken for valid ones
+    leftover = _lines(valid.sub(newline, text.replace(empty, marked).replace(empty, marked)))
+    return [position for position, line in enumerate(leftover) if line]
+
+
+def _store(records: list, field: str, rows: list, normalized: list) -> None:
+    for row, value in zip(rows, normalized):
+        records[row][field] = value
+
+
+# =============================================================================
+# FIELDS
+# =============================================================================
+
+def normalize_phones(values: list, countries: list = None) -> tuple:
+    """
+    Normalize a column of phone numbers to E.164.
+
+    Numbers without a country code only get +86 (from a 0 trunk prefix or
+    as bare mobile numbers) when the customer's country is China; a US
+    "1-310-555-1234" must not become a Chinese mobile number.
+
+    Args:
+        values: Phone numbers
+        countries: Customer country per value (default: none in China)
+
+    Returns:
+        (normalized values, positions of values that are not valid numbers)
+    """
+    text = _join(values).replace("、", ",").replace("转", "x").replace("分机", "x")
+    # Anything not ASCII cannot be part of a number
+    text = text.encode("ascii", "ignore").lower().translate(_PHONE_CUT_MARKS)
+    text = _PHONE_CUT.sub(b"", text).translate(None, _PHONE_JUNK)
+    text = _PHONE_INNER_PLUS.sub(b"", text).replace(b"\n00", b"\n+")
+
+    china = [i for i, country in enumerate(countries or []) if _is_china(country)]
+    if china:
+        lines = _lines(text)
+        domestic = b"\n" + b"\n".join(lines[i] for i in china) + b"\n"
+        domestic = _PHONE_CN_BARE.sub(b"\n+86", _PHONE_CN_TRUNK.sub(b"\n+86", domestic))
+        for i, line in zip(china, _lines(domestic)):
+            lines[i] = line
+        text = b"\n" + b"\n".join(lines) + b"\n"
+    return _lines(text.decode("ascii")), _invalid_lines(text, _PHONE_VALID)
+
+
+def normalize_emails(values: list) -> tuple:
+    """
+    Normalize a column of email fields (one or more addresses each).
+
+    Returns:
+        (normalized values, positions of values with an invalid address)
+    """
+    text = _join(values).lower().replace("mailto:", "")
+    for separator in _EMAIL_SEPARATORS:
+        text = text.replace(separator, ";")
+    while ";;" in text:
+        text = text.replace(";;", ";")
+    text = text.replace("\n;", "\n").replace(";\n", "\n")
+    return _lines(text), _invalid_lines(text, _EMAIL_VALID)
+
+
+def uscc_checksums_valid(codes: list) -> list:
+    """Whether each 18-character code has a valid unified social credit code checksum."""
+    if not codes:
+        return []
+    if np is not None:
+        lut = np.full(256, 255, dtype=np.uint8)
+        lut[np.frombuffer(_USCC_ALPHABET.encode("ascii"), dtype=np.uint8)] = np.arange(31, dtype=np.uint8)
+        raw = np.frombuffer("".join(codes).encode("ascii", "replace"), dtype=np.uint8).reshape(-1, 18)
+        values = lut[raw]
+        expected = (31 - (values[:, :17].astype(np.int64) @ np.array(_USCC_WEIGHTS)) % 31) % 31
+        return ((values != 255).all(axis=1) & (values[:, 17] == expected)).tolist()
+
+    def valid(code):
+        try:
+            total = sum(map(dict.__getitem__, _USCC_WEIGHTED, code))
+        except KeyError:
+            return False
+        return (31 - total % 31) % 31 == _USCC_VALUE.get(code[17])
+
+    return [valid(code) for code in codes]
+
+
+def normalize_tax_numbers(values: list, countries: list) -> tuple:
+    """
+    Normalize a column of tax IDs and check Chinese ones.
+
+    18-character IDs of Chinese (or country-less) customers must be valid
+    unified social credit codes; other IDs of Chinese customers must be
+    legacy 15/20-character tax registration numbers, which may contain
+    letters (an organization code or an ID card's X). Foreign IDs are only
+    normalized.
+
+    Returns:
+        (normalized values, positions of invalid IDs)
+    """
+    normalized = _lines(_join(values).upper().replace(" ", "").replace("\t", "").replace("-", ""))
+    china = [_is_china(country) for country in countries]
+    checked = [i for i, code in enumerate(normalized) if len(code) == 18 and (china[i] or not countries[i])]
+    invalid = {i for i, ok in zip(checked, uscc_checksums_valid([normalized[i] for i in checked])) if not ok}
+    invalid.update(
+        i for i, code in enumerate(normalized)
+        if china[i] and len(code) != 18 and not (code.isascii() and code.isalnum() and len(code) in _LEGACY_TAX_LENGTHS)
+    )
+    return normalized, sorted(invalid)
+
+
+def _currency(value: str):
+    key = unicodedata.normalize("NFKC", value).strip().casefold()
+    if key in CURRENCY_ALIASES:
+        return CURRENCY_ALIASES[key]
+    return key.upper() if _CURRENCY_CODE.match(key) else None
+
+
+def normalize_currencies(values: list) -> tuple:
+    """
+    Map a column of currency names/codes to the names the API expects.
+
+    Known aliases map to 人民币 / USD, other ISO-style codes are upper-cased.
+    Each distinct value is looked up once, so the cost is per distinct
+    value rather than per row.
+
+    Returns:
+        (normalized values, positions of unknown currencies)
+    """
+    table = {value: _currency(value) for value in set(values)}
+    normalized = list(map(table.get, values))
+    invalid = [i for i, value in enumerate(normalized) if value is None]
+    return [value or original for value, original in zip(normalized, values)], invalid
+
+
+# =============================================================================
+# RECORDS
+# =============================================================================
+
+def normalize_records(records: list) -> list:
+    """
+    Normalize the phone, email, tax ID and currency fields of `records` in place.
+
+    Invalid values are left as they were and reported.
+
+    Returns:
+        The report of values that could not be normalized:
+        [{"row", "field", "value", "error"}] ordered by row
+    """
+    report = []
+
+    def apply(field, rows, values, normalizer, error, *extra):
+        if not rows:
+            return
+        normalized, invalid = normalizer(values, *extra)
+        _store(records, field, rows, normalized)
+        # Invalid values are kept as they were
+        _store(records, field, [rows[i] for i in invalid], [values[i] for i in invalid])
+        report.extend({"row": rows[i], "field": field, "value": values[i], "error": error} for i in invalid)
+
+    for field in PHONE_FIELDS:
+        rows, values = _text_column(records, field)
+        apply(field, rows, values, normalize_phones, "not a valid phone number",
+              [records[row].get(COUNTRY_FIELD) for row in rows])
+    for field in EMAIL_FIELDS:
+        apply(field, *_text_column(records, field), normalize_emails, "not a valid email address")
+
+    rows, values = _text_column(records, TAX_FIELD)
+    apply(TAX_FIELD, rows, values, normalize_tax_numbers, "not a valid tax ID",
+          [records[row].get(COUNTRY_FIELD) for row in rows])
+    apply(CURRENCY_FIELD, *_text_column(records, CURRENCY_FIELD), normalize_currencies, "unknown currency")
+
+    report.sort(key=lambda entry: entry["row"])
+    return report
+
+
+def warnings_by_row(report: list) -> dict:
+    """{row: ["field: error (value)", ...]} from a normalize_records report."""
+    warnings = {}
+    for entry in report:
+        warnings.setdefault(entry["row"], []).append(f"{entry['field']}: {entry['error']} ({entry['value']!r})")
+    return warnings
@@ -0,0 +1,132 @@
+"""
+Espressif Vendor Wizard - On-demand Request Profiling
+Profiles single requests with cProfile when the caller asks for it, to catch
+slow requests that cannot be reproduced.
+
+Profiling is off unless a secret is configured, and a request is only
+profiled when it carries that secret in the X-Profile-Secret header (never
+the URL, which ends up in proxy and access logs). Requests without it take
+the normal code path with no profiler overhead. Each profile is written as
+a pstats dump, which opens in snakeviz, gprof2dot or flameprof (call graph
+/ flame graph), and can be fetched back from the admin endpoints.
+"""
+
+import cProfile
+import functools
+import hmac
+import io
+import os
+import pstats
+import re
+import time
+
+from flask import g, request
+
+
+PROFILE_HEADER = "X-Profile-Secret"
+
+_PROFILE_ID = re.compile(r"^[0-9A-Za-z_.-]+$")
+
+# Sort orders accepted by text_report
+SORT_KEYS = tuple(key.value for key in pstats.SortKey)
+
+
+class Profiler:
+    """
+    Per-request cProfile hook and profile storage.
+
+    Args:
+        secret: Shared secret enabling profiling (None/empty disables it)
+        directory: Where profile dumps are written
+        keep: Number of most recent profiles to keep
+    """
+
+    def __init__(self, secret: str, directory: str, keep: int = 50):
+        self.secret = secret or None
+        self.directory = directory
+        self.keep = keep
+        if self.secret:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.secret is not None
+
+    def authorized(self) -> bool:
+        """Whether the current request carries the profiling secret."""
+        if not self.enabled:
+            return False
+        supplied = request.headers.get(PROFILE_HEADER, "")
+        return hmac.compare_digest(supplied.encode(), self.secret.encode())
+
+    def profiled(self, view):
+        """Decorator: profile the wrapped view when the request asks for it."""
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or not self.authorized():
+                return view(*args, **kwargs)
+
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                return profile.runcall(view, *args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                g.profile_id = self._save(profile, view.__name__, elapsed_ms)
+                print(f"[INFO] Profiled {view.__name__} ({elapsed_ms:.1f} ms) -> {g.profile_id}")
+
+        return wrapper
+
+    def add_header(self, response):
+        """after_request hook: tell the caller which profile was written."""
+        profile_id = getattr(g, "profile_id", None)
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def _save(self, profile: cProfile.Profile, name: str, elapsed_ms: float) -> str:
+        trace_id = getattr(g, "trace_id", "") or "notrace"
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{trace_id[:16]}_{elapsed_ms:.0f}ms.prof"
+        profile.dump_stats(os.path.join(self.directory, profile_id))
+        self._prune()
+        return profile_id
+
+    def _prune(self) -> None:
+        for profile_id in self.list()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, profile_id))
+            except OSError:
+                pass
+
+    def list(self) -> list:
+        """Stored profile ids, newest first."""
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        return sorted((f for f in os.listdir(self.directory) if f.endswith(".prof")), reverse=True)
+
+    def path(self, profile_id: str):
+        """Filesystem path of a stored profile, or None if it does not exist."""
+        if not _PROFILE_ID.match(profile_id) or not profile_id.endswith(".prof"):
+            return None
+        path = os.path.join(self.directory, profile_id)
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def text_report(path: str, sort: str = "cumulative", limit: int = 60) -> str:
+        """
+        Render a stored profile as a pstats text report.
+
+        Raises:
+            ValueError: `sort` is not one of SORT_KEYS
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        out = io.StringIO()
+        stats = pstats.Stats(path, stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,189 @@
+"""
+Espressif Vendor Wizard - Upstream Work Scheduler
+Shares the backend's upstream capacity between traffic classes, so a bulk
+migration cannot make a customer filling in the wizard wait behind it.
+
+Every upstream call takes one of `capacity` slots for its duration. Three
+classes compete for them:
+
+- interactive: wizard submissions and draft commits (someone is waiting)
+- bulk: NDJSON uploads and background batch jobs
+- sync: the customer mirror and other background reads
+
+When calls are waiting, freed slots are handed out by weighted fair
+queuing (self-clocked): each call is stamped with a virtual finish time,
+start + cost / class weight, where start is the later of the virtual
+clock (the stamp of the last call started) and the class's previous
+stamp, and cost is the number of records the call carries. The smallest
+stamp goes next. A busy class therefore gets upstream work in proportion
+to its weight, and an idle class doesn't bank credit for later. A call
+that gives up waiting hands its share back to the calls of its class
+queued behind it.
+
+On top of that each class may have reserved slots only it can use.
+Other classes share what is left, so interactive calls always find a slot
+within one upstream round trip, however deep the bulk backlog is.
+
+Queue waits are kept per class for the metrics endpoint.
+"""
+
+import threading
+import time
+
+from endpoints import LatencyWindow
+
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+SYNC = "sync"
+
+
+class _Ticket:
+    __slots__ = ("priority", "start", "finish", "queued_at", "granted")
+
+    def __init__(self, priority: str, start: float, finish: float):
+        self.priority = priority
+        self.start = start
+        self.finish = finish
+        self.queued_at = time.monotonic()
+        self.granted = False
+
+
+class UpstreamScheduler:
+    """
+    Weighted fair queuing over a fixed number of upstream slots.
+
+    Args:
+        capacity: Upstream calls in flight at most, across all classes
+        weights: {class: weight}; unknown classes are scheduled as the
+            lowest-weighted one
+        reserved: {class: slots} usable only by that class
+        window: Queue wait samples kept per class for percentiles
+    """
+
+    def __init__(self, capacity: int = 16, weights: dict = None, reserved: dict = None,
+                 window: int = 512):
+        self.capacity = capacity
+        self.weights = dict(weights or {INTERACTIVE: 8, BULK: 2, SYNC: 1})
+        self.reserved = {name: (reserved or {}).get(name, 0) for name in self.weights}
+        self.shared = capacity - sum(self.reserved.values())
+        if self.shared < 1:
+            raise ValueError("reserved slots must leave at least one shared slot")
+        self._fallback = min(self.weights, key=self.weights.get)
+
+        self._cond = threading.Condition()
+        self._virtual_time = 0.0
+        self._last_finish = {name: 0.0 for name in self.weights}
+        self._queues = {name: [] for name in self.weights}
+        self.in_flight = {name: 0 for name in self.weights}
+        self.granted = {name: 0 for name in self.weights}
+        self.timed_out = {name: 0 for name in self.weights}
+        self.wait_seconds = {name: 0.0 for name in self.weights}
+        self.waits = {name: LatencyWindow(window) for name in self.weights}
+
+    # -------------------------------------------------------------------------
+    # Slots
+    # -------------------------------------------------------------------------
+
+    def _beyond_reserved(self) -> int:
+        return sum(max(count - self.reserved[name], 0) for name, count in self.in_flight.items())
+
+    def _eligible(self, priority: str) -> bool:
+        return (self.in_flight[priority] < self.reserved[priority]
+                or self._beyond_reserved() < self.shared)
+
+    def _grant(self, ticket: _Ticket) -> None:
+        self._virtual_time = max(self._virtual_time, ticket.finish)
+        ticket.granted = True
+        self.in_flight[ticket.priority] += 1
+        self.granted[ticket.priority] += 1
+        waited = time.monotonic() - ticket.queued_at
+        self.wait_seconds[ticket.priority] += waited
+        self.waits[ticket.priority].add(waited * 1000)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting tickets, smallest finish stamp first."""
+        while True:
+            heads = [queue[0] for name, queue in self._queues.items() if queue and self._eligible(name)]
+            if not heads:
+                return
+            ticket = min(heads, key=lambda t: t.finish)
+            self._queues[ticket.priority].pop(0)
+            self._grant(ticket)
+            self._cond.notify_all()
+
+    def acquire(self, priority: str, timeout: float = None, cost: float = 1.0):
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Traffic class
+            timeout: Seconds to wait at most (None: no limit)
+            cost: Relative size of the call (e.g. records sent)
+
+        Returns:
+            A ticket to pass to release(), or None if the wait timed out
+        """
+        if priority not in self.weights:
+            priority = self._fallback
+        with self._cond:
+            start = max(self._virtual_time, self._last_finish[priority])
+            ticket = _Ticket(priority, start, start + cost / self.weights[priority])
+            self._last_finish[priority] = ticket.finish
+            self._queues[priority].append(ticket)
+            self._dispatch()
+            if not ticket.granted:
+                self._cond.wait_for(lambda: ticket.granted, timeout)
+            if not ticket.granted:
+                self._abandon(ticket)
+                return None
+            return ticket
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        """Drop a ticket that timed out, moving later stamps of its class back."""
+        queue = self._queues[ticket.priority]
+        index = queue.index(ticket)
+        del queue[index]
+        share = ticket.finish - ticket.start
+        for later in queue[index:]:
+            later.start -= share
+            later.finish -= share
+        self._last_finish[ticket.priority] -= share
+        self.timed_out[ticket.priority] += 1
+
+    def release(self, ticket: _Ticket) -> None:
+        with self._cond:
+            self.in_flight[ticket.priority] -= 1
+            self._dispatch()
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def queued(self) -> dict:
+        with self._cond:
+            return {name: len(queue) for name, queue in self._queues.items()}
+
+    def wait_percentile(self, priority: str, q: float):
+        """Queue wait q-quantile of a class in ms (None without samples)."""
+        return self.waits[priority].percentile(q)
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "shared": self.shared,
+                "classes": {
+                    name: {
+                        "weight": self.weights[name],
+                        "reserved": self.reserved[name],
+                        "in_flight": self.in_flight[name],
+                        "queued": len(self._queues[name]),
+                        "granted": self.granted[name],
+                        "timed_out": self.timed_out[name],
+                        "wait_p50_ms": self.waits[name].percentile(0.5),
+                        "wait_p99_ms": self.waits[name].percentile(0.99),
+                    }
+                    for name in self.weights
+                },
+            }
@@ -63,16 +63,54 @@ PCN 接收邮箱    -> X_char_xy0fi6varj
 开票通讯地址    -> inv_address
 """
 
+import csv
+import functools
+import io
 import json
+import os
+import tempfile
+import threading
 import time
 import hashlib
 import hmac
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, redirect, request, jsonify, send_file
 from flask_cors import CORS
-import requests
+
+from admission import KeyedAdmission
+from audit import AuditLog
+from catalog import ProductCatalog
+from clock import ClockSkew
+from coalescer import Coalescer
+from customer_index import NAME_FIELDS, TAX_FIELD, CustomerIndex, validate_entry
+from deadline import (
+    DEADLINE_EXCEEDED, Deadlines, current_deadline, deadline_exceeded, deadline_scope, remaining,
+)
+from drafts import DraftConflict, DraftStore
+from endpoints import EndpointPool, TimeoutPolicy
+from export import (
+    CSV, CSV_COMPRESSIONS, DEFAULT_FIELDS as EXPORT_DEFAULT_FIELDS, ENTRY_COLUMNS as EXPORT_ENTRY_COLUMNS,
+    PARQUET, PARQUET_COMPRESSIONS, csv_chunks, gzip_chunks, iter_rows, pa, parquet_chunks,
+)
+from ingest import (
+    check_records, failure_message, ingest_records, iter_chunks, iter_ndjson, strip_metadata,
+    submit_isolating, validate_customer,
+)
+from jobs import JobRegistry, stream_events
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from mirror import CustomerMirror
+from normalize import normalize_records, warnings_by_row
+from profiling import Profiler
+from scheduler import BULK, INTERACTIVE, SYNC, UpstreamScheduler
+from static import StaticSite
+from stats import SubmissionStats, day_number, day_string
+from tenants import TenantRegistry
+from tracing import TRACE_HEADER, Tracer, current_trace_id, span
+from transport import TransportConnectError, TransportConnectionLost, TransportTimeout
+from updates import diff_customer, ignored_fields, updated_record
+from verifier import STATUSES as VERIFY_STATUSES, SubmissionVerifier
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=["Server-Timing", TRACE_HEADER, "Retry-After"])  # Enable CORS for all routes
 
 # =============================================================================
 # CONFIGURATION
@@ -85,14 +123,291 @@ SECRET_KEY = "RoGUu7QpClCS8p8AwEhvtYoBqPleHXIQ"
 # Database name
 DATABASE_NAME = "shlxkjgfyxgs"
 
-# API Endpoints
-BASE_URL_INTERNAL = "http://192.168.6.91:32000"
-BASE_URL_EXTERNAL = "http://58.33.3.130:32000"
+# API Endpoints (override with env vars, e.g. to point at emulator.py)
+BASE_URL_INTERNAL = os.environ.get("LANGCHAO_BASE_URL_INTERNAL", "http://192.168.6.91:32000")
+BASE_URL_EXTERNAL = os.environ.get("LANGCHAO_BASE_URL_EXTERNAL", "http://58.33.3.130:32000")
 API_ROUTE = "/studio/api_special/insuite/mdm_customer/create1"
 
+# Read route used for the local customer mirror (see mirror.py)
+READ_API_ROUTE = os.environ.get(
+    "LANGCHAO_READ_API_ROUTE", "/studio/api_special/insuite/mdm_customer/search1"
+)
+
+# Update route for partial updates of existing customers (see updates.py)
+UPDATE_API_ROUTE = os.environ.get(
+    "LANGCHAO_UPDATE_API_ROUTE", "/studio/api_special/insuite/mdm_customer/update1"
+)
+
 # Default to internal URL (change to BASE_URL_EXTERNAL if needed)
+# Used as the tie-break preference before any latency has been measured.
 BASE_URL = BASE_URL_INTERNAL
 
+# Endpoint health probing (see endpoints.py)
+ENDPOINT_PROBE_INTERVAL = float(os.environ.get("ENDPOINT_PROBE_INTERVAL", 15))   # seconds between probes (0 = off)
+ENDPOINT_PROBE_TIMEOUT = 3.0     # seconds before a probe counts as failed
+ENDPOINT_FAILURE_THRESHOLD = 2   # consecutive failures before marking unhealthy
+ENDPOINT_EWMA_ALPHA = 0.3        # weight of the newest latency sample
+ENDPOINT_RESET_TIMEOUT = 30.0    # seconds an open circuit waits before half-open
+
+# Upstream call timeouts (see endpoints.TimeoutPolicy): a multiple of the
+# observed latency percentile, clamped, and capped by the client's deadline
+UPSTREAM_TIMEOUT_PERCENTILE = 0.99
+UPSTREAM_TIMEOUT_MULTIPLIER = 3.0
+UPSTREAM_CONNECT_TIMEOUT = (0.5, 5.0)   # (min, max) seconds
+UPSTREAM_READ_TIMEOUT = (5.0, 30.0)     # (min, max) seconds
+
+# Client deadlines (see deadline.py), sent as X-Request-Timeout in ms
+REQUEST_MAX_TIMEOUT = 120.0   # seconds; larger client budgets are capped
+
+# Admission control for upstream-bound requests (see admission.py), per
+# tenant: beyond the in-flight limit requests queue briefly, beyond the
+# queue they are shed with 503 + Retry-After. One tenant's burst never
+# sheds another tenant's requests.
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", 32))   # per tenant
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", 64))           # per tenant
+ADMISSION_QUEUE_TIMEOUT = 5.0     # seconds a queued request waits for a slot
+ADMISSION_RETRY_AFTER = (1, 30)   # (min, max) seconds suggested to shed clients
+
+admission = KeyedAdmission(
+    lambda: current_tenant().name,
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    retry_after=ADMISSION_RETRY_AFTER,
+)
+
+# Upstream scheduling (see scheduler.py), per tenant: at most
+# UPSTREAM_CONCURRENCY calls of a tenant in flight, shared between its
+# traffic classes by weight, with some slots only interactive (wizard)
+# calls may use. Tenants never wait for each other's slots.
+UPSTREAM_CONCURRENCY = int(os.environ.get("UPSTREAM_CONCURRENCY", 16))   # per tenant
+UPSTREAM_CLASS_WEIGHTS = {INTERACTIVE: 8, BULK: 2, SYNC: 1}
+UPSTREAM_RESERVED_SLOTS = {INTERACTIVE: 4}
+
+upstream_schedulers = {}   # tenant name -> UpstreamScheduler (see tenant_scheduler)
+upstream_schedulers_lock = threading.Lock()
+
+# Server clock skew (see clock.py), estimated from upstream Date headers
+CLOCK_SKEW_TOLERANCE = float(os.environ.get("CLOCK_SKEW_TOLERANCE", 30))   # seconds before alerting
+
+clock_skew = ClockSkew(tolerance=CLOCK_SKEW_TOLERANCE)
+
+ENDPOINTS = {
+    "internal": BASE_URL_INTERNAL,
+    "external": BASE_URL_EXTERNAL,
+}
+
+# Configured default first, so it wins ties while no latency is known
+endpoint_pool = EndpointPool(
+    dict(sorted(ENDPOINTS.items(), key=lambda item: item[1] != BASE_URL)),
+    alpha=ENDPOINT_EWMA_ALPHA,
+    probe_interval=ENDPOINT_PROBE_INTERVAL,
+    probe_timeout=ENDPOINT_PROBE_TIMEOUT,
+    failure_threshold=ENDPOINT_FAILURE_THRESHOLD,
+    reset_timeout=ENDPOINT_RESET_TIMEOUT,
+    on_response=lambda response, sent_at, received_at: clock_skew.observe(
+        response.headers.get("Date"), sent_at, received_at),
+    timeout_policy=TimeoutPolicy(
+        percentile=UPSTREAM_TIMEOUT_PERCENTILE,
+        multiplier=UPSTREAM_TIMEOUT_MULTIPLIER,
+        connect=UPSTREAM_CONNECT_TIMEOUT,
+        read=UPSTREAM_READ_TIMEOUT,
+    ),
+)
+
+# Batch ingestion (see ingest.py)
+BATCH_CHUNK_SIZE = 50                   # records per upstream create1 call
+# Records normalized together (see ingest.check_records). Column passes only
+# pay off over a few thousand rows; a block is read and held before its
+# first chunk is submitted, so this also bounds the read-ahead.
+NORMALIZE_BLOCK_SIZE = 2000
+# Resubmissions of a chunk that failed before reaching inSuite (connection
+# refused, open circuit, rate limited, 429/503), backing off from this delay
+BATCH_RETRIES = 2
+BATCH_RETRY_BACKOFF = float(os.environ.get("BATCH_RETRY_BACKOFF", 0.5))   # seconds
+IMPORT_VALIDATE_MAX_ERRORS = 1000       # per-line errors returned by /api/import/validate as JSON
+NDJSON_MAX_LINE_BYTES = 1024 * 1024     # reject single records larger than this
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
+# Coalescing of concurrent single-customer submissions (see coalescer.py);
+# COALESCE_WINDOW_MS=0 sends every submission on its own
+COALESCE_WINDOW_MS = float(os.environ.get("COALESCE_WINDOW_MS", 20))
+COALESCE_MAX_BATCH = BATCH_CHUNK_SIZE
+
+# Background batch jobs (see jobs.py)
+BATCH_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024   # uploads above this spool to disk
+BATCH_JOB_TTL = 3600.0                        # seconds finished jobs stay reconnectable
+BATCH_JOB_MAX_EVENTS = 10000                  # progress events kept per job for reconnects
+SSE_KEEPALIVE_INTERVAL = 15.0                 # seconds between keepalive comments
+
+batch_jobs = JobRegistry(ttl=BATCH_JOB_TTL, max_events=BATCH_JOB_MAX_EVENTS)
+
+# Local state (drafts etc.) lives here; override with VENDOR_WIZARD_DATA_DIR
+DATA_DIR = os.environ.get(
+    "VENDOR_WIZARD_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance")
+)
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Wizard drafts (see drafts.py)
+DRAFT_TTL_DAYS = 30   # uncommitted drafts untouched this long are purged
+
+draft_store = DraftStore(os.path.join(DATA_DIR, "drafts.sqlite3"), ttl_days=DRAFT_TTL_DAYS)
+
+# Duplicate customer detection (see customer_index.py)
+DUPLICATE_MATCH_THRESHOLD = 0.6   # minimum name similarity reported as a match
+DUPLICATE_BLOCK_THRESHOLD = 0.9   # creates are refused at or above this score
+
+customer_index = CustomerIndex(os.path.join(DATA_DIR, "known_customers.jsonl"))
+
+# Submission audit log (see audit.py)
+AUDIT_SEGMENT_BYTES = 16 * 1024 * 1024   # compressed size before a new segment
+AUDIT_SEARCH_MAX_LIMIT = 200
+
+# Submission exports (see export.py), streamed from the audit log
+EXPORT_CSV_BLOCK_BYTES = 64 * 1024   # CSV bytes encoded per streamed chunk
+EXPORT_ROW_GROUP_SIZE = 10000        # rows per Parquet row group (and streamed chunk)
+
+audit_log = AuditLog(os.path.join(DATA_DIR, "audit"), segment_bytes=AUDIT_SEGMENT_BYTES)
+
+# Submission analytics (see stats.py), rolled up per day as submissions land
+STATS_DEFAULT_DAYS = 30   # range served when no from/to is given
+
+submission_stats = SubmissionStats(os.path.join(DATA_DIR, "stats.sqlite3"))
+
+# Product catalog (see catalog.py); edits to the file are picked up live
+PRODUCT_CATALOG_FILE = os.environ.get(
+    "PRODUCT_CATALOG_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "product_catalog.json")
+)
+CATALOG_SEARCH_MAX_LIMIT = 50
+
+product_catalog = ProductCatalog(PRODUCT_CATALOG_FILE)
+
+# Local customer master mirror (see mirror.py). Background sync is opt-in
+# (e.g. MIRROR_SYNC_INTERVAL=300): the read route it polls is not yet
+# confirmed against the production inSuite API. 0 disables it.
+MIRROR_SYNC_INTERVAL = float(os.environ.get("MIRROR_SYNC_INTERVAL", 0))
+MIRROR_PAGE_SIZE = 500
+
+# Post-create verification (see verifier.py). Creates are always queued, but
+# background checks are opt-in (e.g. VERIFY_INTERVAL=60) because they use
+# the read route, which is not yet confirmed against the production inSuite
+# API; POST /api/verification/run checks a batch by hand.
+VERIFY_INTERVAL = float(os.environ.get("VERIFY_INTERVAL", 0))   # seconds between batches (0 = off)
+VERIFY_DELAY = 30.0        # seconds after a create (and between attempts) before a check
+VERIFY_BATCH_SIZE = 100    # records checked per batch (one read per tenant)
+VERIFY_MAX_ATTEMPTS = 5    # reads that may miss a record before it is flagged missing
+
+# Request tracing (see tracing.py); set TRACE_FILE to also export traces as JSONL
+TRACE_FILE = os.environ.get("TRACE_FILE")
+
+tracer = Tracer(app, trace_file=TRACE_FILE)
+deadlines = Deadlines(app, maximum=REQUEST_MAX_TIMEOUT)
+
+# On-demand profiling (see profiling.py). Disabled unless PROFILE_SECRET is
+# set; a request is profiled when it sends the secret in X-Profile-Secret.
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET")
+PROFILE_KEEP = 50   # most recent profiles kept on disk
+
+profiler = Profiler(PROFILE_SECRET, os.path.join(DATA_DIR, "profiles"), keep=PROFILE_KEEP)
+app.after_request(profiler.add_header)
+
+# Admin endpoints (audit, export, customer import, mirror, verification,
+# stored profiles; see admin_only). Disabled unless ADMIN_SECRET is set;
+# callers send it in the X-Admin-Secret header, never in the URL, so it
+# stays out of access logs.
+ADMIN_SECRET = os.environ.get("ADMIN_SECRET") or None
+ADMIN_HEADER = "X-Admin-Secret"
+
+
+def admin_only(view):
+    """
+    Guard an admin endpoint with ADMIN_SECRET: 404 while it is unset, 403
+    for requests that don't send it in the X-Admin-Secret header.
+    """
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if ADMIN_SECRET is None:
+            return jsonify({"success": False, "error": "not_found"}), 404
+        supplied = request.headers.get(ADMIN_HEADER, "")
+        if not hmac.compare_digest(supplied.encode(), ADMIN_SECRET.encode()):
+            return jsonify({"success": False, "error": "forbidden"}), 403
+        return view(*args, **kwargs)
+    return guarded
+
+# Built frontend (see static.py). With SERVE_FRONTEND=1 the Vite dist/ is
+# served under its base path, so the wizard and the API share one origin
+# (build it with an empty VITE_BACKEND_URL to call the API same-origin).
+SERVE_FRONTEND = os.environ.get("SERVE_FRONTEND", "").lower() in ("1", "true", "yes")
+FRONTEND_DIST = os.environ.get(
+    "FRONTEND_DIST",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dist")
+)
+FRONTEND_BASE_PATH = "/espressif-vendor-wizard"   # `base` in vite.config.ts
+
+# Behind nginx/Apache, USE_X_SENDFILE=1 hands file bodies to the web server
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
+# Prometheus metrics, served from /api/metrics
+metrics = MetricsRegistry()
+metrics.gauge("clock_skew_seconds", "Estimated inSuite server clock minus local clock",
+              lambda: clock_skew.offset)
+metrics.gauge("clock_skew_uncertainty_seconds", "Half-width of the clock skew estimate",
+              lambda: clock_skew.uncertainty)
+metrics.gauge("clock_skew_correction_seconds", "Correction applied to signing timestamps",
+              lambda: clock_skew.correction)
+metrics.gauge("clock_skew_alert", "1 when clock skew exceeds CLOCK_SKEW_TOLERANCE",
+              lambda: int(clock_skew.alerting))
+metrics.counter("coalescer_flushes_total", "Upstream create calls made by the submission coalescer",
+                lambda: coalescer.flushes)
+metrics.counter("coalescer_submissions_total", "Single submissions handled by the coalescer",
+                lambda: coalescer.items)
+metrics.gauge("admission_in_flight", "Upstream-bound requests being processed per tenant",
+              lambda: [({"tenant": name}, c.in_flight) for name, c in admission.items()])
+metrics.gauge("admission_queued", "Upstream-bound requests waiting for a slot per tenant",
+              lambda: [({"tenant": name}, c.queued) for name, c in admission.items()])
+metrics.counter("admission_admitted_total", "Upstream-bound requests admitted per tenant",
+                lambda: [({"tenant": name}, c.admitted) for name, c in admission.items()])
+metrics.counter("admission_shed_total", "Requests shed with 503 by admission control",
+                lambda: [({"tenant": name, "reason": reason}, count)
+                         for name, c in admission.items() for reason, count in c.shed.items()])
+
+
+def scheduler_samples(collect) -> list:
+    """Per-tenant, per-class samples of collect(scheduler) -> {class: value}, for metrics."""
+    with upstream_schedulers_lock:
+        schedulers = list(upstream_schedulers.items())
+    return [({"tenant": tenant, "class": name}, value)
+            for tenant, scheduler in schedulers for name, value in collect(scheduler).items()]
+
+
+metrics.gauge("scheduler_in_flight", "Upstream calls in flight per tenant and traffic class",
+              lambda: scheduler_samples(lambda s: s.in_flight))
+metrics.gauge("scheduler_queued", "Upstream calls waiting for a slot per tenant and traffic class",
+              lambda: scheduler_samples(lambda s: s.queued()))
+metrics.counter("scheduler_granted_total", "Upstream slots granted per tenant and traffic class",
+                lambda: scheduler_samples(lambda s: s.granted))
+metrics.counter("scheduler_queue_wait_seconds_total", "Time spent waiting for an upstream slot",
+                lambda: scheduler_samples(lambda s: s.wait_seconds))
+metrics.gauge("scheduler_queue_wait_ms", "Recent upstream slot wait percentiles per tenant and traffic class",
+              lambda: [(dict(labels, quantile=str(q)), value) for q in (0.5, 0.99)
+                       for labels, value in scheduler_samples(
+                           lambda s: {name: s.wait_percentile(name, q) for name in s.weights})])
+metrics.counter("customer_updates_total", "Customer update records by outcome (unchanged ones are not sent)",
+                lambda: [({"outcome": status}, count) for status, count in update_outcomes.items()])
+metrics.gauge("verification_records", "Created customers by verification status",
+              lambda: [({"status": status}, count) for status, count in submission_verifier.counts().items()])
+metrics.counter("verification_reads_total", "Batched upstream reads made by the verifier",
+                lambda: submission_verifier.reads)
+metrics.gauge("upstream_healthy", "1 when the upstream endpoint is healthy",
+              lambda: [({"endpoint": ep.name}, int(ep.healthy)) for ep in endpoint_pool.endpoints.values()])
+metrics.gauge("upstream_latency_ewma_ms", "EWMA latency of upstream calls and probes",
+              lambda: [({"endpoint": ep.name}, ep.ewma_ms) for ep in endpoint_pool.endpoints.values()])
+metrics.gauge("upstream_read_timeout_seconds", "Current adaptive read timeout of upstream calls",
+              lambda: [({"endpoint": ep.name}, endpoint_pool.timeouts(ep)[1])
+                       for ep in endpoint_pool.endpoints.values()])
+
 
 # =============================================================================
 # SIGNATURE GENERATION
@@ -107,91 +422,254 @@ def get_msg_auth_code(api_route: str, secret_key: str, timestamp: int, json_str:
     2. SHA-512 hash the secret string to get a 64-byte MAC key
     3. HMAC-SHA256 the request body (JSON string) with the MAC key
     """
+    mac_key = derive_mac_key(api_route, secret_key, timestamp, method)
+    return sign_with_mac_key(mac_key, json_str)
+
+
+def derive_mac_key(api_route: str, secret_key: str, timestamp: int, method: str = 'post') -> bytes:
+    """Steps 1-2 of the signature: derive the per-request MAC key."""
     # Step 1: Build the secret string
     secret = f"ts@{timestamp}|route@{api_route}|sec@{secret_key}|method@{method}"
 
     # Step 2: SHA-512 hash to get MAC key
     sec_bytes = secret.encode('utf-8')
-    mac_key = hashlib.sha512(sec_bytes).digest()
+    return hashlib.sha512(sec_bytes).digest()
 
-    # Step 3: HMAC-SHA256 the JSON body
+
+def sign_with_mac_key(mac_key: bytes, json_str: str) -> str:
+    """Step 3 of the signature: HMAC-SHA256 the JSON body with the MAC key."""
     body_bytes = json_str.encode('utf-8')
-    msg_auth_code = hmac.new(mac_key, body_bytes, hashlib.sha256).hexdigest()
+    return hmac.new(mac_key, body_bytes, hashlib.sha256).hexdigest()
+
 
-    return msg_auth_code
+# =============================================================================
+# TENANTS
+# =============================================================================
+
+# Optional tenants file (see tenants.py). Without it, a single "default"
+# tenant is built from CLIENT_ID / SECRET_KEY / DATABASE_NAME above.
+TENANTS_FILE = os.environ.get(
+    "TENANTS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants.json")
+)
+TENANT_HEADER = "X-Tenant"
+TENANT_RATE_LIMIT_WAIT = 10.0   # seconds a call may wait for its tenant's rate limit
+
+# Upstream HTTP version (see transport.py): "auto" multiplexes calls over
+# HTTP/2 where httpx[http2] is installed and the host supports it, else
+# HTTP/1.1; "1.1" forces the requests connection pool. Tenants may override.
+UPSTREAM_HTTP_VERSION = os.environ.get("UPSTREAM_HTTP_VERSION", "auto")
+
+tenant_registry = TenantRegistry.load(
+    TENANTS_FILE,
+    fallback={
+        "name": "default",
+        "database": DATABASE_NAME,
+        "client_id": CLIENT_ID,
+        "secret_key": SECRET_KEY,
+    },
+    derive_key=derive_mac_key,
+    http_version=UPSTREAM_HTTP_VERSION,
+)
+
+
+def current_tenant():
+    """The tenant of the current request, or the default tenant outside a request."""
+    if has_request_context() and getattr(g, "tenant", None) is not None:
+        return g.tenant
+    return tenant_registry.default
+
+
+def tenant_scheduler(tenant) -> UpstreamScheduler:
+    """The tenant's own upstream scheduler, created on first use."""
+    with upstream_schedulers_lock:
+        scheduler = upstream_schedulers.get(tenant.name)
+        if scheduler is None:
+            scheduler = upstream_schedulers[tenant.name] = UpstreamScheduler(
+                capacity=UPSTREAM_CONCURRENCY,
+                weights=UPSTREAM_CLASS_WEIGHTS,
+                reserved=UPSTREAM_RESERVED_SLOTS,
+            )
+        return scheduler
 
 
 # =============================================================================
 # LANGCHAO API CLIENT
 # =============================================================================
 
-def create_customer_in_langchao(customer_data: list, use_internal: bool = True) -> dict:
+def call_langchao(api_route: str, param: list, use_internal: bool = None,
+                  idempotent: bool = False, log_payload: bool = True, tenant=None,
+                  priority: str = INTERACTIVE) -> dict:
     """
-    Create a customer record via the Langchao inSuite API.
+    Make a signed call to a Langchao inSuite special API route.
 
     Args:
-        customer_data: List of customer dictionaries to create
-        use_internal: Whether to use internal network URL
+        api_route: API route path, e.g. API_ROUTE
+        param: The `param` array to send (this is what gets signed)
+        use_internal: Force the internal (True) or external (False) URL.
+            None picks the best healthy endpoint and fails over on
+            connection errors.
+        idempotent: Whether the call is safe to repeat (reads). Idempotent
+            calls also fail over on read timeouts.
+        log_payload: Print the full request payload (disable for bulk reads)
+        tenant: Tenant whose credentials, database, connection pool and rate
+            limit are used (default: the current request's tenant)
+        priority: Traffic class the call is scheduled in (see scheduler.py)
+
+    The call first waits for an upstream slot from the tenant's scheduler,
+    weighted by the number of records in `param`. Connect/read timeouts adapt to each endpoint's observed latency and are
+    capped by the caller's deadline (X-Request-Timeout); once the deadline
+    has passed no further attempt is started.
 
     Returns:
         The API response as a dictionary
     """
-    base_url = BASE_URL_INTERNAL if use_internal else BASE_URL_EXTERNAL
-    url = f"{base_url}{API_ROUTE}"
-
-    # Generate timestamp
-    timestamp = int(time.time())
-
-    # The param array as JSON string (for signing)
-    # Note: separators=(',', ':') removes spaces for consistent signing
-    param_json = json.dumps(customer_data, separators=(',', ':'), ensure_ascii=False)
-
-    # Generate signature
-    sign = get_msg_auth_code(
-        api_route=API_ROUTE,
-        secret_key=SECRET_KEY,
-        timestamp=timestamp,
-        json_str=param_json,
-        method='post'
-    )
+    tenant = tenant or current_tenant()
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        return deadline_exceeded("scheduling")
+    scheduler = tenant_scheduler(tenant)
+    with span("queue"):
+        ticket = scheduler.acquire(priority, timeout=budget, cost=max(len(param), 1))
+    if ticket is None:
+        return deadline_exceeded("an upstream slot was free")
+    try:
+        return send_to_langchao(api_route, param, use_internal, idempotent, log_payload, tenant)
+    finally:
+        scheduler.release(ticket)
+
+
+def send_to_langchao(api_route: str, param: list, use_internal: bool, idempotent: bool,
+                     log_payload: bool, tenant) -> dict:
+    """Rate-limit, sign and send one call_langchao call (see there)."""
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        return deadline_exceeded("rate limiting")
+    if not tenant.limiter.acquire(timeout=TENANT_RATE_LIMIT_WAIT if budget is None
+                                  else min(TENANT_RATE_LIMIT_WAIT, budget)):
+        print(f"[WARN] Tenant {tenant.name} rate limit exceeded")
+        return {"success": False, "error": "rate_limited", "tenant": tenant.name,
+                "message": f"Rate limit for tenant '{tenant.name}' exceeded"}
+
+    if use_internal is None:
+        # Endpoints with an open circuit are skipped (see Endpoint.allows_call);
+        # an explicit X-Use-Internal choice is always tried
+        candidates = [endpoint for endpoint in endpoint_pool.ranked() if endpoint.allows_call()]
+        if not candidates:
+            return {"success": False, "error": "circuit_open",
+                    "message": "All upstream endpoints are unavailable; retry later"}
+    else:
+        candidates = [endpoint_pool.get("internal" if use_internal else "external")]
+
+    # Generate timestamp in server time (corrected for measured clock skew)
+    timestamp = clock_skew.timestamp()
+
+    with span("sign"):
+        # The param array as JSON string (for signing)
+        # Note: separators=(',', ':') removes spaces for consistent signing
+        param_json = json.dumps(param, separators=(',', ':'), ensure_ascii=False)
+
+        # Generate signature (derived key cached per tenant and second)
+        sign = sign_with_mac_key(tenant.mac_key(api_route, timestamp, 'post'), param_json)
 
     # Build the full request payload
     payload = {
         "params": {
             "timestamp": timestamp,
-            "client_id": CLIENT_ID,
+            "client_id": tenant.client_id,
             "sign": sign,
-            "param": customer_data
+            "param": param
         }
     }
 
-    print(f"\n[INFO] Creating customer in Langchao...")
-    print(f"[INFO] URL: {url}")
-    print(f"[INFO] Timestamp: {timestamp}")
-    print(f"[DEBUG] Payload: {json.dumps(payload, indent=2, ensure_ascii=False)}")
+    with span("encode"):
+        body = json.dumps(payload, ensure_ascii=False)
+
+    print(f"[INFO] Tenant: {tenant.name} / Timestamp: {timestamp}")
+    if log_payload:
+        print(f"[DEBUG] Payload: {json.dumps(payload, indent=2, ensure_ascii=False)}")
 
     # Make the request
     headers = {
         "Content-Type": "application/json",
-        "X-ODOO-DATABASE-NAME": DATABASE_NAME
+        "X-ODOO-DATABASE-NAME": tenant.database
     }
-
-    try:
-        response = requests.post(
-            url=url,
-            data=json.dumps(payload, ensure_ascii=False),
-            headers=headers,
-            timeout=30
-        )
-
-        print(f"[INFO] Response status: {response.status_code}")
+    trace_id = current_trace_id()
+    if trace_id:
+        headers[TRACE_HEADER] = trace_id
+
+    connection_error = None
+    for endpoint in candidates:
+        budget = remaining()
+        if budget is not None and budget <= 0:
+            # The caller has given up; don't spend an upstream call on it
+            return deadline_exceeded(f"calling {endpoint.name}")
+        connect_timeout, read_timeout = endpoint_pool.timeouts(endpoint, budget)
+        url = f"{endpoint.base_url}{api_route}"
+        print(f"[INFO] URL: {url} ({endpoint.name}, timeouts {connect_timeout:.2f}/{read_timeout:.2f}s)")
+
+        sent_at = time.time()
+        start = time.perf_counter()
+        try:
+            with span("upstream"):
+                response = tenant.transport.post(
+                    url=url,
+                    data=body.encode('utf-8'),
+                    headers=headers,
+                    timeout=(connect_timeout, read_timeout)
+                )
+        except TransportConnectError as e:
+            # Includes connect timeouts: the request never reached the server,
+            # so it is safe to try the next endpoint.
+            print(f"[ERROR] Connection to {endpoint.name} failed: {e}")
+            if budget is not None and remaining() <= 0:
+                # Cut short by the caller's deadline, not the endpoint's fault
+                return dict(deadline_exceeded(f"connecting to {endpoint.name}"), endpoint=endpoint.name)
+            endpoint.record_failure("connection_failed")
+            connection_error = e
+            continue
+        except TransportTimeout as e:
+            # Read timeout: a create may already have been applied, so only
+            # idempotent calls fail over; others could create a duplicate.
+            print(f"[ERROR] Timeout: {e}")
+            if budget is not None and remaining() <= 0:
+                # The create may still be applied upstream; the duplicate
+                # check catches a retry of it
+                return dict(deadline_exceeded(f"{endpoint.name} responded"), endpoint=endpoint.name)
+            endpoint.record_failure("timeout")
+            if idempotent:
+                connection_error = e
+                continue
+            return {"success": False, "error": "timeout", "message": str(e), "endpoint": endpoint.name}
+        except TransportConnectionLost as e:
+            # The connection broke after the request may have been received:
+            # as with a read timeout, only idempotent calls fail over.
+            print(f"[ERROR] Connection to {endpoint.name} lost: {e}")
+            if budget is not None and remaining() <= 0:
+                return dict(deadline_exceeded(f"{endpoint.name} responded"), endpoint=endpoint.name)
+            endpoint.record_failure("connection_lost")
+            if idempotent:
+                connection_error = e
+                continue
+            return {"success": False, "error": "connection_lost", "message": str(e), "endpoint": endpoint.name}
+        except Exception as e:
+            print(f"[ERROR] Unexpected error: {e}")
+            return {"success": False, "error": "unknown", "message": str(e), "endpoint": endpoint.name}
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        endpoint.record_success(latency_ms)
+        clock_skew.observe(response.headers.get("Date"), sent_at, sent_at + latency_ms / 1000)
+        print(f"[INFO] Response status: {response.status_code} ({response.http_version})")
 
         try:
-            result = response.json()
-            print(f"[INFO] Response: {json.dumps(result, indent=2, ensure_ascii=False)}")
+            with span("decode"):
+                result = response.json()
+            if log_payload:
+                print(f"[INFO] Response: {json.dumps(result, indent=2, ensure_ascii=False)}")
             return {
                 "success": response.ok and "result" in result,
                 "status_code": response.status_code,
+                "endpoint": endpoint.name,
                 "data": result
             }
         except json.JSONDecodeError:
@@ -199,44 +677,579 @@ def create_customer_in_langchao(customer_data: list, use_internal: bool = True)
             return {
                 "success": False,
                 "status_code": response.status_code,
+                "endpoint": endpoint.name,
                 "error": "Invalid JSON response",
                 "raw_response": response.text
             }
 
-    except requests.exceptions.ConnectionError as e:
-        print(f"[ERROR] Connection failed: {e}")
-        return {"success": False, "error": "connection_failed", "message": str(e)}
-    except requests.exceptions.Timeout as e:
-        print(f"[ERROR] Timeout: {e}")
-        return {"success": False, "error": "timeout", "message": str(e)}
+    return {"success": False, "error": "connection_failed", "message": str(connection_error)}
+
+
+def create_customer_in_langchao(customer_data: list, use_internal: bool = None, tenant=None,
+                                priority: str = INTERACTIVE) -> dict:
+    """
+    Create a customer record via the Langchao inSuite API.
+
+    Args:
+        customer_data: List of customer dictionaries to create
+        use_internal: Force the internal (True) or external (False) URL,
+            or None to auto-select with failover
+        tenant: Target tenant (default: the current request's tenant)
+        priority: Scheduling class (see scheduler.py)
+
+    Returns:
+        The API response as a dictionary
+    """
+    print(f"\n[INFO] Creating customer in Langchao ({priority})...")
+    return call_langchao(API_ROUTE, customer_data, use_internal=use_internal, tenant=tenant,
+                         priority=priority)
+
+
+def fetch_mirror_page(param: dict) -> dict:
+    """Fetch one page of changed customers from the read route (for the mirror)."""
+    result = call_langchao(READ_API_ROUTE, [param], idempotent=True, log_payload=False, priority=SYNC)
+    if not result.get("success"):
+        raise RuntimeError(result.get("message") or result.get("error") or "read failed")
+    return result["data"]["result"]
+
+
+customer_mirror = CustomerMirror(
+    os.path.join(DATA_DIR, "customer_mirror.sqlite3"),
+    fetch_page=fetch_mirror_page,
+    page_size=MIRROR_PAGE_SIZE,
+)
+
+
+def index_mirrored_customers(records: list) -> None:
+    """Feed customers first seen by the mirror into the duplicate index."""
+    customer_index.add(records, source="mirror")
+
+
+def fetch_for_verification(tenant_name: str, numbers: list, names: list) -> list:
+    """Read the customers with any of the given numbers or names in one call (see verifier.py)."""
+    tenant = tenant_registry.get(tenant_name)
+    if tenant is None:
+        raise RuntimeError(f"unknown tenant '{tenant_name}'")
+    records = []
+    cursor = {"modified_since": "", "after_id": 0}
+    while True:
+        result = call_langchao(READ_API_ROUTE,
+                               [dict(cursor, numbers=numbers, names=names, limit=MIRROR_PAGE_SIZE)],
+                               idempotent=True, log_payload=False, tenant=tenant, priority=SYNC)
+        if not result.get("success"):
+            raise RuntimeError(failure_message(result))
+        page = result["data"]["result"] or {}
+        records.extend(page.get("records") or [])
+        if not page.get("has_more") or not page.get("records"):
+            return records
+        last = records[-1]
+        cursor = {"modified_since": last.get("write_date") or "", "after_id": last["id"]}
+
+
+def mirrored_customer(tenant_name: str, number: str):
+    """The mirror's copy of a customer (the mirror only holds the default tenant's)."""
+    if tenant_name != tenant_registry.default.name:
+        return None
+    return customer_mirror.get_by_number(number)
+
+
+submission_verifier = SubmissionVerifier(
+    os.path.join(DATA_DIR, "verification.sqlite3"),
+    fetch=fetch_for_verification,
+    lookup_local=mirrored_customer,
+    batch_size=VERIFY_BATCH_SIZE,
+    delay=VERIFY_DELAY,
+    max_attempts=VERIFY_MAX_ATTEMPTS,
+)
+
+
+def created_customers(result: dict) -> list:
+    """create1's {"id", "number"} per record of a successful result ([] if absent)."""
+    data = result.get("data")
+    created = ((data or {}).get("result") or {}).get("data") if isinstance(data, dict) else None
+    return created if isinstance(created, list) else []
+
+
+def submit_customers(customer_data: list, use_internal: bool = None, tenant=None,
+                     priority: str = INTERACTIVE, trace_ids: list = None) -> dict:
+    """
+    Create customers upstream and record the submission locally.
+
+    Every create path goes through here so local bookkeeping (the duplicate
+    index and the audit log) sees all submissions. Records may still carry
+    the frontend's _metadata block (vendor_id, vendor assignment, ...); it is
+    removed before the upstream call and kept in the audit log. `trace_ids`
+    gives each record's own request trace when records of several requests
+    are sent together (see flush_coalesced).
+    """
+    tenant = tenant or current_tenant()
+    metadata = [customer.get("_metadata") for customer in customer_data]
+    records = [strip_metadata(dict(customer)) for customer in customer_data]
+
+    result = create_customer_in_langchao(records, use_internal=use_internal, tenant=tenant, priority=priority)
+    if result.get("success"):
+        # With create1's numbers, later mirror syncs update these entries
+        numbers = [entry.get("number") for entry in created_customers(result)]
+        if len(numbers) != len(records):
+            numbers = [None] * len(records)
+        customer_index.add([dict(record, number=number) if number else record
+                            for record, number in zip(records, numbers)], source="submitted")
+    seq = audit_submission(records, metadata, result, tenant, trace_ids)
+    record_submission_stats(tenant.name, records, metadata, result)
+    if result.get("success"):
+        try:
+            submission_verifier.enqueue(tenant.name, records, created_customers(result), audit_seq=seq)
+        except Exception as e:
+            print(f"[ERROR] Could not queue submission for verification: {e}")
+    return result
+
+
+def audit_submission(records: list, metadata: list, result: dict, tenant, trace_ids: list = None):
+    """
+    Append a create call and its upstream response to the audit log; returns its seq.
+
+    A call carrying records of several requests keeps each record's trace
+    ID under "trace_ids"; "trace_id" is the first of them.
+    """
+    keys = [
+        {"vendor_id": (meta or {}).get("vendor_id"), "name": record.get("name")}
+        for record, meta in zip(records, metadata)
+    ]
+    entry = {"tenant": tenant.name, "trace_id": current_trace_id()}
+    if trace_ids and len(set(trace_ids)) > 1:
+        entry.update(trace_id=trace_ids[0], trace_ids=trace_ids)
+    elif trace_ids:
+        entry["trace_id"] = trace_ids[0]
+    try:
+        return audit_log.append("create", keys, dict(
+            entry,
+            records=records,
+            metadata=metadata,
+            response=result,
+        ), success=bool(result.get("success")))
     except Exception as e:
-        print(f"[ERROR] Unexpected error: {e}")
-        return {"success": False, "error": "unknown", "message": str(e)}
+        # The submission itself already happened; never fail it over the log
+        print(f"[ERROR] Could not write audit log: {e}")
+
+
+def customer_dimensions(record: dict, meta) -> dict:
+    """The analytics dimensions (see stats.py) of one submitted customer."""
+    meta = meta or {}
+    product = product_catalog.lookup(meta.get("esp_product_selected") or "")
+    return {
+        "assigned_vendor": meta.get("assigned_vendor"),
+        "business_specialist": record.get("sale_user_number"),
+        "currency": record.get("currency_name") or meta.get("transaction_currency"),
+        "product_family": product["family"] if product else None,
+    }
+
+
+def record_submission_stats(tenant_name: str, records: list, metadata: list, result: dict,
+                            ts: float = None) -> None:
+    """Roll one create call into the tenant's per-day submission stats."""
+    try:
+        submission_stats.record(
+            tenant_name,
+            day_number(time.time() if ts is None else ts),
+            [customer_dimensions(record, meta) for record, meta in zip(records, metadata)],
+            success=bool(result.get("success")),
+        )
+    except Exception as e:
+        print(f"[ERROR] Could not update submission stats: {e}")
+
+
+def backfill_submission_stats() -> None:
+    """Build the rollups from the audit log when starting without any."""
+    if not submission_stats.empty:
+        return
+    count = 0
+    for entry in audit_log.scan():
+        if entry.get("kind") == "create":
+            record_submission_stats(entry.get("tenant") or tenant_registry.default.name,
+                                    entry.get("records") or [], entry.get("metadata") or [],
+                                    {"success": entry.get("success")}, ts=entry["ts"])
+            count += 1
+    if count:
+        print(f"[INFO] Submission stats: backfilled {count} create calls from the audit log")
+
+
+backfill_submission_stats()
+
+
+def create_result_for(result: dict, position: int, size: int) -> dict:
+    """
+    Narrow a multi-record create1 result to one record.
+
+    create1 returns one {"id", "number"} entry per submitted record, in
+    order; other result shapes are passed through unchanged.
+    """
+    created = created_customers(result)
+    if len(created) != size:
+        return result
+    data = result["data"]
+    narrowed = dict(data, result=dict(data["result"], data=[created[position]]))
+    return dict(result, data=narrowed)
+
+
+def flush_coalesced(key, items: list) -> list:
+    """
+    Coalescer flush: one create1 call for all records, bad ones isolated.
+
+    Items are (record, deadline, trace_id, screen) tuples. Records whose
+    caller's deadline has already passed are dropped; the call runs under
+    the latest remaining deadline, so one impatient caller cannot cut the
+    others short. Each record is audited under its own caller's trace ID.
+    Records of callers that screen for duplicates are checked again
+    against the batch: concurrent submissions of one customer each pass
+    the check on their own, and only the first of them is created.
+    """
+    tenant, use_internal = key
+    now = time.monotonic()
+    results = [deadline_exceeded("coalesced flush") if deadline is not None and deadline <= now else None
+               for _, deadline, _, _ in items]
+    live = [(position, item) for position, item in enumerate(items) if results[position] is None]
+    for duplicate in find_duplicates([record for _, (record, _, _, _) in live]):
+        position, (_, _, _, screen) = live[duplicate["index"]]
+        if screen:
+            results[position] = {"success": False, "error": "duplicate_customer",
+                                 "message": duplicate_message([duplicate]), "duplicates": [duplicate]}
+    live = [(position, item) for position, item in live if results[position] is None]
+    if not live:
+        return results
+    records = [record for _, (record, _, _, _) in live]
+    trace_of = {id(record): trace_id for _, (record, _, trace_id, _) in live}
+    pending = [deadline for _, (_, deadline, _, _) in live]
+    with deadline_scope(None if None in pending else max(pending)):
+        outcomes, _ = submit_isolating(
+            records,
+            lambda chunk: submit_customers(chunk, use_internal=use_internal, tenant=tenant,
+                                           trace_ids=[trace_of[id(record)] for record in chunk]),
+            BATCH_RETRIES, BATCH_RETRY_BACKOFF
+        )
+    for (position, _), outcome in zip(live, outcomes):
+        results[position] = create_result_for(outcome["result"], outcome["position"], outcome["size"])
+    return results
+
+
+coalescer = Coalescer(flush_coalesced, window=COALESCE_WINDOW_MS / 1000, max_batch=COALESCE_MAX_BATCH)
+
+
+def submit_customer(customer: dict, use_internal: bool = None) -> dict:
+    """
+    Create a single customer for the current request's tenant.
+
+    Concurrent single submissions are coalesced into one create1 call and
+    each caller gets back only its own record's result.
+    """
+    if COALESCE_WINDOW_MS <= 0:
+        return submit_customers([customer], use_internal=use_internal)
+    with span("coalesce"):
+        return coalescer.submit((current_tenant(), use_internal),
+                                (customer, current_deadline(), current_trace_id(), not allow_duplicates()))
+
+
+def find_duplicates(customer_data: list) -> list:
+    """
+    Return likely duplicates of the given records that should block a create.
+
+    A match blocks when its score reaches DUPLICATE_BLOCK_THRESHOLD (an exact
+    tax ID match always does). Records are matched against the duplicate
+    index and against the records before them in the same list, so a
+    customer listed twice in one upload is caught too.
+    """
+    duplicates = []
+    earlier = CustomerIndex()
+    for position, customer in enumerate(customer_data):
+        if not isinstance(customer, dict):
+            continue
+        matches = customer_index.match(customer, threshold=DUPLICATE_BLOCK_THRESHOLD)
+        matches += earlier.match(customer, threshold=DUPLICATE_BLOCK_THRESHOLD)
+        if matches:
+            matches.sort(key=lambda match: match["score"], reverse=True)
+            duplicates.append({"index": position, "name": customer.get("name"), "matches": matches})
+        earlier.add([customer], source="same_upload")
+    return duplicates
+
+
+def duplicate_message(duplicates: list) -> str:
+    """Human-readable message naming the best match of each duplicate."""
+    names = ", ".join(m["customer"]["name"] or m["customer"]["inv_tax_number"]
+                      for d in duplicates for m in d["matches"][:1])
+    return f"Possible duplicate of existing customer: {names}"
+
+
+def duplicate_response(duplicates: list):
+    """Build the 409 response returned when a create is refused as a duplicate."""
+    return jsonify({
+        "success": False,
+        "error": "duplicate_customer",
+        "message": duplicate_message(duplicates),
+        "duplicates": duplicates
+    }), 409
+
+
+def screen_duplicates(records: list) -> dict:
+    """ingest_records screen: hold back a chunk's likely duplicates (see find_duplicates)."""
+    return {d["index"]: duplicate_message([d]) for d in find_duplicates(records)}
+
+
+def upstream_error_status(result: dict) -> int:
+    """HTTP status for a failed create: 409 duplicate, 429 rate limited, 504 deadline, else 500."""
+    return {"duplicate_customer": 409, "rate_limited": 429, DEADLINE_EXCEEDED: 504}.get(result.get("error"), 500)
+
+
+def allow_duplicates() -> bool:
+    """Whether the caller explicitly overrides the duplicate check."""
+    return request.headers.get('X-Allow-Duplicate', 'false').lower() == 'true'
+
+
+# =============================================================================
+# CUSTOMER UPDATES
+# =============================================================================
+
+# Records handled by submit_updates, by outcome (for /api/metrics)
+update_outcomes = {status: 0 for status in ("updated", "unchanged", "not_found", "invalid", "failed")}
+
+
+def update_customers_in_langchao(updates: list, use_internal: bool = None, tenant=None,
+                                 priority: str = INTERACTIVE) -> dict:
+    """
+    Apply field updates to existing customers via the update route.
+
+    Args:
+        updates: [{"id", "number", "values"}] entries (see updates.py)
+        use_internal: Force the internal (True) or external (False) URL,
+            or None to auto-select with failover
+        tenant: Target tenant (default: the current request's tenant)
+        priority: Scheduling class (see scheduler.py)
+
+    Returns:
+        The API response as a dictionary
+    """
+    print(f"\n[INFO] Updating {len(updates)} customer(s) in Langchao ({priority})...")
+    # Setting fields to values is safe to repeat, so updates fail over like reads
+    return call_langchao(UPDATE_API_ROUTE, updates, use_internal=use_internal, idempotent=True,
+                         tenant=tenant, priority=priority)
+
+
+def fetch_customer(number: str, tenant, priority: str = INTERACTIVE) -> dict:
+    """
+    Read one customer's current record from the read route.
+
+    Returns:
+        {"success": True, "customer": record or None} or the failed call result
+    """
+    result = call_langchao(READ_API_ROUTE, [{"number": number, "limit": 1}], idempotent=True,
+                           log_payload=False, tenant=tenant, priority=priority)
+    if not result.get("success"):
+        return result
+    records = (result["data"]["result"] or {}).get("records") or []
+    customer = next((r for r in records if r.get("number") == number), None)
+    if customer is not None and tenant is tenant_registry.default:
+        customer_mirror.upsert([customer])
+    return {"success": True, "customer": customer}
+
+
+def submit_updates(customer_data: list, use_internal: bool = None, tenant=None,
+                   priority: str = INTERACTIVE, fresh: bool = False) -> dict:
+    """
+    Update existing customers, sending only the fields that changed.
+
+    Each record names its customer by "number" and carries the values the
+    customer should have (normalized like creates). It is diffed against
+    the mirrored record while the mirror is syncing and the row is no older
+    than MIRROR_SYNC_INTERVAL; otherwise (the customer isn't mirrored, the
+    row may be stale, `fresh` is set or the tenant isn't the mirrored
+    default one) against the record read upstream, so an edit made in
+    inSuite is never mistaken for "unchanged". Unchanged records are
+    skipped; the rest go upstream in chunks of BATCH_CHUNK_SIZE, bisecting
+    rejected chunks like creates.
+
+    Returns:
+        Counts per status and one {"number", "status", ...} result per
+        record; status is updated, unchanged, not_found, invalid or failed.
+        Updated and unchanged results list the submitted fields that could
+        not be compared under "ignored" (see updates.ignored_fields), and
+        values that could not be normalized (sent as given) under "warnings".
+    """
+    tenant = tenant or current_tenant()
+    metadata = [customer.get("_metadata") for customer in customer_data]
+    records = [strip_metadata(dict(customer)) for customer in customer_data]
+    results = [None] * len(records)
+    warnings = warnings_by_row(normalize_records(records))
+    # Without background sync, mirror rows are never refreshed from inSuite
+    mirrored = tenant is tenant_registry.default and not fresh and MIRROR_SYNC_INTERVAL > 0
+
+    pending = []   # (position, current record, changed values)
+    ignored = {}   # position -> submitted fields the current record lacks
+    for position, record in enumerate(records):
+        number = str(record.get("number") or "").strip()
+        if not number:
+            results[position] = {"number": None, "status": "invalid", "errors": ["missing field: number"]}
+            continue
+        current = customer_mirror.get_by_number(number, max_age=MIRROR_SYNC_INTERVAL) if mirrored else None
+        if current is None:
+            lookup = fetch_customer(number, tenant, priority=priority)
+            if not lookup.get("success"):
+                results[position] = {"number": number, "status": "failed", "error": failure_message(lookup)}
+                continue
+            current = lookup["customer"]
+        if current is None:
+            results[position] = {"number": number, "status": "not_found"}
+            continue
+        values = diff_customer(current, record)
+        ignored[position] = ignored_fields(current, record)
+        if values:
+            pending.append((position, current, values))
+        else:
+            results[position] = {"number": number, "status": "unchanged", "changed": [],
+                                 "ignored": ignored[position], "warnings": warnings.get(position, [])}
+
+    for chunk in iter_chunks(pending, BATCH_CHUNK_SIZE):
+        updates = [{"id": current["id"], "number": current["number"], "values": values}
+                   for _, current, values in chunk]
+        outcomes, _ = submit_isolating(
+            updates,
+            lambda part: update_customers_in_langchao(part, use_internal=use_internal, tenant=tenant,
+                                                      priority=priority),
+            BATCH_RETRIES, BATCH_RETRY_BACKOFF
+        )
+        applied = []
+        for (position, current, values), outcome in zip(chunk, outcomes):
+            if outcome["success"]:
+                data = ((outcome["result"].get("data") or {}).get("result") or {}).get("data")
+                entry = data[outcome["position"]] if isinstance(data, list) and len(data) == outcome["size"] else None
+                applied.append(updated_record(current, values, entry))
+                results[position] = {"number": current["number"], "status": "updated", "changed": sorted(values),
+                                     "ignored": ignored[position], "warnings": warnings.get(position, [])}
+            else:
+                results[position] = {"number": current["number"], "status": "failed", "error": outcome["error"]}
+        if applied and tenant is tenant_registry.default:
+            customer_mirror.upsert(applied)
+        customer_index.add([record for record, (_, _, values) in zip(applied, chunk)
+                            if set(values) & set(NAME_FIELDS + (TAX_FIELD,))], source="updated")
+        audit_update(updates, [metadata[position] for position, _, _ in chunk],
+                     [values.get("name") or current.get("name") for _, current, values in chunk],
+                     outcomes, tenant)
+
+    counts = {status: sum(1 for r in results if r["status"] == status) for status in update_outcomes}
+    for status, count in counts.items():
+        update_outcomes[status] += count
+    print(f"[INFO] Update: {counts['updated']} updated, {counts['unchanged']} unchanged, "
+          f"{counts['not_found']} not found, {counts['invalid']} invalid, {counts['failed']} failed")
+    return dict(counts, success=counts["updated"] + counts["unchanged"] == len(records), results=results)
+
+
+def audit_update(updates: list, metadata: list, names: list, outcomes: list, tenant) -> None:
+    """Append update calls (changed fields only) and their outcomes to the audit log."""
+    keys = [
+        {"vendor_id": (meta or {}).get("vendor_id"), "name": name, "number": update["number"]}
+        for update, meta, name in zip(updates, metadata, names)
+    ]
+    try:
+        audit_log.append("update", keys, {
+            "tenant": tenant.name,
+            "trace_id": current_trace_id(),
+            "updates": updates,
+            "metadata": metadata,
+            "errors": [outcome["error"] for outcome in outcomes],
+        }, success=all(outcome["success"] for outcome in outcomes))
+    except Exception as e:
+        print(f"[ERROR] Could not write audit log: {e}")
 
 
 # =============================================================================
 # API ROUTES
 # =============================================================================
 
+@app.before_request
+def start_background_workers():
+    """Start background workers lazily so they also run under a WSGI server."""
+    endpoint_pool.ensure_probing()
+    customer_mirror.start_sync_loop(MIRROR_SYNC_INTERVAL, on_new=index_mirrored_customers)
+    submission_verifier.start_loop(VERIFY_INTERVAL)
+
+
+@app.before_request
+def resolve_tenant():
+    """Select the tenant from the X-Tenant header or ?tenant= (default if absent)."""
+    name = request.headers.get(TENANT_HEADER) or request.args.get('tenant')
+    g.tenant = tenant_registry.get(name)
+    if g.tenant is None:
+        return jsonify({
+            "success": False,
+            "error": "unknown_tenant",
+            "message": f"Unknown tenant: {name}"
+        }), 400
+
+
+def get_use_internal_override():
+    """
+    Read the X-Use-Internal override header.
+
+    Returns True/False when the client forces an endpoint, or None to let the
+    endpoint pool pick the best healthy one.
+    """
+    header = request.headers.get('X-Use-Internal')
+    if header is None:
+        return None
+    return header.lower() == 'true'
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint."""
-    return jsonify({
+    """
+    Health check endpoint.
+
+    With ?deep=1 the response also reports upstream reachability, latency and
+    circuit state from the background prober's cached results. No upstream
+    request is made either way, so load balancers may poll this freely.
+    Deep mode returns 503 when no upstream endpoint is reachable, and reports
+    "degraded" when the server clock skew exceeds CLOCK_SKEW_TOLERANCE or
+    the last edit of the product catalog could not be loaded (the previous
+    version is still served).
+    """
+    body = {
         "status": "ok",
         "service": "Espressif Vendor Wizard Backend",
-        "langchao_url": BASE_URL
-    })
+        "langchao_url": endpoint_pool.best().base_url
+    }
+
+    if request.args.get('deep', '').lower() not in ('1', 'true', 'yes'):
+        return jsonify(body)
+
+    upstream = endpoint_pool.health_report()
+    body["upstream"] = upstream
+    body["clock_skew"] = clock_skew.snapshot()
+    body["catalog"] = product_catalog.status()
+    if clock_skew.alerting or body["catalog"]["last_error"]:
+        body["status"] = "degraded"
+    if upstream["status"] == "down":
+        body["status"] = "degraded"
+        return jsonify(body), 503
+    return jsonify(body)
 
 
 @app.route('/api/create-customer', methods=['POST'])
+@admission.limited
+@profiler.profiled
 def create_customer():
     """
     Create a new customer in Langchao inSuite.
 
     Expects JSON body with customer data from the frontend wizard.
+
+    Large batch uploads can instead be sent as NDJSON (one customer object
+    per line, Content-Type: application/x-ndjson). These are parsed
+    incrementally from the request stream, validated, and submitted in
+    chunks of BATCH_CHUNK_SIZE records.
     """
     try:
-        data = request.get_json()
+        if request.mimetype in NDJSON_CONTENT_TYPES:
+            return create_customers_from_ndjson()
+
+        with span("parse"):
+            data = request.get_json()
 
         if not data:
             return jsonify({
@@ -252,16 +1265,21 @@ def create_customer():
         # Check if data is already a list or needs to be wrapped
         customer_data = data if isinstance(data, list) else [data]
 
-        # Remove _metadata if present (not needed for API)
-        for customer in customer_data:
-            if '_metadata' in customer:
-                del customer['_metadata']
+        # Refuse likely duplicates unless explicitly overridden
+        if not allow_duplicates():
+            with span("duplicates"):
+                duplicates = find_duplicates(customer_data)
+            if duplicates:
+                return duplicate_response(duplicates)
 
-        # Determine which URL to use based on request header or default
-        use_internal = request.headers.get('X-Use-Internal', 'true').lower() == 'true'
+        # Honour an explicit X-Use-Internal header, otherwise auto-select
+        use_internal = get_use_internal_override()
 
-        # Call Langchao API
-        result = create_customer_in_langchao(customer_data, use_internal=use_internal)
+        # Call Langchao API (single wizard submissions are coalesced)
+        if len(customer_data) == 1:
+            result = submit_customer(customer_data[0], use_internal=use_internal)
+        else:
+            result = submit_customers(customer_data, use_internal=use_internal)
 
         if result.get("success"):
             return jsonify({
@@ -275,7 +1293,7 @@ def create_customer():
                 "error": result.get("error", "Unknown error"),
                 "message": result.get("message", "Failed to create customer"),
                 "details": result
-            }), 500
+            }), upstream_error_status(result)
 
     except Exception as e:
         print(f"[ERROR] Exception in create_customer: {e}")
@@ -286,20 +1304,843 @@ def create_customer():
         }), 500
 
 
+def create_customers_from_ndjson():
+    """Stream an NDJSON batch through validation and chunked submission."""
+    use_internal = get_use_internal_override()
+
+    print("\n" + "=" * 70)
+    print("RECEIVED NDJSON CUSTOMER BATCH FROM FRONTEND")
+    print("=" * 70)
+
+    summary = ingest_records(
+        iter_ndjson(request.stream, max_line_bytes=NDJSON_MAX_LINE_BYTES),
+        submit=lambda chunk: submit_customers(chunk, use_internal=use_internal, priority=BULK),
+        chunk_size=BATCH_CHUNK_SIZE,
+        normalize_block=NORMALIZE_BLOCK_SIZE,
+        screen=None if allow_duplicates() else screen_duplicates,
+        retries=BATCH_RETRIES,
+        retry_backoff=BATCH_RETRY_BACKOFF,
+    )
+
+    print(f"[INFO] Batch complete: {summary['submitted']} submitted, "
+          f"{summary['failed']} failed, {summary['invalid']} invalid")
+
+    if summary["records"] == 0:
+        return jsonify({
+            "success": False,
+            "error": "No data provided"
+        }), 400
+
+    status = 200 if summary["success"] else 207 if summary["submitted"] else 500
+    return jsonify(summary), status
+
+
+@app.route('/api/batches', methods=['POST'])
+def start_batch():
+    """
+    Start a background batch submission and return its job id.
+
+    Accepts an NDJSON body (or a JSON array) of customer records. The upload
+    is spooled to a temporary file so the job can outlive this request, then
+    processed like the synchronous NDJSON path. Progress is available from
+    /api/batches/<job_id>/events as a Server-Sent Events stream.
+    """
+    use_internal = get_use_internal_override()
+    tenant = current_tenant()   # the job runs outside this request
+    screen = None if allow_duplicates() else screen_duplicates
+
+    spool = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_MEMORY_BYTES)
+    if request.mimetype in NDJSON_CONTENT_TYPES:
+        while True:
+            block = request.stream.read(64 * 1024)
+            if not block:
+                break
+            spool.write(block)
+    else:
+        data = request.get_json(silent=True)
+        for record in (data if isinstance(data, list) else [data] if data else []):
+            spool.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+
+    if spool.tell() == 0:
+        spool.close()
+        return jsonify({
+            "success": False,
+            "error": "No data provided"
+        }), 400
+    spool.seek(0)
+
+    def work(job):
+        with spool:
+            return ingest_records(
+                iter_ndjson(spool, max_line_bytes=NDJSON_MAX_LINE_BYTES),
+                submit=lambda chunk: submit_customers(chunk, use_internal=use_internal, tenant=tenant,
+                                                      priority=BULK),
+                chunk_size=BATCH_CHUNK_SIZE,
+                on_event=job.emit,
+                normalize_block=NORMALIZE_BLOCK_SIZE,
+                screen=screen,
+                retries=BATCH_RETRIES,
+                retry_backoff=BATCH_RETRY_BACKOFF,
+            )
+
+    job = batch_jobs.start(work)
+    print(f"[INFO] Started batch job {job.id} for tenant {tenant.name}")
+
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status_url": f"/api/batches/{job.id}",
+        "events_url": f"/api/batches/{job.id}/events"
+    }), 202
+
+
+@app.route('/api/batches/<job_id>', methods=['GET'])
+def get_batch(job_id):
+    """Get the current status and (once finished) summary of a batch job."""
+    job = batch_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/batches/<job_id>/events', methods=['GET'])
+def stream_batch_events(job_id):
+    """
+    Stream per-record and per-chunk progress of a batch job as SSE.
+
+    Reconnecting clients send Last-Event-ID (EventSource does this
+    automatically) or ?last_event_id=N to resume after the events they have
+    already seen. Only the last BATCH_JOB_MAX_EVENTS events are kept; when
+    some missed ones are gone, a "snapshot" event with the job's counts
+    comes first.
+    """
+    job = batch_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0
+    try:
+        last_event_id = max(int(last_event_id), 0)
+    except ValueError:
+        last_event_id = 0
+
+    return Response(
+        stream_events(job, last_event_id, keepalive=SSE_KEEPALIVE_INTERVAL),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.route('/api/import/validate', methods=['POST'])
+def validate_import():
+    """
+    Dry-run validation of an import file; nothing is submitted.
+
+    Accepts an NDJSON body (one customer per line) and runs the same checks
+    and normalization as a batch submission. Returns counts, the per-line
+    errors and the normalization warnings (values passed through as given)
+    as JSON, or with ?format=csv the full report as CSV (one
+    line,severity,message row per problem) for fixing up the spreadsheet.
+    With ?normalized=1 the normalized records are streamed back as NDJSON
+    instead.
+    """
+    output = request.args.get('format', 'json').lower()
+    normalized = request.args.get('normalized', '').lower() in ('1', 'true', 'yes')
+    checked = check_records(iter_ndjson(request.stream, max_line_bytes=NDJSON_MAX_LINE_BYTES),
+                            NORMALIZE_BLOCK_SIZE)
+
+    if normalized:
+        def records():
+            for _, record, errors, _ in checked:
+                if not errors:
+                    yield json.dumps(record, ensure_ascii=False) + "\n"
+        return Response(records(), mimetype='application/x-ndjson')
+
+    if output == 'csv':
+        def report():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["line", "severity", "message"])
+            for line_no, _, errors, warnings in checked:
+                for error in errors:
+                    writer.writerow([line_no, "error", error])
+                for warning in warnings:
+                    writer.writerow([line_no, "warning", warning])
+                if buffer.tell() > 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        return Response(report(), mimetype='text/csv',
+                        headers={"Content-Disposition": "attachment; filename=import-errors.csv"})
+
+    summary = {"records": 0, "valid": 0, "invalid": 0, "errors": [], "errors_truncated": False,
+               "warned": 0, "warnings": [], "warnings_truncated": False}
+    for line_no, _, errors, warnings in checked:
+        summary["records"] += 1
+        if warnings:
+            summary["warned"] += 1
+            if len(summary["warnings"]) < IMPORT_VALIDATE_MAX_ERRORS:
+                summary["warnings"].append({"line": line_no, "warnings": warnings})
+            else:
+                summary["warnings_truncated"] = True
+        if not errors:
+            summary["valid"] += 1
+            continue
+        summary["invalid"] += 1
+        if len(summary["errors"]) < IMPORT_VALIDATE_MAX_ERRORS:
+            summary["errors"].append({"line": line_no, "errors": errors})
+        else:
+            summary["errors_truncated"] = True
+    return jsonify(dict(summary, success=summary["invalid"] == 0))
+
+
+@app.route('/api/drafts/<vendor_id>', methods=['GET'])
+def get_draft(vendor_id):
+    """Get a stored wizard draft, e.g. to resume after the tab was lost."""
+    draft = draft_store.get(vendor_id)
+    if draft is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+    return jsonify({"success": True, "draft": draft})
+
+
+@app.route('/api/drafts/<vendor_id>', methods=['PATCH'])
+def patch_draft(vendor_id):
+    """
+    Merge the fields changed at a wizard step into the draft.
+
+    Body (all keys optional):
+        record: Changed Langchao API fields (null removes a field)
+        form: Changed raw wizard form fields, used to resume the wizard
+        metadata: Changed _metadata fields (vendor assignment etc.)
+        step: The wizard step the user is on
+        base_version: Reject with 409 if the stored version differs
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Invalid draft update"}), 400
+
+    for key in ("record", "form", "metadata"):
+        if data.get(key) is not None and not isinstance(data[key], dict):
+            return jsonify({"success": False, "error": f"'{key}' must be an object"}), 400
+
+    try:
+        draft = draft_store.patch(
+            vendor_id,
+            record=data.get("record"),
+            form=data.get("form"),
+            metadata=data.get("metadata"),
+            step=data.get("step"),
+            base_version=data.get("base_version"),
+        )
+    except DraftConflict as e:
+        return jsonify({"success": False, "error": "conflict", "message": str(e)}), 409
+
+    return jsonify({
+        "success": True,
+        "vendor_id": vendor_id,
+        "version": draft["version"],
+        "status": draft["status"]
+    })
+
+
+@app.route('/api/drafts/<vendor_id>', methods=['DELETE'])
+def delete_draft(vendor_id):
+    """Discard a draft."""
+    if not draft_store.delete(vendor_id):
+        return jsonify({"success": False, "error": "not_found"}), 404
+    return jsonify({"success": True})
+
+
+@app.route('/api/drafts/<vendor_id>/commit', methods=['POST'])
+@admission.limited
+def commit_draft(vendor_id):
+    """
+    Submit a stored draft to Langchao.
+
+    The body may carry a last small delta in the same format as PATCH. The
+    stored record is validated and sent as a single create (coalesced with
+    concurrent submissions like /api/create-customer). Committing
+    an already committed draft returns the stored result instead of creating
+    a duplicate customer.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Invalid draft update"}), 400
+
+    draft = draft_store.get(vendor_id)
+    if draft is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+    if draft["status"] == "committed":
+        return jsonify({
+            "success": True,
+            "message": "Customer already created",
+            "data": (draft["result"] or {}).get("data")
+        })
+
+    try:
+        if any(data.get(key) for key in ("record", "form", "metadata")):
+            draft_store.patch(
+                vendor_id,
+                record=data.get("record"),
+                form=data.get("form"),
+                metadata=data.get("metadata"),
+            )
+        draft = draft_store.begin_commit(vendor_id)
+    except DraftConflict as e:
+        return jsonify({"success": False, "error": "conflict", "message": str(e)}), 409
+
+    # Until finish_commit the draft stays "committing" and refuses further
+    # commits, so an unexpected error must reopen it before propagating
+    try:
+        # The draft's metadata travels with the record into the audit log
+        record = dict(draft["record"])
+        record["_metadata"] = dict(draft["metadata"] or {}, vendor_id=vendor_id)
+        errors = validate_customer(record)
+        if errors:
+            draft_store.finish_commit(vendor_id, False, {"error": "validation_failed", "errors": errors})
+            return jsonify({
+                "success": False,
+                "error": "validation_failed",
+                "message": "; ".join(errors)
+            }), 422
+
+        if not allow_duplicates():
+            duplicates = find_duplicates([record])
+            if duplicates:
+                draft_store.finish_commit(vendor_id, False, {"error": "duplicate_customer"})
+                return duplicate_response(duplicates)
+
+        print(f"\n[INFO] Committing draft {vendor_id} (version {draft['version']})")
+        result = submit_customer(record, use_internal=get_use_internal_override())
+    except Exception as e:
+        draft_store.finish_commit(vendor_id, False, {"error": "server_error", "message": str(e)})
+        raise
+    draft_store.finish_commit(vendor_id, bool(result.get("success")), result)
+
+    if result.get("success"):
+        return jsonify({
+            "success": True,
+            "message": "Customer created successfully",
+            "data": result.get("data")
+        })
+    else:
+        return jsonify({
+            "success": False,
+            "error": result.get("error", "Unknown error"),
+            "message": result.get("message", "Failed to create customer"),
+            "details": result
+        }), upstream_error_status(result)
+
+
+@app.route('/api/customers/match', methods=['POST'])
+def match_customer():
+    """
+    Look up known customers similar to the given record.
+
+    Body: a customer record using the API field names; name,
+    X_char_gzcp4gjmhi (foreign name), inv_title and inv_tax_number are used.
+    Served entirely from the local index, without calling Langchao.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "No data provided"}), 400
+
+    try:
+        threshold = float(request.args.get('threshold', DUPLICATE_MATCH_THRESHOLD))
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid threshold or limit"}), 400
+
+    start = time.perf_counter()
+    matches = customer_index.match(data, threshold=threshold, limit=limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    return jsonify({
+        "success": True,
+        "duplicate": any(m["score"] >= DUPLICATE_BLOCK_THRESHOLD for m in matches),
+        "matches": matches,
+        "indexed_customers": len(customer_index),
+        "elapsed_ms": round(elapsed_ms, 2)
+    })
+
+
+@app.route('/api/customers/import', methods=['POST'])
+@admin_only
+def import_customers():
+    """
+    Import existing customers into the duplicate index (admin only).
+
+    Accepts a JSON array or NDJSON of customer records (API field names),
+    e.g. an export of the current customer master. Nothing is sent upstream.
+    Records without a name or tax ID, or that aren't objects, are rejected
+    and reported by line (NDJSON) or index (JSON array).
+    """
+    if request.mimetype in NDJSON_CONTENT_TYPES:
+        where = "line"
+        parsed = iter_ndjson(request.stream, max_line_bytes=NDJSON_MAX_LINE_BYTES)
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list) or not data:
+            return jsonify({
+                "success": False,
+                "error": "Expected a JSON array or NDJSON of customer records"
+            }), 400
+        where = "index"
+        parsed = ((position, record, None) for position, record in enumerate(data))
+
+    accepted = rejected = 0
+    errors = []
+
+    def valid_records():
+        nonlocal accepted, rejected
+        for position, record, error in parsed:
+            problems = [error] if error else validate_entry(record)
+            if problems:
+                rejected += 1
+                if len(errors) < IMPORT_VALIDATE_MAX_ERRORS:
+                    errors.append({where: position, "errors": problems})
+                continue
+            accepted += 1
+            yield record
+
+    added = 0
+    for chunk in iter_chunks(valid_records(), 1000):
+        added += customer_index.add(chunk, source="import")
+
+    status = 200 if not rejected else 207 if accepted else 400
+    return jsonify({
+        "success": rejected == 0,
+        "imported": added,
+        "rejected": rejected,
+        "errors": errors,
+        "errors_truncated": rejected > len(errors),
+        "indexed_customers": len(customer_index)
+    }), status
+
+
+@app.route('/api/customers/<number>', methods=['PATCH'])
+@admission.limited
+def update_customer(number):
+    """
+    Update one existing customer with the wizard's data for it.
+
+    Body: the customer record (API field names); only fields that differ
+    from the customer's current record are sent upstream, and nothing is
+    sent if none do. ?fresh=1 always diffs against the record read
+    upstream, even when the mirror is current.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "No data provided"}), 400
+
+    summary = submit_updates([dict(data, number=number)], use_internal=get_use_internal_override(),
+                             fresh=request.args.get('fresh', '').lower() in ('1', 'true', 'yes'))
+    result = summary["results"][0]
+    status = {"updated": 200, "unchanged": 200, "not_found": 404, "invalid": 400}.get(result["status"], 500)
+    return jsonify(dict(result, success=status == 200)), status
+
+
+@app.route('/api/customers/update', methods=['POST'])
+@admission.limited
+def update_customers():
+    """
+    Update many existing customers, e.g. a re-sync from another system.
+
+    Accepts a JSON array or NDJSON of customer records, each with its
+    "number". Unchanged records cost no upstream call; changed fields are
+    sent in chunks at bulk priority. ?fresh=1 as for a single update.
+    """
+    if request.mimetype in NDJSON_CONTENT_TYPES:
+        records = []
+        for line_no, record, error in iter_ndjson(request.stream, max_line_bytes=NDJSON_MAX_LINE_BYTES):
+            if error:
+                return jsonify({"success": False, "error": f"line {line_no}: {error}"}), 400
+            records.append(record)
+    else:
+        data = request.get_json(silent=True)
+        records = data if isinstance(data, list) else []
+    if not records:
+        return jsonify({"success": False, "error": "No data provided"}), 400
+    if not all(isinstance(record, dict) for record in records):
+        return jsonify({"success": False, "error": "Every record must be a JSON object"}), 400
+
+    summary = submit_updates(records, use_internal=get_use_internal_override(), priority=BULK,
+                             fresh=request.args.get('fresh', '').lower() in ('1', 'true', 'yes'))
+    if summary["success"]:
+        status = 200
+    elif summary["updated"] or summary["unchanged"]:
+        status = 207
+    else:
+        status = 500 if summary["failed"] else 422
+    return jsonify(summary), status
+
+
+def catalog_response(body: dict, etag: str):
+    """JSON response validated by ETag, so unchanged catalog data costs a 304."""
+    response = jsonify(body)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+@app.route('/api/catalog', methods=['GET'])
+def get_catalog():
+    """The full product catalog (families, variants, BVI list) and its version."""
+    data = product_catalog.data()
+    return catalog_response(data, data["version"])
+
+
+@app.route('/api/catalog/search', methods=['GET'])
+def search_catalog():
+    """Typeahead search over MPNs and variants (?q=esp32-s3&limit=20)."""
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), CATALOG_SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid limit"}), 400
+
+    version = product_catalog.version
+    results = product_catalog.search(query, limit=limit)
+    etag = f"{version}-{hashlib.sha1(f'{query}|{limit}'.encode('utf-8')).hexdigest()[:12]}"
+    return catalog_response({"version": version, "query": query, "results": results}, etag)
+
+
+@app.route('/api/catalog/products/<path:mpn>', methods=['GET'])
+def get_catalog_product(mpn):
+    """Family, group, SoC and BVI flags of one MPN."""
+    entry = product_catalog.lookup(mpn)
+    if entry is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+    return catalog_response(dict(entry, version=product_catalog.version),
+                            f"{product_catalog.version}-{hashlib.sha1(mpn.encode('utf-8')).hexdigest()[:12]}")
+
+
+@app.route('/api/audit', methods=['GET'])
+@admin_only
+def search_audit_log():
+    """
+    Look up past submissions and their upstream responses, newest first.
+
+    Admin only; results are limited to the caller's tenant. Filters (all
+    optional, combined with AND): vendor_id, name (prefix), date_from /
+    date_to (YYYY-MM-DD, UTC), success (true/false), limit.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), AUDIT_SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid limit"}), 400
+    success = request.args.get('success')
+    entries = audit_log.search(
+        vendor_id=request.args.get('vendor_id') or None,
+        name=request.args.get('name') or None,
+        date_from=request.args.get('date_from') or None,
+        date_to=request.args.get('date_to') or None,
+        success=None if success is None else success.lower() in ('1', 'true', 'yes'),
+        tenant=current_tenant().name,
+        limit=limit,
+    )
+    return jsonify({"success": True, "count": len(entries), "entries": entries})
+
+
+@app.route('/api/export/submissions', methods=['GET'])
+@admin_only
+def export_submissions():
+    """
+    Stream submissions from the audit log as CSV or Parquet, oldest first.
+
+    Admin only (X-Admin-Secret), and limited to the caller's tenant. One
+    row per customer record sent upstream (creates, and the changed fields
+    of updates).
+    Query params:
+        format: csv (default) or parquet (needs pyarrow)
+        compression: csv: none (default) or gzip; parquet: snappy
+            (default), zstd, gzip or none
+        fields: comma-separated API field names (default: export.DEFAULT_FIELDS)
+        kind: create (default), update or all
+        filters as for /api/audit: vendor_id, name, date_from, date_to, success
+    """
+    output = request.args.get('format', CSV).lower()
+    if output not in (CSV, PARQUET):
+        return jsonify({"success": False, "error": f"Unknown format: {output}"}), 400
+    if output == PARQUET and pa is None:
+        return jsonify({"success": False, "error": "Parquet export needs pyarrow installed"}), 501
+    compression = request.args.get('compression', 'none' if output == CSV else 'snappy').lower()
+    if compression not in (CSV_COMPRESSIONS if output == CSV else PARQUET_COMPRESSIONS):
+        return jsonify({"success": False, "error": f"Unsupported {output} compression: {compression}"}), 400
+    kind = request.args.get('kind', 'create').lower()
+    if kind not in ('create', 'update', 'all'):
+        return jsonify({"success": False, "error": f"Unknown kind: {kind}"}), 400
+
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or EXPORT_DEFAULT_FIELDS
+    success = request.args.get('success')
+    vendor_id = request.args.get('vendor_id') or None
+    name = request.args.get('name') or None
+    entries = audit_log.iter_entries(
+        vendor_id=vendor_id,
+        name=name,
+        date_from=request.args.get('date_from') or None,
+        date_to=request.args.get('date_to') or None,
+        success=None if success is None else success.lower() in ('1', 'true', 'yes'),
+        kind=None if kind == 'all' else kind,
+        tenant=current_tenant().name,
+    )
+    if kind == 'all':
+        entries = (entry for entry in entries if entry.get("kind") in ('create', 'update'))
+    rows = iter_rows(entries, fields, vendor_id=vendor_id, name=name)
+    columns = EXPORT_ENTRY_COLUMNS + fields
+
+    filename = f"submissions-{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}"
+    if output == PARQUET:
+        body = parquet_chunks(rows, columns, EXPORT_ROW_GROUP_SIZE,
+                              None if compression == 'none' else compression)
+        mimetype, filename = 'application/vnd.apache.parquet', filename + ".parquet"
+    elif compression == 'gzip':
+        body = gzip_chunks(csv_chunks(rows, columns, EXPORT_CSV_BLOCK_BYTES))
+        mimetype, filename = 'application/gzip', filename + ".csv.gz"
+    else:
+        body = csv_chunks(rows, columns, EXPORT_CSV_BLOCK_BYTES)
+        mimetype, filename = 'text/csv', filename + ".csv"
+
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={filename}",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@app.route('/api/audit/<int:seq>', methods=['GET'])
+@admin_only
+def get_audit_entry(seq):
+    """A single audit log entry of the caller's tenant by sequence number (admin only)."""
+    entry = audit_log.get(seq, tenant=current_tenant().name)
+    if entry is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+    return jsonify({"success": True, "entry": entry})
+
+
+@app.route('/api/audit/status', methods=['GET'])
+@admin_only
+def audit_status():
+    """Audit log size across all tenants: entries, segments and bytes on disk (admin only)."""
+    return jsonify(audit_log.status())
+
+
+@app.route('/api/stats', methods=['GET'])
+def get_submission_stats():
+    """
+    The caller's tenant's onboarded customer counts and upstream success rates.
+
+    Query: from / to (YYYY-MM-DD, UTC, inclusive; default the last
+    STATS_DEFAULT_DAYS days) and daily (comma-separated dimensions to also
+    break down per day, e.g. daily=assigned_vendor,currency).
+    """
+    try:
+        end = day_number(request.args['to']) if request.args.get('to') else day_number(time.time())
+        start = (day_number(request.args['from']) if request.args.get('from')
+                 else end - STATS_DEFAULT_DAYS + 1)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid date, expected YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"success": False, "error": f"from {day_string(start)} is after to {day_string(end)}"}), 400
+    daily = tuple(d.strip() for d in request.args.get('daily', '').split(',') if d.strip())
+    stats = submission_stats.query(current_tenant().name, start, end, daily=daily)
+    return jsonify(dict(stats, success=True))
+
+
+def default_tenant_only(view):
+    """
+    Restrict a mirror endpoint to the default tenant, the only one the
+    mirror holds customers of: 404 for requests naming another tenant.
+    """
+    @functools.wraps(view)
+    def guarded(*args, **kwargs):
+        if current_tenant() is not tenant_registry.default:
+            return jsonify({
+                "success": False,
+                "error": "not_found",
+                "message": f"The customer mirror only holds tenant '{tenant_registry.default.name}'"
+            }), 404
+        return view(*args, **kwargs)
+    return guarded
+
+
+@app.route('/api/mirror/customers', methods=['GET'])
+@admin_only
+@default_tenant_only
+def search_mirrored_customers():
+    """
+    Search the local customer master mirror (no upstream call; admin only).
+
+    Query params: number, name (prefix), org (use_org_id), sales_user, limit
+    """
+    try:
+        limit = min(int(request.args.get('limit', 50)), 1000)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid limit"}), 400
+
+    customers = customer_mirror.search(
+        number=request.args.get('number'),
+        name=request.args.get('name'),
+        org=request.args.get('org'),
+        sales_user=request.args.get('sales_user'),
+        limit=limit,
+    )
+    return jsonify({"success": True, "count": len(customers), "customers": customers})
+
+
+@app.route('/api/mirror/customers/<number>', methods=['GET'])
+@admin_only
+@default_tenant_only
+def get_mirrored_customer(number):
+    """Look up one mirrored customer by its customer number (admin only)."""
+    customer = customer_mirror.get_by_number(number)
+    if customer is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+    return jsonify({"success": True, "customer": customer})
+
+
+@app.route('/api/mirror/sync', methods=['POST'])
+@admin_only
+@default_tenant_only
+def sync_mirror():
+    """Pull changes from inSuite into the mirror now (admin only)."""
+    result = customer_mirror.sync(on_new=index_mirrored_customers)
+    return jsonify(result), 200 if result.get("success") else 502
+
+
+@app.route('/api/mirror/status', methods=['GET'])
+@admin_only
+@default_tenant_only
+def mirror_status():
+    """Mirror size, sync cursor and last sync outcome (admin only)."""
+    return jsonify(customer_mirror.status())
+
+
+@app.route('/api/verification', methods=['GET'])
+@admin_only
+def list_verifications():
+    """
+    The caller's tenant's created customers and whether inSuite confirmed
+    them, newest first (admin only).
+
+    Query params: status (pending, verified, mismatch, missing), limit.
+    Mismatches carry the differing fields as {"submitted", "erp"}.
+    """
+    status = request.args.get('status') or None
+    if status and status not in VERIFY_STATUSES:
+        return jsonify({"success": False, "error": f"Unknown status: {status}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 1000)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid limit"}), 400
+    records = submission_verifier.list(status=status, limit=limit, tenant=current_tenant().name)
+    return jsonify({"success": True, "count": len(records), "records": records})
+
+
+@app.route('/api/verification/status', methods=['GET'])
+@admin_only
+def verification_status():
+    """The caller's tenant's counts per status; reads made and the last read error (admin only)."""
+    return jsonify(submission_verifier.status(tenant=current_tenant().name))
+
+
+@app.route('/api/verification/run', methods=['POST'])
+@admin_only
+def run_verification():
+    """Check one batch of the caller's tenant's due records now (admin only)."""
+    result = submission_verifier.run_once(tenant=current_tenant().name)
+    return jsonify(result), 200 if result.get("success") else 409
+
+
+@app.route('/api/verification/reconcile', methods=['POST'])
+@admin_only
+def reconcile_submissions():
+    """
+    Queue the caller's tenant's past successful creates from the audit log
+    for verification (admin only).
+
+    Query params: date_from / date_to (YYYY-MM-DD, UTC). Creates already
+    queued are skipped, so this is safe to repeat.
+    """
+    tenant = current_tenant().name
+    queued = entries = 0
+    for entry in audit_log.iter_entries(kind="create", success=True, tenant=tenant,
+                                        date_from=request.args.get('date_from') or None,
+                                        date_to=request.args.get('date_to') or None):
+        entries += 1
+        queued += submission_verifier.enqueue(tenant, entry.get("records") or [],
+                                              created_customers(entry.get("response") or {}),
+                                              audit_seq=entry["seq"], created_at=entry["ts"])
+    return jsonify({"success": True, "entries": entries, "queued": queued})
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@admin_only
+def list_profiles():
+    """List stored request profiles (admin only)."""
+    return jsonify({"success": True, "profiles": profiler.list()})
+
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+@admin_only
+def get_profile(profile_id):
+    """
+    Download a stored profile (admin only).
+
+    Returns the raw pstats dump by default (open with snakeviz, gprof2dot or
+    flameprof); ?format=text returns a text report sorted by ?sort=, one
+    of profiling.SORT_KEYS (default: cumulative).
+    """
+    path = profiler.path(profile_id)
+    if path is None:
+        return jsonify({"success": False, "error": "not_found"}), 404
+
+    if request.args.get('format') == 'text':
+        try:
+            report = profiler.text_report(path, sort=request.args.get('sort', 'cumulative'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        return Response(report, mimetype='text/plain')
+    return send_file(path, mimetype='application/octet-stream',
+                     as_attachment=True, download_name=profile_id)
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics (clock skew, upstream health)."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get current API configuration (for debugging)."""
     return jsonify({
         "base_url": BASE_URL,
+        "endpoints": endpoint_pool.snapshot(),
         "api_route": API_ROUTE,
-        "client_id": CLIENT_ID[:8] + "..." + CLIENT_ID[-4:],
-        "database": DATABASE_NAME
+        "update_api_route": UPDATE_API_ROUTE,
+        "client_id": current_tenant().describe()["client_id"],
+        "database": current_tenant().database,
+        "tenant": current_tenant().name,
+        "tenants": tenant_registry.describe(),
+        "coalescer": coalescer.stats(),
+        "admission": admission.snapshot(),
+        "scheduler": {name: scheduler.snapshot() for name, scheduler in list(upstream_schedulers.items())}
     })
 
 
 @app.route('/api/test', methods=['POST'])
+@profiler.profiled
 def test_connection():
-    """Test connection to Langchao API with all fields using default values."""
+    """
+    Test connection to Langchao API with all fields using default values.
+
+    Note: this creates a real TEST_ customer in the ERP. For monitoring, poll
+    /api/health?deep=1 instead, which uses the cached probe results.
+    """
     try:
         test_id = int(time.time()) % 100000
         test_data = [{
@@ -382,7 +2223,7 @@ def test_connection():
             "inv_address": "",  # 开票通讯地址
         }]
 
-        use_internal = request.headers.get('X-Use-Internal', 'true').lower() == 'true'
+        use_internal = get_use_internal_override()
         result = create_customer_in_langchao(test_data, use_internal=use_internal)
 
         return jsonify(result)
@@ -394,6 +2235,25 @@ def test_connection():
         }), 500
 
 
+# =============================================================================
+# FRONTEND
+# =============================================================================
+
+if SERVE_FRONTEND:
+    frontend = StaticSite(FRONTEND_DIST, os.path.join(DATA_DIR, "static-cache"))
+    frontend.precompress()
+
+    @app.route('/', methods=['GET'])
+    def frontend_root():
+        return redirect(FRONTEND_BASE_PATH + '/')
+
+    @app.route(FRONTEND_BASE_PATH + '/', defaults={'path': ''}, methods=['GET'])
+    @app.route(FRONTEND_BASE_PATH + '/<path:path>', methods=['GET'])
+    def serve_frontend(path):
+        """Built wizard assets, precompressed and cache-friendly."""
+        return frontend.serve(path)
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -403,9 +2263,11 @@ if __name__ == '__main__':
     print("Espressif Vendor Wizard - Backend Server")
     print("=" * 70)
     print(f"Langchao API URL: {BASE_URL}")
-    print(f"Database: {DATABASE_NAME}")
+    print(f"Tenants: {', '.join(t['name'] + ' (' + t['database'] + ')' for t in tenant_registry.describe())}")
     print("=" * 70)
     print("\nStarting server on http://localhost:5001")
+    if SERVE_FRONTEND:
+        print(f"Wizard: http://localhost:5001{FRONTEND_BASE_PATH}/")
     print("Press Ctrl+C to stop\n")
 
     app.run(host='0.0.0.0', port=5001, debug=True)
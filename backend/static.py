@@ -0,0 +1,190 @@
+"""
+Espressif Vendor Wizard - Frontend Static Serving
+Serves the built frontend (Vite dist/) from the backend, so the wizard and
+the API share one origin: no separate static host and no CORS preflight.
+
+Text assets are precompressed once with gzip and, if the optional `brotli`
+package is installed, brotli. Compressed files shipped by the build next to
+the originals (foo.js.gz / foo.js.br) are used as-is; otherwise they are
+generated into a cache directory at startup. Each request gets the best
+encoding its Accept-Encoding allows.
+
+Vite puts a content hash in every asset file name (index-A9aKI0Ez.js), so
+those are served as immutable for a year; everything else (index.html,
+logos) must be revalidated, which costs a 304 thanks to strong ETags.
+Files are sent with send_file, which uses the server's zero-copy
+wsgi.file_wrapper (sendfile) where available, or X-Sendfile when enabled.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import abort, request, send_file
+
+try:
+    import brotli
+except ImportError:   # optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/javascript", "application/json", "application/xml",
+    "image/svg+xml", "application/manifest+json",
+)
+MIN_COMPRESS_BYTES = 1024
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Vite output: name-<8+ char hash>.ext
+_HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+
+def _compressible(path: str) -> bool:
+    mimetype = mimetypes.guess_type(path)[0] or ""
+    return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _accepts(encoding: str) -> bool:
+    """Whether the request's Accept-Encoding allows `encoding` (q > 0)."""
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == encoding:
+            q = params.strip()
+            try:
+                return not (q.startswith("q=") and float(q[2:]) == 0)
+            except ValueError:
+                return False
+    return False
+
+
+class StaticSite:
+    """
+    Precompressed, cache-friendly serving of a built single-page app.
+
+    Args:
+        root: Build output directory (dist/)
+        cache_dir: Where generated .gz/.br variants are stored
+    """
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def __init__(self, root: str, cache_dir: str):
+        self.root = os.path.abspath(root)
+        self.cache_dir = cache_dir
+        self._files = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # -------------------------------------------------------------------------
+    # Precompression
+    # -------------------------------------------------------------------------
+
+    def precompress(self) -> dict:
+        """Index every file under root and build missing compressed variants."""
+        counts = {"files": 0, "gzip": 0, "br": 0}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith((".gz", ".br")):
+                    continue
+                relative = os.path.relpath(os.path.join(directory, name), self.root)
+                entry = self._entry(relative.replace(os.sep, "/"))
+                counts["files"] += 1
+                for encoding in entry["variants"]:
+                    counts[encoding] += 1
+        print(f"[INFO] Frontend: {counts['files']} files from {self.root} "
+              f"({counts['gzip']} gzip, {counts['br']} brotli"
+              f"{'' if brotli else ', brotli not installed'})")
+        return counts
+
+    def _entry(self, relative: str):
+        """File metadata (ETag, compressed variants), rebuilt when the file changes."""
+        path = os.path.join(self.root, relative)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._files.get(relative)
+        if entry is not None and entry["key"] == key:
+            return entry
+
+        with open(path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()[:20]
+        variants = {}
+        if _compressible(path) and len(content) >= MIN_COMPRESS_BYTES:
+            for encoding, suffix in self.ENCODINGS:
+                variant = self._variant(path, content, digest, encoding, suffix)
+                if variant:
+                    variants[encoding] = variant
+
+        entry = {"key": key, "path": path, "etag": digest, "variants": variants}
+        with self._lock:
+            self._files[relative] = entry
+        return entry
+
+    def _variant(self, path: str, content: bytes, digest: str, encoding: str, suffix: str):
+        # Prefer a variant produced by the build, if it is not stale
+        shipped = path + suffix
+        if os.path.exists(shipped) and os.path.getmtime(shipped) >= os.path.getmtime(path):
+            return shipped
+        if encoding == "br" and brotli is None:
+            return None
+
+        cached = os.path.join(self.cache_dir, digest + suffix)
+        if not os.path.exists(cached):
+            if encoding == "br":
+                data = brotli.compress(content, quality=11)
+            else:
+                data = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(data) >= len(content):
+                return None
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, cached)
+        return cached
+
+    # -------------------------------------------------------------------------
+    # Serving
+    # -------------------------------------------------------------------------
+
+    def serve(self, relative: str):
+        """Response for a path below the site root (index.html for app routes)."""
+        relative = relative.strip("/") or "index.html"
+        if ".." in relative.split("/"):
+            abort(404)
+        entry = self._entry(relative)
+        if entry is None:
+            if "." in relative.rsplit("/", 1)[-1]:
+                abort(404)
+            # Client-side route: serve the app shell
+            relative = "index.html"
+            entry = self._entry(relative)
+            if entry is None:
+                abort(404)
+
+        path, encoding = entry["path"], None
+        for candidate, _ in self.ENCODINGS:
+            if candidate in entry["variants"] and _accepts(candidate):
+                path, encoding = entry["variants"][candidate], candidate
+                break
+
+        mimetype = mimetypes.guess_type(entry["path"])[0] or "application/octet-stream"
+        etag = f"{entry['etag']}-{encoding}" if encoding else entry["etag"]
+        response = send_file(path, mimetype=mimetype, etag=etag, conditional=True,
+                             max_age=None)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if entry["variants"]:
+            response.vary.add("Accept-Encoding")
+        immutable = relative.startswith("assets/") and _HASHED_NAME.search(relative)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+        return response
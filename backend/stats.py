@@ -0,0 +1,243 @@
+"""
+Espressif Vendor Wizard - Submission Analytics
+Per-day rollups of onboarded customers and upstream call outcomes, kept up
+to date as submissions land, for the /api/stats endpoint.
+
+Rollups are kept per tenant. Each dimension (assigned vendor, business
+specialist, currency, product family, upstream outcome) is held in memory
+as a dense day x value count matrix and persisted to SQLite with one
+upsert per submission. A range
+query is a slice of that matrix summed along the day axis -- one
+vectorised numpy operation, independent of how many submissions the range
+covers. numpy is optional; without it the same slices are summed in pure
+Python, which is fine for years of daily rows.
+"""
+
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:   # optional dependency
+    np = None
+
+
+DIMENSIONS = ("assigned_vendor", "business_specialist", "currency", "product_family")
+UPSTREAM = "upstream"
+UNKNOWN = "unknown"
+
+
+def day_number(value) -> int:
+    """Proleptic ordinal of a date, datetime, YYYY-MM-DD string or UNIX timestamp."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).date().toordinal()
+    if isinstance(value, str):
+        return date.fromisoformat(value).toordinal()
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    return value.toordinal()
+
+
+def day_string(number: int) -> str:
+    return date.fromordinal(number).isoformat()
+
+
+# =============================================================================
+# COUNT MATRIX
+# =============================================================================
+
+class CountMatrix:
+    """
+    Growable day x value matrix of counts.
+
+    Rows are days from `first_day`, columns are the dimension's values in
+    the order they were first seen.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.first_day = None
+        self.rows = 0
+        self._data = np.zeros((0, 0), dtype=np.int64) if np is not None else []
+
+    def _column(self, value: str) -> int:
+        column = self.values.get(value)
+        if column is None:
+            column = self.values[value] = len(self.values)
+        return column
+
+    def _grow(self, rows_before: int, rows: int, columns: int) -> None:
+        if np is not None:
+            height, width = self._data.shape
+            if rows_before or rows > height or columns > width:
+                grown = np.zeros((max(rows, height * 2 if rows > height else height) + rows_before,
+                                  max(columns, width * 2 if columns > width else width)), dtype=np.int64)
+                grown[rows_before:rows_before + height, :width] = self._data
+                self._data = grown
+            return
+        for row in self._data:
+            row.extend([0] * (columns - len(row)))
+        self._data[:0] = [[0] * columns for _ in range(rows_before)]
+        self._data.extend([0] * columns for _ in range(rows - len(self._data)))
+
+    def add(self, day: int, value: str, count: int = 1) -> None:
+        column = self._column(value)
+        if self.first_day is None:
+            self.first_day = day
+        rows_before = max(self.first_day - day, 0)
+        self.first_day -= rows_before
+        self.rows = max(self.rows + rows_before, day - self.first_day + 1)
+        self._grow(rows_before, self.rows, len(self.values))
+        self._data[day - self.first_day][column] += count
+
+    def _bounds(self, start: int, end: int):
+        if self.first_day is None:
+            return None
+        lo = max(start - self.first_day, 0)
+        hi = min(end - self.first_day + 1, self.rows)
+        return (lo, hi) if lo < hi else None
+
+    def totals(self, start: int, end: int) -> dict:
+        """Per-value counts summed over days start..end (inclusive)."""
+        bounds = self._bounds(start, end)
+        if bounds is None:
+            return {}
+        lo, hi = bounds
+        if np is not None:
+            sums = self._data[lo:hi, :len(self.values)].sum(axis=0).tolist()
+        else:
+            sums = [sum(column) for column in zip(*self._data[lo:hi])]
+        return {value: sums[column] for value, column in self.values.items() if sums[column]}
+
+    def series(self, start: int, end: int) -> list:
+        """[(day, {value: count})] for each day with data in start..end."""
+        bounds = self._bounds(start, end)
+        if bounds is None:
+            return []
+        lo, hi = bounds
+        rows = self._data[lo:hi, :len(self.values)].tolist() if np is not None else self._data[lo:hi]
+        series = []
+        for offset, row in enumerate(rows):
+            counts = {value: row[column] for value, column in self.values.items() if row[column]}
+            if counts:
+                series.append((self.first_day + lo + offset, counts))
+        return series
+
+
+# =============================================================================
+# SUBMISSION STATS
+# =============================================================================
+
+class SubmissionStats:
+    """
+    Incrementally maintained submission rollups, per tenant.
+
+    Args:
+        path: SQLite file the daily rollups are persisted to
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            # Rollups from before they were kept per tenant can't be split
+            # up; dropping them lets the server rebuild them from the audit log
+            self._conn.execute("DROP TABLE IF EXISTS daily")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tenant_daily (
+                    tenant     TEXT NOT NULL,
+                    day        INTEGER NOT NULL,
+                    dimension  TEXT NOT NULL,
+                    value      TEXT NOT NULL,
+                    count      INTEGER NOT NULL,
+                    PRIMARY KEY (tenant, day, dimension, value)
+                )
+            """)
+        self.matrices = {}   # tenant -> {dimension: CountMatrix}
+        for tenant, day, dimension, value, count in self._conn.execute(
+                "SELECT tenant, day, dimension, value, count FROM tenant_daily ORDER BY day"):
+            matrices = self._matrices(tenant)
+            if dimension in matrices:
+                matrices[dimension].add(day, value, count)
+
+    def _matrices(self, tenant: str) -> dict:
+        matrices = self.matrices.get(tenant)
+        if matrices is None:
+            matrices = self.matrices[tenant] = {dimension: CountMatrix() for dimension in DIMENSIONS + (UPSTREAM,)}
+        return matrices
+
+    @property
+    def empty(self) -> bool:
+        return all(matrix.first_day is None
+                   for matrices in self.matrices.values() for matrix in matrices.values())
+
+    def record(self, tenant: str, day: int, created: list, success: bool) -> None:
+        """
+        Count one upstream create call.
+
+        Args:
+            tenant: Tenant the call was made for
+            day: day_number() of the call
+            created: For a successful call, one {dimension: value} dict per
+                created customer (ignored for failed calls)
+            success: Whether the call succeeded
+        """
+        increments = {(UPSTREAM, "success" if success else "failure"): 1}
+        if success:
+            for customer in created:
+                for dimension in DIMENSIONS:
+                    key = (dimension, str(customer.get(dimension) or UNKNOWN))
+                    increments[key] = increments.get(key, 0) + 1
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    """
+                    INSERT INTO tenant_daily (tenant, day, dimension, value, count) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (tenant, day, dimension, value) DO UPDATE SET count = count + excluded.count
+                    """,
+                    [(tenant, day, dimension, value, count) for (dimension, value), count in increments.items()],
+                )
+            matrices = self._matrices(tenant)
+            for (dimension, value), count in increments.items():
+                matrices[dimension].add(day, value, count)
+
+    def query(self, tenant: str, start: int, end: int, daily: tuple = ()) -> dict:
+        """
+        A tenant's totals per dimension for days start..end, the upstream
+        success rate per day, and per-day breakdowns for the dimensions in
+        `daily`.
+        """
+        with self._lock:
+            matrices = self._matrices(tenant)
+            totals = {dimension: matrices[dimension].totals(start, end) for dimension in DIMENSIONS}
+            upstream = matrices[UPSTREAM].totals(start, end)
+            upstream_series = matrices[UPSTREAM].series(start, end)
+            series = {dimension: matrices[dimension].series(start, end)
+                      for dimension in daily if dimension in matrices}
+
+        def rate(counts):
+            calls = counts.get("success", 0) + counts.get("failure", 0)
+            return round(counts.get("success", 0) / calls, 4) if calls else None
+
+        return {
+            "from": day_string(start),
+            "to": day_string(end),
+            "onboarded": sum(totals["assigned_vendor"].values()),
+            "totals": totals,
+            "upstream": {
+                "success": upstream.get("success", 0),
+                "failure": upstream.get("failure", 0),
+                "success_rate": rate(upstream),
+                "daily": [
+                    {"date": day_string(day), "success": counts.get("success", 0),
+                     "failure": counts.get("failure", 0), "success_rate": rate(counts)}
+                    for day, counts in upstream_series
+                ],
+            },
+            "daily": {
+                dimension: [{"date": day_string(day), "counts": counts} for day, counts in rows]
+                for dimension, rows in series.items()
+            },
+        }
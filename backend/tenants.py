@@ -0,0 +1,205 @@
+"""
+Espressif Vendor Wizard - Multi-tenant Routing
+Lets one deployment onboard customers into several inSuite databases.
+
+Each tenant has its own database name and API credentials, plus its own
+HTTP transport and connection pool (see transport.py), request rate limit
+and cache of derived signing keys. The server also gives every tenant its
+own admission queue and upstream scheduler. A bulk migration for one
+tenant can therefore use up only that tenant's connections, upstream
+slots and rate budget, never another tenant's.
+
+Tenants file format (JSON):
+
+    {"tenants": [
+        {"name": "lx", "database": "shlxkjgfyxgs", "client_id": "...",
+         "secret_key_env": "LX_SECRET_KEY", "pool_size": 10,
+         "rate_limit": 5, "burst": 10, "http_version": "auto", "default": true}
+    ]}
+
+`secret_key` may be given inline or read from the environment variable
+named by `secret_key_env`. `http_version` ("auto", "2" or "1.1") selects
+the upstream transport; it defaults to the deployment-wide setting.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from transport import make_transport
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second (0 = unlimited)
+        burst: Bucket capacity
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Take one token, waiting up to `timeout` seconds (None = forever)."""
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+# =============================================================================
+# TENANT
+# =============================================================================
+
+class Tenant:
+    """Credentials, transport, rate limiter and key cache of one tenant."""
+
+    def __init__(self, name: str, database: str, client_id: str, secret_key: str,
+                 derive_key, pool_size: int = 10, rate_limit: float = 0, burst: int = 10,
+                 key_cache_size: int = 256, http_version: str = "auto"):
+        self.name = name
+        self.database = database
+        self.client_id = client_id
+        self.secret_key = secret_key
+        self.pool_size = pool_size
+        self.limiter = TokenBucket(rate_limit, burst)
+        self._derive_key = derive_key
+        self._key_cache = OrderedDict()
+        self._key_cache_size = key_cache_size
+        self._key_lock = threading.Lock()
+
+        self.transport = make_transport(http_version, pool_size)
+
+    def mac_key(self, api_route: str, timestamp: int, method: str = 'post') -> bytes:
+        """
+        Derived signing key for (route, timestamp, method), cached.
+
+        The key only depends on the timestamp second, so all calls a tenant
+        makes within the same second (e.g. batch chunks) reuse one derivation.
+        """
+        cache_key = (api_route, timestamp, method)
+        with self._key_lock:
+            key = self._key_cache.get(cache_key)
+            if key is not None:
+                self._key_cache.move_to_end(cache_key)
+                return key
+        key = self._derive_key(api_route, self.secret_key, timestamp, method)
+        with self._key_lock:
+            self._key_cache[cache_key] = key
+            while len(self._key_cache) > self._key_cache_size:
+                self._key_cache.popitem(last=False)
+        return key
+
+    def describe(self) -> dict:
+        """Non-secret summary for /api/config."""
+        return {
+            "name": self.name,
+            "database": self.database,
+            "client_id": self.client_id[:8] + "..." + self.client_id[-4:],
+            "pool_size": self.pool_size,
+            "rate_limit": self.limiter.rate,
+            "burst": self.limiter.burst,
+            "transport": self.transport.describe(),
+        }
+
+
+# =============================================================================
+# TENANT REGISTRY
+# =============================================================================
+
+class TenantRegistry:
+    """Named tenants with one default, loaded from config."""
+
+    def __init__(self, tenants: list, default: str):
+        self.tenants = {tenant.name: tenant for tenant in tenants}
+        if default not in self.tenants:
+            raise ValueError(f"default tenant '{default}' is not configured")
+        self.default = self.tenants[default]
+
+    def get(self, name: str = None):
+        """Tenant by name; the default tenant for None/empty; None if unknown."""
+        if not name:
+            return self.default
+        return self.tenants.get(name)
+
+    def describe(self) -> list:
+        return [
+            dict(tenant.describe(), default=tenant is self.default)
+            for tenant in self.tenants.values()
+        ]
+
+    @classmethod
+    def load(cls, path: str, fallback: dict, derive_key, http_version: str = "auto") -> "TenantRegistry":
+        """
+        Load tenants from a JSON file, or use `fallback` if there is none.
+
+        Args:
+            path: Tenants file (may be None or missing)
+            fallback: Tenant settings used when no file is configured
+            derive_key: Signing key derivation function (see server.py)
+            http_version: Transport for tenants that don't set their own
+        """
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                try:
+                    config = json.load(f)
+                except ValueError as e:
+                    raise ValueError(f"tenants file {path} is not valid JSON: {e}") from None
+            entries = config.get("tenants") if isinstance(config, dict) else None
+            if not isinstance(entries, list) or not entries:
+                raise ValueError(f'tenants file {path} must list at least one tenant under "tenants"')
+            print(f"[INFO] Loaded {len(entries)} tenant(s) from {path}")
+        else:
+            entries = [dict(fallback, default=True)]
+
+        tenants = []
+        for entry in entries:
+            missing = [key for key in ("name", "database", "client_id")
+                       if not isinstance(entry, dict) or not entry.get(key)]
+            if missing:
+                raise ValueError(f"tenant entry {entry!r} in {path} is missing {', '.join(missing)}")
+            secret_key = entry.get("secret_key")
+            if entry.get("secret_key_env"):
+                secret_key = os.environ.get(entry["secret_key_env"], secret_key)
+            if not secret_key:
+                raise ValueError(f"tenant '{entry['name']}' has no secret key")
+            tenants.append(Tenant(
+                name=entry["name"],
+                database=entry["database"],
+                client_id=entry["client_id"],
+                secret_key=secret_key,
+                derive_key=derive_key,
+                pool_size=int(entry.get("pool_size", 10)),
+                rate_limit=float(entry.get("rate_limit", 0)),
+                burst=int(entry.get("burst", 10)),
+                http_version=str(entry.get("http_version", http_version)),
+            ))
+        # The entry marked "default" wins; otherwise the first one
+        default = next((e["name"] for e in entries if e.get("default")), entries[0]["name"])
+        return cls(tenants, default)
@@ -0,0 +1,57 @@
+"""
+Shared fixtures for the backend tests.
+
+Run from the repository root with `python -m pytest backend/tests`. The
+server is imported with its background workers off and both upstream base
+URLs pointing at a closed local port, so no test reaches a real inSuite.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+os.environ.setdefault("VENDOR_WIZARD_DATA_DIR", tempfile.mkdtemp(prefix="vendor-wizard-tests-"))
+os.environ.setdefault("LANGCHAO_BASE_URL_INTERNAL", "http://127.0.0.1:9")
+os.environ.setdefault("LANGCHAO_BASE_URL_EXTERNAL", "http://127.0.0.1:19")
+os.environ.setdefault("UPSTREAM_HTTP_VERSION", "1.1")
+for name in ("ENDPOINT_PROBE_INTERVAL", "MIRROR_SYNC_INTERVAL", "VERIFY_INTERVAL", "COALESCE_WINDOW_MS",
+             "BATCH_RETRY_BACKOFF"):
+    os.environ.setdefault(name, "0")
+
+
+@pytest.fixture
+def server():
+    """The server module, with every upstream endpoint healthy again."""
+    import server as module
+    for endpoint in module.endpoint_pool.endpoints.values():
+        endpoint.record_success(1.0, probe=True)
+    return module
+
+
+@pytest.fixture
+def client(server):
+    server.app.testing = True
+    return server.app.test_client()
+
+
+@pytest.fixture
+def admin(server, monkeypatch):
+    """Headers for the admin endpoints, with ADMIN_SECRET configured."""
+    monkeypatch.setattr(server, "ADMIN_SECRET", "test-admin-secret")
+    return {server.ADMIN_HEADER: "test-admin-secret"}
+
+
+@pytest.fixture
+def other_tenant(server, monkeypatch):
+    """A second tenant next to the default one, selected with X-Tenant: other."""
+    from tenants import Tenant
+    tenant = Tenant("other", "otherdb", "other-client-0000", "other-secret", server.derive_mac_key,
+                    http_version="1.1")
+    monkeypatch.setitem(server.tenant_registry.tenants, tenant.name, tenant)
+    yield tenant
+    tenant.transport.close()
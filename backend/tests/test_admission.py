@@ -0,0 +1,99 @@
+"""Admission control and load shedding."""
+
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from admission import AdmissionController
+
+
+@pytest.fixture
+def busy_app():
+    """An app whose /work view blocks until `release` is set."""
+    admission = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=0.3, retry_after=(1, 30))
+    release = threading.Event()
+    app = Flask(__name__)
+
+    @app.route("/work")
+    @admission.limited
+    def work():
+        release.wait(5)
+        return jsonify({"success": True})
+
+    yield app, admission, release
+    release.set()
+
+
+def _get(app, results, key):
+    results[key] = app.test_client().get("/work")
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 2
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+
+def test_full_queue_is_shed_with_retry_after(busy_app):
+    app, admission, release = busy_app
+    results = {}
+    first = threading.Thread(target=_get, args=(app, results, "first"))
+    first.start()
+    _wait_for(lambda: admission.in_flight == 1)
+    second = threading.Thread(target=_get, args=(app, results, "second"))
+    second.start()
+    _wait_for(lambda: admission.queued == 1)
+
+    shed = app.test_client().get("/work")
+    assert shed.status_code == 503
+    assert shed.get_json()["error"] == "overloaded"
+    assert 1 <= int(shed.headers["Retry-After"]) <= 30
+    assert admission.shed["queue_full"] == 1
+
+    release.set()
+    first.join()
+    second.join()
+    assert results["first"].status_code == 200
+    assert results["second"].status_code == 200
+    assert admission.in_flight == 0 and admission.admitted == 2
+
+
+def test_queued_request_times_out(busy_app):
+    app, admission, release = busy_app
+    results = {}
+    first = threading.Thread(target=_get, args=(app, results, "first"))
+    first.start()
+    _wait_for(lambda: admission.in_flight == 1)
+
+    started = time.monotonic()
+    response = app.test_client().get("/work")
+    assert response.status_code == 503
+    assert 0.25 <= time.monotonic() - started < 2
+    assert admission.shed["queue_timeout"] == 1
+    release.set()
+    first.join()
+
+
+def test_retry_after_follows_backlog_and_service_time():
+    admission = AdmissionController(max_in_flight=2, max_queue=10, retry_after=(1, 30))
+    assert admission.retry_after() == 1
+    for _ in range(2):
+        assert admission.acquire(0) is None
+    admission.release(4.0)
+    admission.release(4.0)
+    # One more request behind an empty backlog: ceil(1 * 4 s / 2 slots)
+    assert admission.retry_after() == 2
+    admission.in_flight, admission.queued = 2, 20
+    assert admission.retry_after() == 30
+
+
+def test_server_sheds_submissions_when_saturated(server, client, monkeypatch):
+    controller = server.admission.controller(server.tenant_registry.default.name)
+    monkeypatch.setattr(controller, "in_flight", controller.max_in_flight)
+    monkeypatch.setattr(controller, "queued", controller.max_queue)
+    response = client.post("/api/create-customer", json={"name": "Busy Co"})
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,63 @@
+"""Audit log recovery and the guarded, tenant-scoped audit endpoints."""
+
+import gzip
+import json
+import sqlite3
+
+from audit import AuditLog
+
+def _append(log, tenant, vendor_id, name, success=True):
+    return log.append("create", [{"vendor_id": vendor_id, "name": name}],
+                      {"tenant": tenant, "records": [{"name": name}]}, success=success)
+
+
+def test_unindexed_tail_is_recovered_and_torn_entry_truncated(tmp_path):
+    log = AuditLog(str(tmp_path))
+    _append(log, "default", "v1", "Acme")
+    segment = log._segment_path(log._segment)
+    size = log.status()["bytes"]
+
+    # Written but never indexed (crash between write and index), then a torn write
+    lost = {"seq": 2, "ts": 1.7e9, "kind": "create", "success": True, "tenant": "default",
+            "keys": [{"vendor_id": "v2", "name": "Beta"}]}
+    member = gzip.compress((json.dumps(lost) + "\n").encode())
+    with open(segment, "ab") as f:
+        f.write(member)
+        f.write(gzip.compress(b'{"seq": 3}\n')[:10])
+
+    reopened = AuditLog(str(tmp_path))
+    assert [entry["seq"] for entry in reopened.search()] == [2, 1]
+    assert reopened.search(vendor_id="v2")[0]["keys"][0]["name"] == "Beta"
+    assert reopened.status()["bytes"] == size + len(member)
+    assert _append(reopened, "default", "v3", "Gamma") == 3
+
+
+def test_old_index_gains_tenant_column(tmp_path):
+    log = AuditLog(str(tmp_path))
+    _append(log, "default", "v1", "Acme")
+    _append(log, "other", "v2", "Beta")
+    with sqlite3.connect(str(tmp_path / "index.sqlite3")) as conn:
+        conn.execute("DROP INDEX idx_entries_tenant")
+        conn.execute("ALTER TABLE entries DROP COLUMN tenant")
+
+    reopened = AuditLog(str(tmp_path))
+    assert [entry["keys"][0]["name"] for entry in reopened.search(tenant="other")] == ["Beta"]
+    assert [entry["seq"] for entry in reopened.iter_entries(tenant="default")] == [1]
+
+
+def test_audit_endpoints_need_the_admin_secret(server, client, admin, monkeypatch):
+    for url in ("/api/audit", "/api/audit/1", "/api/audit/status", "/api/export/submissions"):
+        assert client.get(url).status_code == 403
+        assert client.get(url, headers={server.ADMIN_HEADER: "wrong"}).status_code == 403
+    monkeypatch.setattr(server, "ADMIN_SECRET", None)
+    assert client.get("/api/audit", headers=admin).status_code == 404
+
+
+def test_audit_search_is_scoped_to_the_callers_tenant(server, client, admin):
+    own = _append(server.audit_log, server.tenant_registry.default.name, "scope-v", "Scoped Own")
+    other = _append(server.audit_log, "some-other-tenant", "scope-v", "Scoped Other")
+
+    entries = client.get("/api/audit?vendor_id=scope-v", headers=admin).get_json()["entries"]
+    assert [entry["seq"] for entry in entries] == [own]
+    assert client.get(f"/api/audit/{own}", headers=admin).status_code == 200
+    assert client.get(f"/api/audit/{other}", headers=admin).status_code == 404
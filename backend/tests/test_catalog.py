@@ -0,0 +1,70 @@
+"""Product catalog: typeahead search, hot reloading and its health report."""
+
+import json
+import os
+
+import pytest
+
+from catalog import ProductCatalog
+
+CATALOG = {
+    "families": [{"family": "ESP32-S3", "groups": [
+        {"label": "SoCs", "products": ["ESP32-S3"]},
+        {"label": "Modules", "products": ["ESP32-S3-WROOM-1/1U", "ESP32-S3-MINI-1/1U"]},
+    ]}],
+    "variants": {"ESP32-S3": ["ESP32-S3-WROOM-1-N8R8"]},
+    "soc_variants": {"ESP32-S3": ["ESP32-S3 SOC"]},
+    "bvi_products": ["ESP32-S3 SOC"],
+}
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(CATALOG), encoding="utf-8")
+    return path
+
+
+def _edit(path, content):
+    path.write_text(content, encoding="utf-8")
+    # Make the change visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_search_matches_names_then_segments(catalog_file):
+    catalog = ProductCatalog(str(catalog_file))
+    assert [e["mpn"] for e in catalog.search("esp32s3wr")] == ["ESP32-S3-WROOM-1/1U", "ESP32-S3-WROOM-1-N8R8"]
+    assert [e["mpn"] for e in catalog.search("mini")] == ["ESP32-S3-MINI-1/1U"]
+    assert catalog.lookup("ESP32-S3 SOC") == {"mpn": "ESP32-S3 SOC", "family": "ESP32-S3",
+                                              "group": "SoC variants", "soc": True, "bvi": True}
+
+
+def test_edits_are_picked_up_without_a_restart(catalog_file):
+    catalog = ProductCatalog(str(catalog_file), reload_interval=0)
+    version = catalog.version
+    _edit(catalog_file, json.dumps(dict(CATALOG, bvi_products=[])))
+    assert catalog.version != version
+    assert catalog.lookup("ESP32-S3 SOC")["bvi"] is False
+
+
+def test_broken_edit_keeps_the_previous_version(catalog_file):
+    catalog = ProductCatalog(str(catalog_file), reload_interval=0)
+    version = catalog.version
+    _edit(catalog_file, "{not json")
+    status = catalog.status()
+    assert (status["version"], status["products"]) == (version, 5)
+    assert status["last_error"]
+
+
+def test_deep_health_reports_the_catalog(server, client, catalog_file, monkeypatch):
+    catalog = ProductCatalog(str(catalog_file), reload_interval=0)
+    monkeypatch.setattr(server, "product_catalog", catalog)
+    body = client.get("/api/health?deep=1").get_json()
+    assert body["catalog"]["version"] == catalog.version
+    assert body["catalog"]["last_error"] is None
+
+    _edit(catalog_file, "{not json")
+    body = client.get("/api/health?deep=1").get_json()
+    assert body["catalog"]["last_error"]
+    assert body["status"] == "degraded"
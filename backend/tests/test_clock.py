@@ -0,0 +1,67 @@
+"""Clock skew estimation from upstream Date headers."""
+
+import json
+import time
+from email.utils import formatdate
+
+from clock import ClockSkew
+
+NOW = 1767225600.0
+
+
+def _date(ts: float) -> str:
+    return formatdate(ts, usegmt=True)
+
+
+def test_samples_narrow_the_offset():
+    skew = ClockSkew()
+    # Server 120.3 s ahead; replies arrive 100 ms after sending
+    for n in range(10):
+        sent = NOW + n * 0.37
+        skew.observe(_date(sent + 0.05 + 120.3), sent, sent + 0.1)
+    assert abs(skew.offset - 120.3) < 0.2
+    assert skew.uncertainty < 0.5
+    assert skew.alerting
+    assert skew.correction == skew.offset
+
+
+def test_small_offsets_are_not_applied():
+    skew = ClockSkew(apply_threshold=1.0)
+    skew.observe(_date(NOW + 0.4), NOW, NOW + 0.1)
+    assert skew.offset is not None
+    assert skew.correction == 0.0
+    assert not skew.alerting
+
+
+def test_stepped_clock_restarts_the_window():
+    skew = ClockSkew()
+    skew.observe(_date(NOW + 60), NOW, NOW + 0.1)
+    skew.observe(_date(NOW + 10), NOW + 5, NOW + 5.1)
+    assert skew.resets == 1
+    assert skew.snapshot()["samples"] == 1
+    assert abs(skew.offset - 5.5) < 1
+
+
+def test_unusable_or_proxied_date_headers():
+    skew = ClockSkew()
+    assert not skew.observe(None, NOW, NOW)
+    assert not skew.observe("yesterday", NOW, NOW)
+    # A proxy's Date joined with the origin's: the last one is used
+    assert skew.observe(f"{_date(NOW)}, {_date(NOW + 300)}", NOW, NOW + 0.1)
+    assert abs(skew.offset - 300) < 1
+
+
+def test_signing_uses_the_corrected_clock(server, monkeypatch):
+    params = []
+
+    class Transport:
+        def post(self, url, data, headers, timeout):
+            params.append(json.loads(data)["params"])
+            raise server.TransportConnectError("refused")
+
+    skew = ClockSkew()
+    skew.observe(_date(NOW + 3600), NOW, NOW + 0.1)
+    monkeypatch.setattr(server, "clock_skew", skew)
+    monkeypatch.setattr(server.tenant_registry.default, "transport", Transport())
+    server.call_langchao(server.API_ROUTE, [], tenant=server.tenant_registry.default)
+    assert params and abs(params[0]["timestamp"] - (time.time() + skew.offset)) < 5
@@ -0,0 +1,63 @@
+"""Coalescing of concurrent single-customer submissions."""
+
+import threading
+
+import pytest
+
+from coalescer import Coalescer
+
+
+def test_concurrent_items_share_one_flush():
+    flushed = []
+
+    def flush(key, items):
+        flushed.append(list(items))
+        return [item * 10 for item in items]
+
+    coalescer = Coalescer(flush, window=0.2, max_batch=3)
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.update({n: coalescer.submit("k", n)}))
+               for n in (1, 2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {1: 10, 2: 20, 3: 30}
+    assert [sorted(items) for items in flushed] == [[1, 2, 3]]
+
+
+@pytest.fixture
+def created(server, monkeypatch):
+    """Fake create1: the records sent per call, each answered with a new number."""
+    calls = []
+
+    def create(records, **kwargs):
+        calls.append([record["name"] for record in records])
+        return {"success": True, "data": {"result": {"code": 200, "data": [
+            {"id": n, "number": f"COAL{len(calls)}{n}"} for n in range(len(records))]}}}
+
+    monkeypatch.setattr(server, "create_customer_in_langchao", create)
+    return calls
+
+
+def test_each_record_is_audited_under_its_callers_trace(server, created):
+    items = [({"name": "Coalesced Alpha Ltd"}, None, "a" * 32, True),
+             ({"name": "Coalesced Beta Ltd"}, None, "b" * 32, True)]
+    results = server.flush_coalesced((server.tenant_registry.default, None), items)
+    assert [result["success"] for result in results] == [True, True]
+    assert created == [["Coalesced Alpha Ltd", "Coalesced Beta Ltd"]]
+    entry = list(server.audit_log.scan())[-1]
+    assert entry["trace_ids"] == ["a" * 32, "b" * 32]
+
+
+def test_same_customer_twice_in_a_batch_is_created_once(server, created):
+    twin = {"name": "Coalesced Twin Trading Co", "inv_tax_number": "91440300MA5FTWIN01"}
+    items = [(dict(twin), None, "a" * 32, True), (dict(twin), None, "b" * 32, True),
+             (dict(twin, name="Coalesced Twin Override Co"), None, "c" * 32, False)]
+    results = server.flush_coalesced((server.tenant_registry.default, None), items)
+    assert results[0]["success"]
+    assert results[1]["error"] == "duplicate_customer"
+    assert server.upstream_error_status(results[1]) == 409
+    # A caller that allowed duplicates is sent regardless
+    assert results[2]["success"]
+    assert created == [["Coalesced Twin Trading Co", "Coalesced Twin Override Co"]]
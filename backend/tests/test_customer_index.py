@@ -0,0 +1,88 @@
+"""Duplicate customer index, the import endpoint and duplicate screening of uploads."""
+
+import json
+
+from customer_index import CustomerIndex, normalize_name
+
+CUSTOMER = {"create_org_number": "1000", "cust_group_number": "C01", "country_name": "中国",
+            "currency_name": "人民币", "sale_user_number": "S001"}
+
+
+def test_only_legal_forms_are_stripped():
+    assert normalize_name("Acme Technology Co., Ltd.") == "acmetechnology"
+    assert normalize_name("Acme Electronics Co.,Ltd") == "acmeelectronics"
+    assert normalize_name("Visa") == "visa"
+    assert normalize_name("Tesco") == "tesco"
+    assert normalize_name("Banco Santander S.A.") == "bancosantander"
+    assert normalize_name("乐鑫信息科技（上海）股份有限公司") == "乐鑫信息科技上海"
+    assert normalize_name("深圳市电子集团") == "深圳市电子集团"
+
+
+def test_industry_words_keep_customers_apart():
+    index = CustomerIndex()
+    index.add([{"name": "Shenzhen Xin Technology Co., Ltd.", "number": "C1"}])
+    matches = index.match({"name": "Shenzhen Xin Electronics Co., Ltd."}, threshold=0.9)
+    assert matches == []
+
+
+def test_same_number_replaces_entry(tmp_path):
+    path = str(tmp_path / "known.jsonl")
+    index = CustomerIndex(path)
+    assert index.add([{"name": "Old Name Ltd", "number": "C1"}], source="mirror") == 1
+    assert index.add([{"name": "Old Name Ltd", "number": "C1"}], source="mirror") == 0
+    assert index.add([{"name": "Brand New Trading", "number": "C1"}], source="mirror") == 1
+    assert len(index) == 1
+    assert index.match({"name": "Old Name Ltd"}) == []
+    assert index.match({"name": "Brand New Trading"})[0]["customer"]["number"] == "C1"
+
+    reloaded = CustomerIndex(path)
+    assert len(reloaded) == 1
+    assert reloaded.match({"name": "Old Name Ltd"}) == []
+
+
+def test_import_needs_the_admin_secret(server, client, admin):
+    assert client.post("/api/customers/import", json=[{"name": "Unauthorized Import Ltd"}]).status_code == 403
+    assert server.customer_index.match({"name": "Unauthorized Import Ltd"}, threshold=0.9) == []
+
+
+def test_import_rejects_records_it_cannot_index(server, client, admin):
+    response = client.post("/api/customers/import", headers=admin,
+                           json=[{"name": "Import Good Trading"}, "not a record", {"note": "no name"}])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body["imported"], body["rejected"]) == (1, 2)
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    assert client.post("/api/customers/import", headers=admin, json={"name": "x"}).status_code == 400
+
+
+def test_ndjson_import_limits_line_length(server, client, admin, monkeypatch):
+    monkeypatch.setattr(server, "NDJSON_MAX_LINE_BYTES", 64)
+    lines = [{"name": "Import Short Ltd"}, {"name": "Import Long " + "x" * 100}]
+    response = client.post("/api/customers/import", headers=admin, content_type="application/x-ndjson",
+                           data="\n".join(json.dumps(line) for line in lines))
+    body = response.get_json()
+    assert (body["imported"], body["rejected"]) == (1, 1)
+    assert body["errors"][0]["line"] == 2
+
+
+def test_ndjson_batch_holds_back_duplicates(server, client, admin, monkeypatch):
+    sent = []
+
+    def create(records, **kwargs):
+        sent.extend(record["name"] for record in records)
+        return {"success": True, "data": {"result": {"data": []}}}
+
+    monkeypatch.setattr(server, "create_customer_in_langchao", create)
+    client.post("/api/customers/import", headers=admin, json=[{"name": "Screened Known Trading"}])
+    names = ["Screened Known Trading", "Screened Fresh Trading", "Screened Fresh Trading"]
+    body = "\n".join(json.dumps(dict(CUSTOMER, name=name)) for name in names)
+
+    summary = client.post("/api/create-customer", data=body, content_type="application/x-ndjson").get_json()
+    assert sent == ["Screened Fresh Trading"]
+    assert (summary["submitted"], summary["failed"]) == (1, 2)
+    assert [(f["line"], f["kind"]) for f in summary["failures"]] == [(1, "rejected"), (3, "rejected")]
+
+    sent.clear()
+    client.post("/api/create-customer", data=body, content_type="application/x-ndjson",
+                headers={"X-Allow-Duplicate": "true"})
+    assert sent == names
@@ -0,0 +1,57 @@
+"""Client deadlines: the X-Request-Timeout header and the work it cuts short."""
+
+import time
+
+from flask import g
+
+from deadline import DEADLINE_EXCEEDED, DEADLINE_HEADER, deadline_scope, expired, remaining
+from ingest import FATAL, submit_isolating
+
+
+def test_no_deadline_outside_a_request():
+    assert remaining() is None
+    assert not expired()
+
+
+def test_spent_budget_is_refused_before_any_work(server, client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(server, "create_customer_in_langchao", lambda *args, **kwargs: calls.append(args))
+    response = client.post("/api/create-customer", json={"name": "Too Late Ltd"}, headers={DEADLINE_HEADER: "0"})
+    assert response.status_code == 504
+    assert response.get_json()["error"] == DEADLINE_EXCEEDED
+    assert calls == []
+
+
+def test_budget_is_capped_and_carried_through_the_request(server, monkeypatch):
+    monkeypatch.setattr(server.deadlines, "maximum", 2.0)
+    with server.app.test_request_context(headers={DEADLINE_HEADER: "600000"}):
+        server.app.preprocess_request()
+        assert 1.5 < remaining() <= 2.0
+        with deadline_scope(time.monotonic() - 1):
+            assert expired()
+        assert not expired()
+
+
+def test_upstream_call_gives_up_once_the_deadline_passed(server, monkeypatch):
+    monkeypatch.setattr(server, "send_to_langchao", lambda *args: {"success": True})
+    with server.app.test_request_context():
+        with deadline_scope(time.monotonic() - 1):
+            result = server.call_langchao(server.API_ROUTE, [], tenant=server.tenant_registry.default)
+    assert result["error"] == DEADLINE_EXCEEDED
+
+
+def test_bisection_stops_at_the_deadline(server):
+    calls = []
+
+    def submit(chunk):
+        calls.append(len(chunk))
+        # The call takes up the rest of the caller's budget
+        g.deadline = time.monotonic() - 1
+        return {"success": False, "message": "record rejected"}
+
+    with server.app.test_request_context():
+        with deadline_scope(time.monotonic() + 60):
+            outcomes, count = submit_isolating([{"name": f"R{n}"} for n in range(8)], submit)
+    assert calls == [8] and count == 1
+    assert {outcome["kind"] for outcome in outcomes} == {FATAL}
+    assert outcomes[0]["error"] == "Client deadline exceeded before the next upstream call"
@@ -0,0 +1,52 @@
+"""Committing wizard drafts."""
+
+import uuid
+
+import pytest
+
+RECORD = {"name": "Draft Test Co., Ltd.", "create_org_number": "1000", "cust_group_number": "C01",
+          "country_name": "中国", "currency_name": "人民币", "sale_user_number": "S001"}
+
+
+@pytest.fixture
+def draft(client):
+    vendor_id = f"test-{uuid.uuid4().hex[:8]}"
+    response = client.patch(f"/api/drafts/{vendor_id}", json={"record": RECORD})
+    assert response.status_code == 200
+    return vendor_id
+
+
+def test_failed_submission_reopens_draft(server, client, draft, monkeypatch):
+    monkeypatch.setattr(server, "submit_customer",
+                        lambda record, use_internal=None: {"success": False, "error": "timeout"})
+    monkeypatch.setattr(server, "find_duplicates", lambda records: [])
+    response = client.post(f"/api/drafts/{draft}/commit")
+    assert response.status_code >= 400
+    assert server.draft_store.get(draft)["status"] == "draft"
+
+
+def test_unexpected_error_reopens_draft(server, client, draft, monkeypatch):
+    def explode(record, use_internal=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server, "submit_customer", explode)
+    monkeypatch.setattr(server, "find_duplicates", lambda records: [])
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/drafts/{draft}/commit")
+    stored = server.draft_store.get(draft)
+    assert stored["status"] == "draft"
+    assert stored["result"]["error"] == "server_error"
+
+
+def test_committed_draft_is_not_resubmitted(server, client, draft, monkeypatch):
+    calls = []
+
+    def submit(record, use_internal=None):
+        calls.append(record)
+        return {"success": True, "data": {"result": {"data": [{"id": 1}]}}}
+
+    monkeypatch.setattr(server, "submit_customer", submit)
+    monkeypatch.setattr(server, "find_duplicates", lambda records: [])
+    assert client.post(f"/api/drafts/{draft}/commit").status_code == 200
+    assert client.post(f"/api/drafts/{draft}/commit").get_json()["message"] == "Customer already created"
+    assert len(calls) == 1
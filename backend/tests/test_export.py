@@ -0,0 +1,83 @@
+"""Streaming submission exports and the export endpoint."""
+
+import csv
+import gzip
+import io
+
+import pytest
+
+from export import ENTRY_COLUMNS, csv_chunks, gzip_chunks, iter_rows, parquet_chunks
+
+
+def _entry(seq, names, vendor_ids, success=True):
+    return {
+        "seq": seq, "ts": 1767225600 + seq, "kind": "create", "tenant": "default", "success": success,
+        "keys": [{"vendor_id": v, "name": n} for n, v in zip(names, vendor_ids)],
+        "records": [{"name": n, "inv_tax_number": f"TAX{i}"} for i, n in enumerate(names)],
+        "metadata": [{"vendor_id": v} for v in vendor_ids],
+        "response": {"success": success, "data": {"result": {"data": [
+            {"id": 100 + i, "number": f"CUST{100 + i}"} for i in range(len(names))]}}},
+    }
+
+
+def _parse(data: bytes) -> list:
+    text = data.decode("utf-8")
+    assert text.startswith("﻿")
+    return list(csv.reader(io.StringIO(text[1:])))
+
+
+def test_rows_are_filtered_per_record():
+    entries = [_entry(1, ["Acme", "Beta"], ["v1", "v2"]), _entry(2, ["Acme Two"], ["v1"])]
+    rows = list(iter_rows(entries, ["name"], vendor_id="v1"))
+    assert [row[-1] for row in rows] == ["Acme", "Acme Two"]
+    assert rows[0][ENTRY_COLUMNS.index("customer_number")] == "CUST100"
+    assert [row[-1] for row in iter_rows(entries, ["name"], name="acme t")] == ["Acme Two"]
+
+
+def test_coalesced_records_keep_their_own_trace():
+    entry = dict(_entry(1, ["Acme", "Beta"], ["v1", "v2"]), trace_id="t1", trace_ids=["t1", "t2"])
+    column = ENTRY_COLUMNS.index("trace_id")
+    assert [row[column] for row in iter_rows([entry], [])] == ["t1", "t2"]
+
+
+def test_csv_blocks_reassemble_with_one_bom():
+    rows = [[str(n), "深圳市乐鑫, \"quoted\""] for n in range(3000)]
+    blocks = list(csv_chunks(iter(rows), ["n", "name"], block_bytes=4096))
+    assert len(blocks) > 10
+    # block_bytes counts characters; CJK text takes up to 3 bytes each
+    assert all(len(block) < 3 * (4096 + 100) for block in blocks)
+    parsed = _parse(b"".join(blocks))
+    assert parsed[0] == ["n", "name"]
+    assert parsed[1:] == rows
+
+
+def test_gzip_stream_round_trips():
+    blocks = csv_chunks(iter([["1", "a"], ["2", "b"]]), ["n", "v"])
+    assert _parse(gzip.decompress(b"".join(gzip_chunks(blocks)))) == [["n", "v"], ["1", "a"], ["2", "b"]]
+
+
+def test_parquet_row_groups():
+    pq = pytest.importorskip("pyarrow.parquet")
+    rows = [[str(n), f"name {n}"] for n in range(250)]
+    data = b"".join(parquet_chunks(iter(rows), ["n", "name"], row_group_size=100))
+    table = pq.ParquetFile(io.BytesIO(data))
+    assert table.metadata.num_row_groups == 3
+    assert table.read().column("name").to_pylist() == [row[1] for row in rows]
+
+
+def test_export_is_scoped_to_the_callers_tenant(server, client, admin):
+    for tenant, name in ((server.tenant_registry.default.name, "Export Own"), ("elsewhere", "Export Other")):
+        server.audit_log.append("create", [{"vendor_id": "export-v", "name": name}],
+                                {"tenant": tenant, "records": [{"name": name}]}, success=True)
+    response = client.get("/api/export/submissions?vendor_id=export-v&fields=name",
+                          headers=admin)
+    assert response.status_code == 200
+    assert [row[-1] for row in _parse(response.get_data())[1:]] == ["Export Own"]
+
+
+def test_export_needs_the_admin_secret_not_the_profiling_one(server, client, admin, monkeypatch):
+    monkeypatch.setattr(server.profiler, "secret", "profile-secret")
+    url = "/api/export/submissions"
+    assert client.get(url, headers={"X-Profile-Secret": "profile-secret"}).status_code == 403
+    assert client.get(url + "?profile=profile-secret").status_code == 403
+    assert client.get(url, headers=admin).status_code == 200
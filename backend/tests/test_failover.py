@@ -0,0 +1,127 @@
+"""Upstream failover: which failures may be retried on another endpoint."""
+
+import socket
+import threading
+
+import pytest
+
+from endpoints import Endpoint
+from transport import Http1Transport, TransportConnectError, TransportConnectionLost
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def hangup_server():
+    """A server that reads a whole POST and then closes without answering."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    received = []
+
+    def serve():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            with conn:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    data += conn.recv(65536)
+                head, _, body = data.partition(b"\r\n\r\n")
+                length = int(next(line.split(b":")[1] for line in head.split(b"\r\n")
+                                  if line.lower().startswith(b"content-length")))
+                while len(body) < length:
+                    body += conn.recv(65536)
+                received.append(body)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}", received
+    listener.close()
+
+
+def test_refused_connection_is_a_connect_error():
+    transport = Http1Transport()
+    with pytest.raises(TransportConnectError):
+        transport.post(f"http://127.0.0.1:{_closed_port()}/x", b"{}", {}, (1, 1))
+
+
+def test_connection_closed_after_request_is_ambiguous(hangup_server):
+    url, received = hangup_server
+    transport = Http1Transport()
+    with pytest.raises(TransportConnectionLost):
+        transport.post(url + "/x", b'{"a": 1}', {"Content-Type": "application/json"}, (1, 2))
+    assert received == [b'{"a": 1}']
+
+
+class FailingTransport:
+    """Records the URLs it was asked to call and fails every call."""
+
+    def __init__(self, error):
+        self.error = error
+        self.urls = []
+
+    def post(self, url, data, headers, timeout):
+        self.urls.append(url)
+        raise self.error("boom")
+
+
+@pytest.fixture
+def failing(server, monkeypatch):
+    def install(error):
+        transport = FailingTransport(error)
+        monkeypatch.setattr(server.tenant_registry.default, "transport", transport)
+        return transport
+    return install
+
+
+def test_lost_create_is_not_failed_over(server, failing):
+    transport = failing(TransportConnectionLost)
+    result = server.call_langchao(server.API_ROUTE, [{"name": "X"}])
+    assert result["error"] == "connection_lost"
+    assert len(transport.urls) == 1
+
+
+def test_lost_idempotent_call_fails_over(server, failing):
+    transport = failing(TransportConnectionLost)
+    result = server.call_langchao(server.READ_API_ROUTE, [{"limit": 1}], idempotent=True)
+    assert result["success"] is False
+    assert len(transport.urls) == 2
+
+
+def test_connect_error_fails_over(server, failing):
+    transport = failing(TransportConnectError)
+    result = server.call_langchao(server.API_ROUTE, [{"name": "X"}])
+    assert result["error"] == "connection_failed"
+    assert len(transport.urls) == 2
+
+
+def test_open_circuit_is_skipped(server, failing):
+    transport = failing(TransportConnectError)
+    for _ in range(2):
+        server.call_langchao(server.API_ROUTE, [{"name": "X"}])
+    assert not any(endpoint.healthy for endpoint in server.endpoint_pool.endpoints.values())
+    result = server.call_langchao(server.API_ROUTE, [{"name": "X"}])
+    assert result["error"] == "circuit_open"
+    assert len(transport.urls) == 4
+
+
+def test_half_open_admits_one_trial():
+    endpoint = Endpoint("internal", "http://127.0.0.1:9", alpha=0.3, failure_threshold=1, reset_timeout=0.05)
+    endpoint.record_failure("connection_failed")
+    assert endpoint.circuit == "open" and not endpoint.allows_call()
+    endpoint.opened_at -= 1
+    assert endpoint.circuit == "half_open"
+    assert endpoint.allows_call()
+    assert not endpoint.allows_call()
+    endpoint.record_failure("connection_failed")
+    assert endpoint.circuit == "open"
+    endpoint.opened_at -= 1
+    assert endpoint.allows_call()
+    endpoint.record_success(5.0)
+    assert endpoint.circuit == "closed" and endpoint.allows_call()
@@ -0,0 +1,68 @@
+"""Endpoint health bookkeeping and the cached deep health check."""
+
+import socket
+
+import requests
+
+from endpoints import Endpoint, EndpointPool
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_circuit_opens_then_admits_one_trial(monkeypatch):
+    endpoint = Endpoint("internal", "http://127.0.0.1:9", alpha=0.3, failure_threshold=2, reset_timeout=30)
+    endpoint.record_failure("connection_failed")
+    assert endpoint.circuit == "closed"
+    endpoint.record_failure("connection_failed")
+    assert endpoint.circuit == "open" and not endpoint.allows_call()
+
+    monkeypatch.setattr(endpoint, "opened_at", endpoint.opened_at - 31)
+    assert endpoint.circuit == "half_open"
+    assert endpoint.allows_call()
+    assert not endpoint.allows_call()   # one trial at a time
+    endpoint.record_success(12.0)
+    assert endpoint.circuit == "closed"
+
+
+def test_ranking_prefers_healthy_then_fast():
+    pool = EndpointPool({"internal": "http://a", "external": "http://b"})
+    assert [ep.name for ep in pool.ranked()] == ["internal", "external"]
+    pool.get("internal").record_success(80.0)
+    pool.get("external").record_success(20.0)
+    assert pool.best().name == "external"
+    assert pool.ranked(prefer="internal")[0].name == "internal"
+    for _ in range(2):
+        pool.get("external").record_failure("timeout")
+    assert pool.best().name == "internal"
+
+
+def test_probe_failures_mark_upstream_down():
+    pool = EndpointPool({"internal": f"http://127.0.0.1:{_closed_port()}"}, probe_timeout=1)
+    pool.probe_all()
+    pool.probe_all()
+    report = pool.health_report()
+    assert report["status"] == "down"
+    assert report["endpoints"][0]["last_probe"]["reachable"] is False
+
+
+def test_deep_health_uses_cached_results_only(server, client, monkeypatch):
+    def no_upstream(*args, **kwargs):
+        raise AssertionError("health check contacted the upstream")
+
+    monkeypatch.setattr(requests, "get", no_upstream)
+    body = client.get("/api/health?deep=1").get_json()
+    assert body["upstream"]["status"] == "ok"
+    assert "clock_skew" in body
+
+    for endpoint in server.endpoint_pool.endpoints.values():
+        for _ in range(server.ENDPOINT_FAILURE_THRESHOLD):
+            endpoint.record_failure("connection_failed")
+    response = client.get("/api/health?deep=1")
+    assert response.status_code == 503
+    assert response.get_json()["status"] == "degraded"
+    # The shallow check stays cheap and up for the load balancer
+    assert client.get("/api/health").status_code == 200
@@ -0,0 +1,104 @@
+"""Chunked batch ingestion."""
+
+import pytest
+
+from ingest import FATAL, PERMANENT, REJECTED, TRANSIENT, classify_failure, ingest_records, submit_isolating
+
+CUSTOMER = {"create_org_number": "1000", "cust_group_number": "C01", "country_name": "中国",
+            "currency_name": "人民币", "sale_user_number": "S001"}
+
+
+def test_ingest_summary_keeps_only_failed_chunks():
+    def submit(records):
+        if any(record["name"] == "Customer 120" for record in records):
+            return {"success": False, "error": "timeout"}
+        return {"success": True}
+
+    parsed = ((n, dict(CUSTOMER, name=f"Customer {n}"), None) for n in range(1, 1001))
+    summary = ingest_records(parsed, submit, chunk_size=50, isolate_failures=False)
+    assert summary["chunk_count"] == 20
+    assert summary["calls"] == 20
+    assert summary["failed"] == 50
+    assert [chunk["chunk"] for chunk in summary["chunks"]] == [2]
+
+
+def test_screened_records_fail_without_being_sent():
+    sent = []
+
+    def submit(records):
+        sent.extend(record["name"] for record in records)
+        return {"success": True}
+
+    def screen(records):
+        return {position: "duplicate" for position, record in enumerate(records) if record["name"].endswith("3")}
+
+    parsed = ((n, dict(CUSTOMER, name=f"Customer {n}"), None) for n in range(1, 6))
+    summary = ingest_records(parsed, submit, chunk_size=2, screen=screen)
+    assert sent == ["Customer 1", "Customer 2", "Customer 4", "Customer 5"]
+    assert (summary["submitted"], summary["failed"]) == (4, 1)
+    assert summary["failures"][0]["line"] == 3
+    assert summary["failures"][0]["kind"] == REJECTED
+
+
+def _rejection(message, code=200, status=200):
+    return {"success": False, "status_code": status,
+            "data": {"error": {"code": code, "message": "Odoo Server Error",
+                               "data": {"name": "odoo.exceptions.ValidationError", "message": message}}}}
+
+
+@pytest.mark.parametrize("result,kind", [
+    (_rejection("record 3: name is required"), PERMANENT),
+    ({"success": False, "status_code": 413}, PERMANENT),
+    ({"success": False, "status_code": 400, "data": {}}, FATAL),
+    ({"success": False, "status_code": 404, "data": {}}, FATAL),
+    ({"success": False, "status_code": 200, "data": {"error": {"code": 400, "message": "invalid request"}}}, FATAL),
+    ({"success": False, "status_code": 200, "data": {"error": {"code": -32601, "message": "Method not found"}}},
+     FATAL),
+    ({"success": False, "status_code": 200, "data": {"error": {"code": -32602, "message": "Invalid params"}}},
+     PERMANENT),
+    ({"success": False, "status_code": 429}, TRANSIENT),
+    ({"success": False, "error": "connection_failed"}, TRANSIENT),
+])
+def test_failure_classes(result, kind):
+    assert classify_failure(result) == kind
+
+
+def test_bisection_isolates_the_bad_records():
+    records = [{"name": f"Customer {n}"} for n in range(16)]
+    bad = {"Customer 5", "Customer 11"}
+
+    def submit(chunk):
+        rejected = [record["name"] for record in chunk if record["name"] in bad]
+        return _rejection(f"{rejected[0]} is invalid") if rejected else {"success": True}
+
+    outcomes, calls = submit_isolating(records, submit)
+    assert [n for n, outcome in enumerate(outcomes) if not outcome["success"]] == [5, 11]
+    assert outcomes[5]["error"] == "Customer 5 is invalid"
+    assert calls < 2 * len(records) - 1
+
+
+def test_same_rejection_for_both_halves_stops_the_bisection():
+    records = [{"name": f"Customer {n}"} for n in range(64)]
+    outcomes, calls = submit_isolating(records, lambda chunk: _rejection("customer group C01 is archived"))
+    assert calls == 3
+    assert all(outcome["error"] == "customer group C01 is archived" for outcome in outcomes)
+
+
+def test_chunk_fatal_error_is_not_bisected():
+    outcomes, calls = submit_isolating([{"name": "A"}, {"name": "B"}],
+                                       lambda chunk: {"success": False, "status_code": 400, "data": {}})
+    assert calls == 1
+    assert {outcome["kind"] for outcome in outcomes} == {FATAL}
+
+
+def test_unsent_failures_are_retried():
+    results = [{"success": False, "error": "connection_failed"}, {"success": False, "status_code": 503},
+               {"success": True}]
+    outcomes, calls = submit_isolating([{"name": "A"}], lambda chunk: results.pop(0), retry_backoff=0)
+    assert calls == 3 and outcomes[0]["success"]
+
+
+def test_possibly_applied_failures_are_not_retried():
+    outcomes, calls = submit_isolating([{"name": "A"}], lambda chunk: {"success": False, "error": "timeout"},
+                                       retry_backoff=0)
+    assert calls == 1 and outcomes[0]["kind"] == TRANSIENT
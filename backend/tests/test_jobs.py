@@ -0,0 +1,34 @@
+"""Bounded batch job event log."""
+
+from jobs import BatchJob, stream_events
+
+
+def test_reconnect_within_window_resumes():
+    job = BatchJob("j", max_events=5)
+    for n in range(4):
+        job.emit("record", {"n": n})
+    assert [event["id"] for event in job.events_after(2, timeout=0)] == [3, 4]
+
+
+def test_too_old_last_event_id_gets_snapshot():
+    job = BatchJob("j", max_events=5)
+    for n in range(20):
+        job.emit("record", {"n": n})
+    events = job.events_after(3, timeout=0)
+    assert len(job.events) == 5
+    assert events[0]["event"] == "snapshot"
+    assert events[0]["id"] == 15
+    assert events[0]["data"]["counts"] == {"record": 20}
+    assert events[0]["data"]["dropped"] == 12
+    assert [event["id"] for event in events[1:]] == [16, 17, 18, 19, 20]
+
+
+def test_stream_ends_after_done():
+    job = BatchJob("j", max_events=3)
+    for n in range(10):
+        job.emit("record", {"n": n})
+    job.finish("completed", {"success": True})
+    stream = "".join(stream_events(job, 0, keepalive=0.01))
+    assert "event: snapshot" in stream
+    assert stream.rstrip().endswith('"summary": {"success": true}}')
+    assert stream.count("event: record") == 2
@@ -0,0 +1,65 @@
+"""The local customer mirror and its admin endpoints."""
+
+import time
+
+import pytest
+
+from mirror import CustomerMirror
+
+
+def _pages(*pages):
+    """fetch_page returning the given pages in order."""
+    pages = list(pages)
+    return lambda param: pages.pop(0)
+
+
+def test_sync_resumes_from_the_cursor(tmp_path):
+    mirror = CustomerMirror(str(tmp_path / "mirror.sqlite3"), fetch_page=_pages(
+        {"records": [{"id": 1, "number": "C1", "name": "Acme", "write_date": "2026-01-01 00:00:00"}],
+         "has_more": True},
+        {"records": [{"id": 2, "number": "C2", "name": "Beta", "write_date": "2026-01-02 00:00:00"}],
+         "has_more": False},
+    ))
+    result = mirror.sync()
+    assert (result["pages"], result["fetched"], result["inserted"]) == (2, 2, 2)
+    assert result["cursor"] == {"modified_since": "2026-01-02 00:00:00", "after_id": 2}
+    assert mirror.search(name="ac")[0]["number"] == "C1"
+
+    reopened = CustomerMirror(str(tmp_path / "mirror.sqlite3"), fetch_page=None)
+    assert reopened.cursor() == result["cursor"]
+
+
+def test_rows_older_than_max_age_are_not_returned(tmp_path):
+    mirror = CustomerMirror(str(tmp_path / "mirror.sqlite3"), fetch_page=None)
+    mirror.upsert([{"id": 1, "number": "C1", "name": "Acme"}])
+    assert mirror.get_by_number("C1", max_age=60)["name"] == "Acme"
+    with mirror._conn:
+        mirror._conn.execute("UPDATE customers SET mirrored_at = mirrored_at - 120")
+    assert mirror.get_by_number("C1", max_age=60) is None
+    assert mirror.get_by_number("C1")["name"] == "Acme"
+    mirror.last_sync = time.time()
+    assert mirror.get_by_number("C1", max_age=60)["name"] == "Acme"
+
+
+ROUTES = [("get", "/api/mirror/customers"), ("get", "/api/mirror/customers/C1"),
+          ("post", "/api/mirror/sync"), ("get", "/api/mirror/status")]
+
+
+@pytest.mark.parametrize("method,url", ROUTES)
+def test_mirror_endpoints_need_the_admin_secret(server, client, admin, monkeypatch, method, url):
+    monkeypatch.setattr(server.customer_mirror, "sync", lambda **kwargs: pytest.fail("sync started"))
+    assert getattr(client, method)(url).status_code == 403
+
+
+@pytest.mark.parametrize("method,url", ROUTES)
+def test_mirror_endpoints_serve_only_the_default_tenant(server, client, admin, other_tenant,
+                                                        monkeypatch, method, url):
+    monkeypatch.setattr(server.customer_mirror, "sync", lambda **kwargs: pytest.fail("sync started"))
+    response = getattr(client, method)(url, headers=dict(admin, **{"X-Tenant": other_tenant.name}))
+    assert response.status_code == 404
+
+
+def test_mirror_search_for_the_default_tenant(server, client, admin):
+    server.customer_mirror.upsert([{"id": 9001, "number": "MIRROR9001", "name": "Mirrored Search Co"}])
+    response = client.get("/api/mirror/customers?name=mirrored search", headers=admin)
+    assert [c["number"] for c in response.get_json()["customers"]] == ["MIRROR9001"]
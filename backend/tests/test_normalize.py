@@ -0,0 +1,91 @@
+"""Columnar field normalization and how its warnings reach imports."""
+
+import json
+
+from ingest import ingest_records
+from normalize import normalize_phones, normalize_records, normalize_tax_numbers
+
+CUSTOMER = {"create_org_number": "1000", "cust_group_number": "C01", "country_name": "中国",
+            "currency_name": "人民币", "sale_user_number": "S001"}
+
+
+def test_china_phones_get_country_code():
+    values = ["021-6215 8800 转 801", "138 1234 5678", "8613912345678", "+1 415 555 0100"]
+    normalized, invalid = normalize_phones(values, ["中国", "China", "CN", "中国"])
+    assert normalized == ["+862162158800", "+8613812345678", "+8613912345678", "+14155550100"]
+    assert invalid == []
+
+
+def test_foreign_phones_keep_their_digits():
+    normalized, invalid = normalize_phones(["1-310-555-1234", "13812345678"], ["United States", None])
+    assert normalized == ["13105551234", "13812345678"]
+    assert invalid == [0, 1]
+
+
+def test_legacy_tax_ids_may_contain_letters():
+    values = ["31010413220771X", "3101041322077-1A", "44030019800101123X01", "12345"]
+    normalized, invalid = normalize_tax_numbers(values, ["中国"] * 4)
+    assert normalized[1] == "31010413220771A"
+    assert invalid == [3]
+
+
+def test_records_use_their_country():
+    records = [
+        {"country_name": "美国", "inv_telephone": "1-310-555-1234"},
+        {"country_name": "中国", "inv_telephone": "１３８１２３４５６７８"},
+        {"country_name": "中国", "inv_telephone": "n/a"},
+    ]
+    report = normalize_records(records)
+    assert records[0]["inv_telephone"] == "1-310-555-1234"
+    assert records[1]["inv_telephone"] == "+8613812345678"
+    assert [(entry["row"], entry["value"]) for entry in report] == [(0, "1-310-555-1234"), (2, "n/a")]
+
+
+def test_emails_and_embedded_newlines():
+    records = [{"X_char_5smvg51jqa": "ＳＡＬＥＳ＠ACME.COM, ops@acme.com"},
+               {"X_char_5smvg51jqa": "a@b.com\nc@d.com"}]
+    assert normalize_records(records) == []
+    assert records[0]["X_char_5smvg51jqa"] == "sales@acme.com;ops@acme.com"
+    assert records[1]["X_char_5smvg51jqa"] == "a@b.com;c@d.com"
+
+
+def test_unnormalizable_values_are_submitted_with_a_warning():
+    lines = [(1, dict(CUSTOMER, name="Overseas Buyer", country_name="美国", inv_telephone="1-310-555-1234"), None),
+             (2, dict(CUSTOMER, name="Local Buyer", inv_telephone="138 1234 5678"), None)]
+    submitted, events = [], []
+    summary = ingest_records(iter(lines), lambda records: submitted.extend(records) or {"success": True},
+                             on_event=lambda kind, data: events.append((kind, data)))
+    assert (summary["submitted"], summary["invalid"], summary["warned"]) == (2, 0, 1)
+    assert [record["inv_telephone"] for record in submitted] == ["1-310-555-1234", "+8613812345678"]
+    assert summary["warnings"][0]["line"] == 1
+    assert [data["warnings"] != [] for kind, data in events if kind == "record"] == [True, False]
+
+
+def test_validation_reports_warnings_without_invalidating(client):
+    body = "\n".join(json.dumps(dict(CUSTOMER, name=name, inv_telephone=phone))
+                     for name, phone in (("Phone Less", "n/a"), ("Phone Ok", "13812345678")))
+    summary = client.post("/api/import/validate", data=body).get_json()
+    assert (summary["valid"], summary["invalid"], summary["warned"], summary["success"]) == (2, 0, 1, True)
+    report = client.post("/api/import/validate?format=csv", data=body).get_data(as_text=True)
+    assert report.splitlines()[1].startswith("1,warning,inv_telephone")
+
+
+def test_ingest_reads_at_most_one_block_ahead():
+    read = []
+
+    def parsed():
+        for line_no in range(1, 501):
+            read.append(line_no)
+            yield line_no, dict(CUSTOMER, name=f"Customer {line_no}"), None
+
+    seen_when_submitted = []
+
+    def submit(records):
+        seen_when_submitted.append(len(read))
+        return {"success": True}
+
+    summary = ingest_records(parsed(), submit, chunk_size=50, normalize_block=50)
+    assert summary["submitted"] == 500
+    assert seen_when_submitted[0] <= 50
+    assert all(seen - submitted * 50 <= 50
+               for submitted, seen in enumerate(seen_when_submitted, start=1))
@@ -0,0 +1,47 @@
+"""Request profiling and the profile admin endpoints."""
+
+import cProfile
+
+import pytest
+
+from profiling import Profiler
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def profile(tmp_path):
+    path = tmp_path / "20260101-000000-test.prof"
+    cProfile.run("sorted(range(1000))", str(path))
+    return path
+
+
+def test_text_report_sorts(profile):
+    assert "Ordered by: internal time" in Profiler.text_report(str(profile), sort="time")
+
+
+def test_text_report_rejects_unknown_sort(profile):
+    with pytest.raises(ValueError):
+        Profiler.text_report(str(profile), sort="bogus")
+
+
+def test_bogus_sort_is_a_bad_request(server, client, admin, profile, monkeypatch):
+    monkeypatch.setattr(server.profiler, "directory", str(profile.parent))
+    url = f"/api/admin/profiles/{profile.name}?format=text&sort="
+    assert client.get(url + "bogus", headers=admin).status_code == 400
+    assert client.get(url + "calls", headers=admin).status_code == 200
+
+
+def test_profiling_secret_is_not_an_admin_secret(server, client, admin, monkeypatch):
+    monkeypatch.setattr(server.profiler, "secret", SECRET)
+    assert client.get("/api/admin/profiles", headers={"X-Profile-Secret": SECRET}).status_code == 403
+    assert client.get(f"/api/admin/profiles?profile={SECRET}").status_code == 403
+    assert client.get("/api/admin/profiles", headers=admin).status_code == 200
+
+
+def test_profiling_secret_is_only_read_from_the_header(server, monkeypatch):
+    monkeypatch.setattr(server.profiler, "secret", SECRET)
+    with server.app.test_request_context(f"/api/test?profile={SECRET}"):
+        assert not server.profiler.authorized()
+    with server.app.test_request_context("/api/test", headers={"X-Profile-Secret": SECRET}):
+        assert server.profiler.authorized()
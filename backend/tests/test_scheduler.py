@@ -0,0 +1,117 @@
+"""Weighted fair queuing of upstream calls."""
+
+import threading
+import time
+
+from scheduler import BULK, INTERACTIVE, SYNC, UpstreamScheduler
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 2
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.002)
+    assert condition()
+
+
+def _queue_waiters(scheduler, classes, order):
+    """Start one waiter per class in `classes`, each queued before the next starts."""
+    threads = []
+    for priority in classes:
+        def wait(priority=priority):
+            ticket = scheduler.acquire(priority, timeout=5)
+            order.append(priority)
+            scheduler.release(ticket)
+
+        before = scheduler.queued()[priority]
+        thread = threading.Thread(target=wait)
+        thread.start()
+        _wait_for(lambda: scheduler.queued()[priority] == before + 1)
+        threads.append(thread)
+    return threads
+
+
+def test_slots_are_shared_by_weight():
+    scheduler = UpstreamScheduler(capacity=1, weights={INTERACTIVE: 4, BULK: 1})
+    holder = scheduler.acquire(BULK)
+    order = []
+    # The bulk backlog queues first; interactive calls still overtake it
+    threads = _queue_waiters(scheduler, [BULK] * 8 + [INTERACTIVE] * 8, order)
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join()
+
+    assert order[:5].count(INTERACTIVE) == 4
+    assert order[:10].count(INTERACTIVE) == 8
+    assert order[10:] == [BULK] * 6
+
+
+def test_idle_class_does_not_bank_credit():
+    scheduler = UpstreamScheduler(capacity=1, weights={INTERACTIVE: 4, BULK: 1})
+    for _ in range(20):
+        scheduler.release(scheduler.acquire(INTERACTIVE))
+    holder = scheduler.acquire(BULK)
+    order = []
+    threads = _queue_waiters(scheduler, [INTERACTIVE] * 4 + [BULK] * 4, order)
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join()
+    # Twenty earlier interactive calls don't push interactive behind bulk now
+    assert order[:4].count(INTERACTIVE) >= 3
+
+
+def test_reserved_slots_stay_free_for_their_class():
+    scheduler = UpstreamScheduler(capacity=2, weights={INTERACTIVE: 8, BULK: 2, SYNC: 1},
+                                  reserved={INTERACTIVE: 1})
+    bulk = scheduler.acquire(BULK, timeout=0)
+    assert bulk is not None
+    assert scheduler.acquire(SYNC, timeout=0.05) is None
+    interactive = scheduler.acquire(INTERACTIVE, timeout=0)
+    assert interactive is not None
+    assert scheduler.snapshot()["classes"][SYNC]["timed_out"] == 1
+    scheduler.release(bulk)
+    scheduler.release(interactive)
+    assert scheduler.queued() == {INTERACTIVE: 0, BULK: 0, SYNC: 0}
+
+
+def test_unknown_class_uses_lowest_weight():
+    scheduler = UpstreamScheduler(capacity=1)
+    scheduler.release(scheduler.acquire("reporting"))
+    assert scheduler.granted[SYNC] == 1
+
+
+def test_large_calls_cost_more():
+    scheduler = UpstreamScheduler(capacity=1, weights={INTERACTIVE: 1, BULK: 1})
+    holder = scheduler.acquire(BULK)
+    order = []
+
+    def wait(priority, cost):
+        ticket = scheduler.acquire(priority, timeout=5, cost=cost)
+        order.append(priority)
+        scheduler.release(ticket)
+
+    threads = [threading.Thread(target=wait, args=(BULK, 50))]
+    threads[0].start()
+    _wait_for(lambda: scheduler.queued()[BULK] == 1)
+    threads += [threading.Thread(target=wait, args=(INTERACTIVE, 1)) for _ in range(3)]
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for(lambda: scheduler.queued()[INTERACTIVE] == 3)
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join()
+    # Equal weights, but one 50-record chunk weighs more than three single records
+    assert order == [INTERACTIVE] * 3 + [BULK]
+
+
+def test_abandoned_ticket_gives_back_its_share():
+    scheduler = UpstreamScheduler(capacity=1, weights={INTERACTIVE: 1, BULK: 1})
+    holder = scheduler.acquire(INTERACTIVE)
+    assert scheduler.acquire(BULK, timeout=0.01, cost=50) is None
+    assert scheduler.timed_out[BULK] == 1
+    # The next bulk call is stamped as if the abandoned one never queued
+    order = []
+    threads = _queue_waiters(scheduler, [BULK, INTERACTIVE, INTERACTIVE], order)
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join()
+    assert order[:2].count(BULK) == 1
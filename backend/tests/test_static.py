@@ -0,0 +1,63 @@
+"""Serving the built frontend with precompressed assets."""
+
+import gzip
+
+import pytest
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+from static import IMMUTABLE_CACHE, REVALIDATE_CACHE, StaticSite
+
+SCRIPT = "export const steps = ['vendor', 'customer', 'review'];\n" * 100
+
+
+@pytest.fixture
+def site(tmp_path):
+    dist = tmp_path / "dist"
+    (dist / "assets").mkdir(parents=True)
+    (dist / "index.html").write_text("<!doctype html><div id=root></div>", encoding="utf-8")
+    (dist / "assets" / "index-A9aKI0Ez.js").write_text(SCRIPT, encoding="utf-8")
+    (dist / "logo.svg").write_text("<svg/>", encoding="utf-8")
+    site = StaticSite(str(dist), str(tmp_path / "cache"))
+    app = Flask(__name__)
+    app.add_url_rule("/", "index", lambda: site.serve(""))
+    app.add_url_rule("/<path:path>", "files", lambda path: site.serve(path))
+    return site, app.test_client()
+
+
+def test_precompress_builds_variants_for_large_text_files(site):
+    site, _ = site
+    counts = site.precompress()
+    assert counts["files"] == 3
+    assert counts["gzip"] == 1
+
+
+def test_hashed_asset_is_gzipped_and_immutable(site):
+    _, client = site
+    response = client.get("/assets/index-A9aKI0Ez.js", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()).decode("utf-8") == SCRIPT
+
+    plain = client.get("/assets/index-A9aKI0Ez.js", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_data(as_text=True) == SCRIPT
+    assert plain.headers["ETag"] != response.headers["ETag"]
+
+
+def test_app_routes_get_the_shell_and_revalidate(site):
+    _, client = site
+    response = client.get("/wizard/step-2")
+    assert b"id=root" in response.get_data()
+    assert response.headers["Cache-Control"] == REVALIDATE_CACHE
+    again = client.get("/wizard/step-2", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_missing_files_and_traversal_are_not_found(site):
+    site, client = site
+    assert client.get("/assets/missing-A9aKI0Ez.js").status_code == 404
+    with Flask(__name__).test_request_context():
+        with pytest.raises(NotFound):
+            site.serve("../secrets.txt")
@@ -0,0 +1,69 @@
+"""Per-day submission rollups and the /api/stats endpoint."""
+
+import pytest
+
+import stats
+from stats import CountMatrix, SubmissionStats, day_number, day_string
+
+DAY = day_number("2026-03-10")
+
+
+@pytest.fixture(params=["numpy", "pure python"])
+def matrix(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(stats, "np", None)
+    return CountMatrix()
+
+
+def test_matrix_grows_in_both_directions(matrix):
+    matrix.add(DAY, "CNY", 2)
+    matrix.add(DAY + 5, "USD")
+    matrix.add(DAY - 3, "CNY")
+    assert matrix.totals(DAY - 10, DAY + 10) == {"CNY": 3, "USD": 1}
+    assert matrix.totals(DAY, DAY + 4) == {"CNY": 2}
+    assert matrix.totals(DAY + 6, DAY + 9) == {}
+    assert matrix.series(DAY - 3, DAY + 5) == [(DAY - 3, {"CNY": 1}), (DAY, {"CNY": 2}), (DAY + 5, {"USD": 1})]
+
+
+def test_failed_calls_count_no_customers_and_rollups_persist(tmp_path):
+    path = str(tmp_path / "stats.sqlite3")
+    rollups = SubmissionStats(path)
+    customer = {"assigned_vendor": "Arrow", "currency": "CNY"}
+    rollups.record("default", DAY, [customer, dict(customer, currency="USD")], success=True)
+    rollups.record("default", DAY + 1, [customer], success=False)
+
+    result = SubmissionStats(path).query("default", DAY, DAY + 1, daily=("currency",))
+    assert result["onboarded"] == 2
+    assert result["totals"]["currency"] == {"CNY": 1, "USD": 1}
+    assert result["totals"]["business_specialist"] == {"unknown": 2}
+    assert (result["upstream"]["success"], result["upstream"]["failure"]) == (1, 1)
+    assert [d["success_rate"] for d in result["upstream"]["daily"]] == [1.0, 0.0]
+    assert result["daily"]["currency"] == [{"date": day_string(DAY), "counts": {"CNY": 1, "USD": 1}}]
+
+
+def test_stats_endpoint_ranges(server, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "submission_stats", SubmissionStats(str(tmp_path / "stats.sqlite3")))
+    for offset in range(3):
+        server.submission_stats.record(server.tenant_registry.default.name, DAY + offset,
+                                       [{"assigned_vendor": "Arrow"}], success=True)
+
+    body = client.get("/api/stats?from=2026-03-11&to=2026-03-12&daily=assigned_vendor").get_json()
+    assert (body["from"], body["to"], body["onboarded"]) == ("2026-03-11", "2026-03-12", 2)
+    assert [row["date"] for row in body["daily"]["assigned_vendor"]] == ["2026-03-11", "2026-03-12"]
+    assert client.get("/api/stats?from=2026-03-12&to=2026-03-11").status_code == 400
+    assert client.get("/api/stats?from=yesterday").status_code == 400
+
+
+def test_rollups_are_backfilled_from_the_audit_log(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "submission_stats", SubmissionStats(str(tmp_path / "stats.sqlite3")))
+    monkeypatch.setattr(server.audit_log, "scan", lambda: iter([
+        {"kind": "create", "ts": 1773100800, "tenant": "default", "success": True,
+         "records": [{"currency_name": "USD"}], "metadata": [{"assigned_vendor": "Avnet"}]},
+        {"kind": "update", "ts": 1773100800, "tenant": "default", "success": True},
+    ]))
+    server.backfill_submission_stats()
+    result = server.submission_stats.query("default", DAY, DAY)
+    assert result["totals"]["assigned_vendor"] == {"Avnet": 1}
+    assert result["totals"]["currency"] == {"USD": 1}
@@ -0,0 +1,100 @@
+"""Tenant configuration and the isolation of tenants from each other."""
+
+import json
+import sqlite3
+import time
+
+import pytest
+
+from scheduler import INTERACTIVE
+from stats import SubmissionStats, day_number
+from tenants import TenantRegistry
+
+FALLBACK = {"name": "default", "database": "db", "client_id": "client-0000", "secret_key": "secret"}
+
+
+def _derive(api_route, secret_key, timestamp, method):
+    return b"key"
+
+
+def _load(tmp_path, content):
+    path = tmp_path / "tenants.json"
+    path.write_text(content, encoding="utf-8")
+    return TenantRegistry.load(str(path), FALLBACK, _derive, http_version="1.1")
+
+
+def test_without_a_file_the_fallback_is_the_default(tmp_path):
+    registry = TenantRegistry.load(str(tmp_path / "absent.json"), FALLBACK, _derive, http_version="1.1")
+    assert registry.default.name == "default"
+    assert registry.get("") is registry.default
+    assert registry.get("nope") is None
+
+
+def test_marked_tenant_is_the_default(tmp_path):
+    tenants = [dict(FALLBACK, name="a"), dict(FALLBACK, name="b", default=True)]
+    registry = _load(tmp_path, json.dumps({"tenants": tenants}))
+    assert registry.default.name == "b"
+    assert sorted(registry.tenants) == ["a", "b"]
+
+
+@pytest.mark.parametrize("content", ["", "{}", '{"tenants": []}', "[]", '{"tenants": [{"name": "a"}]}'])
+def test_unusable_tenants_file_is_a_configuration_error(tmp_path, content):
+    with pytest.raises(ValueError, match="tenants.json"):
+        _load(tmp_path, content)
+
+
+def test_unknown_tenant_is_a_bad_request(client):
+    response = client.get("/api/config", headers={"X-Tenant": "nope"})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "unknown_tenant"
+
+
+def test_saturated_tenant_does_not_shed_another(server, client, other_tenant, monkeypatch):
+    created = []
+    monkeypatch.setattr(server, "create_customer_in_langchao",
+                        lambda records, **kwargs: created.append(kwargs["tenant"].name) or {"success": True})
+    busy = server.admission.controller(other_tenant.name)
+    monkeypatch.setattr(busy, "in_flight", busy.max_in_flight)
+    monkeypatch.setattr(busy, "queued", busy.max_queue)
+
+    response = client.post("/api/create-customer", json={"name": "Isolated Tenant Trading"},
+                           headers={"X-Tenant": other_tenant.name})
+    assert response.status_code == 503
+    response = client.post("/api/create-customer", json={"name": "Isolated Tenant Trading"})
+    assert response.status_code == 200
+    assert created == [server.tenant_registry.default.name]
+
+
+def test_tenants_do_not_share_upstream_slots(server, other_tenant, monkeypatch):
+    monkeypatch.setattr(server, "send_to_langchao", lambda *args: {"success": True})
+    busy = server.tenant_scheduler(other_tenant)
+    held = [busy.acquire(INTERACTIVE, timeout=0) for _ in range(server.UPSTREAM_CONCURRENCY)]
+    assert all(held) and busy.acquire(INTERACTIVE, timeout=0) is None
+    try:
+        started = time.monotonic()
+        assert server.call_langchao(server.API_ROUTE, [], tenant=server.tenant_registry.default)["success"]
+        assert time.monotonic() - started < 1
+    finally:
+        for ticket in held:
+            busy.release(ticket)
+
+
+def test_stats_are_scoped_to_the_callers_tenant(server, client, other_tenant, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "submission_stats", SubmissionStats(str(tmp_path / "stats.sqlite3")))
+    today = day_number(time.time())
+    server.submission_stats.record(server.tenant_registry.default.name, today,
+                                   [{"currency": "CNY"}, {"currency": "CNY"}], success=True)
+    server.submission_stats.record(other_tenant.name, today, [{"currency": "USD"}], success=True)
+
+    own = client.get("/api/stats").get_json()
+    other = client.get("/api/stats", headers={"X-Tenant": other_tenant.name}).get_json()
+    assert (own["onboarded"], own["totals"]["currency"]) == (2, {"CNY": 2})
+    assert (other["onboarded"], other["totals"]["currency"]) == (1, {"USD": 1})
+
+
+def test_rollups_without_tenants_are_dropped_for_a_rebuild(tmp_path):
+    path = str(tmp_path / "stats.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE daily (day INTEGER, dimension TEXT, value TEXT, count INTEGER)")
+        conn.execute("INSERT INTO daily VALUES (1, 'upstream', 'success', 3)")
+    assert SubmissionStats(path).empty
@@ -0,0 +1,49 @@
+"""Per-stage request tracing and the Server-Timing header."""
+
+import json
+
+from tracing import TRACE_HEADER, server_timing_header
+
+
+def test_repeated_stages_are_summed():
+    header = server_timing_header([("upstream", 10.0), ("sign", 0.5), ("upstream", 5.0), ("odd name", 1.0)])
+    assert header == "upstream;dur=15.0, sign;dur=0.5, odd_name;dur=1.0"
+
+
+def test_callers_trace_id_is_kept(client):
+    response = client.get("/api/health", headers={TRACE_HEADER: "wizard-trace-1"})
+    assert response.headers[TRACE_HEADER] == "wizard-trace-1"
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+
+def test_traceparent_and_invalid_ids(client):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    response = client.get("/api/health", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+    assert response.headers[TRACE_HEADER] == trace_id
+    response = client.get("/api/health", headers={TRACE_HEADER: "bad id; with spaces"})
+    assert len(response.headers[TRACE_HEADER]) == 32
+
+
+def test_upstream_stages_and_trace_reach_the_call(server, client, monkeypatch):
+    sent = []
+
+    class Transport:
+        def post(self, url, data, headers, timeout):
+            sent.append(headers)
+            raise server.TransportConnectError("refused")
+
+    monkeypatch.setattr(server.tenant_registry.default, "transport", Transport())
+    response = client.post("/api/create-customer", json={"name": "Traced Stages Ltd"},
+                           headers={TRACE_HEADER: "trace-to-upstream", "X-Allow-Duplicate": "true"})
+    assert sent and all(headers[TRACE_HEADER] == "trace-to-upstream" for headers in sent)
+    stages = {part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")}
+    assert {"queue", "sign", "encode", "total"} <= stages
+
+
+def test_traces_are_exported_as_jsonl(server, client, tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(server.tracer, "trace_file", str(path))
+    client.get("/api/health", headers={TRACE_HEADER: "exported-trace"})
+    trace = json.loads(path.read_text(encoding="utf-8").splitlines()[-1])
+    assert (trace["trace_id"], trace["path"], trace["status"]) == ("exported-trace", "/api/health", 200)
+    assert trace["spans"][-1]["name"] == "total"
@@ -0,0 +1,82 @@
+"""HTTP/2 transport: error mapping and the per-origin protocol check."""
+
+import asyncio
+import threading
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+from transport import (HTTP1, HTTP2, Http2Transport, TransportConnectError,  # noqa: E402
+                       TransportConnectionLost, TransportTimeout)
+
+BASE = "http://127.0.0.1:9"
+
+
+class RaisingClient:
+    def __init__(self, error):
+        self.error = error
+
+    async def post(self, url, **kwargs):
+        raise self.error
+
+
+@pytest.fixture
+def transport():
+    transport = Http2Transport(pool_size=2)
+    transport.origins[BASE] = HTTP2
+    yield transport
+    transport.close()
+
+
+@pytest.mark.parametrize("error, expected", [
+    (httpx.ConnectError("refused"), TransportConnectError),
+    (httpx.ConnectTimeout("slow"), TransportConnectError),
+    (httpx.ReadTimeout("slow"), TransportTimeout),
+    (httpx.PoolTimeout("busy"), TransportTimeout),
+    (httpx.ReadError("reset"), TransportConnectionLost),
+    (httpx.RemoteProtocolError("goaway"), TransportConnectionLost),
+])
+def test_post_error_mapping(transport, monkeypatch, error, expected):
+    monkeypatch.setattr(transport, "_h2c", RaisingClient(error))
+    with pytest.raises(expected):
+        transport.post(BASE + "/x", b"{}", {}, (1, 1))
+
+
+class SlowClient:
+    """Answers the protocol check; checks of `blocked` wait for `release`."""
+
+    def __init__(self, blocked):
+        self.blocked = blocked
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    async def get(self, url, **kwargs):
+        if url.startswith(self.blocked):
+            self.started.set()
+            while not self.release.is_set():
+                await asyncio.sleep(0.01)
+
+
+def test_unreachable_origin_falls_back_to_http1(transport):
+    base = "http://127.0.0.1:19"
+    with pytest.raises(TransportConnectError):
+        transport.post(base + "/x", b"{}", {}, (1, 1))
+    assert transport.origins[base] == HTTP1
+
+
+def test_check_does_not_hold_up_other_origins(transport, monkeypatch):
+    slow, fast = "http://slow.invalid", "http://fast.invalid"
+    client = SlowClient(slow)
+    monkeypatch.setattr(transport, "_h2c", client)
+    checking = threading.Thread(target=transport._check, args=(slow, (5, 5)))
+    checking.start()
+    try:
+        assert client.started.wait(5)
+        assert transport._check(fast, (5, 5)) == HTTP2
+        assert slow not in transport.origins
+    finally:
+        client.release.set()
+        checking.join()
+    assert transport.origins[slow] == HTTP2
@@ -0,0 +1,104 @@
+"""Diffing submitted records against the current customer, and where that record comes from."""
+
+import pytest
+
+from updates import diff_customer, ignored_fields, updated_record
+
+# What the read route returns: lookups as many2one [id, name], empty as False
+CURRENT = {
+    "id": 12, "number": "CUST000012", "write_date": "2026-01-05 08:00:00",
+    "name": "Acme Electronics Co., Ltd.", "cust_group_id": [3, "Distributor"],
+    "country_id": [48, "中国"], "inv_email": False, "credit_limit": 5000.0,
+    "X_char_5smvg51jqa": "sales@acme.com",
+}
+
+# What the wizard submits: lookups by number/name
+SUBMITTED = {
+    "number": "CUST000012", "name": "Acme Electronics Co., Ltd.", "cust_group_number": "C01",
+    "country_name": "中国", "inv_email": "", "credit_limit": "5000", "X_char_5smvg51jqa": " sales@acme.com ",
+}
+
+
+def test_unchanged_submission_has_no_diff():
+    assert diff_customer(CURRENT, SUBMITTED) == {}
+    assert ignored_fields(CURRENT, SUBMITTED) == ["country_name", "cust_group_number"]
+
+
+def test_changed_fields_only():
+    incoming = dict(SUBMITTED, inv_email="ap@acme.com", cust_group_id=4, country_name="美国")
+    assert diff_customer(CURRENT, incoming) == {"inv_email": "ap@acme.com", "cust_group_id": 4}
+
+
+def test_many2one_compares_by_id():
+    assert diff_customer(CURRENT, {"cust_group_id": 3, "country_id": "48"}) == {}
+
+
+def test_clearing_a_field():
+    assert diff_customer(CURRENT, {"X_char_5smvg51jqa": None}) == {"X_char_5smvg51jqa": None}
+
+
+def test_read_only_fields_are_never_sent():
+    assert diff_customer(CURRENT, {"id": 13, "write_date": "2030-01-01", "number": "X"}) == {}
+
+
+def test_updated_record_takes_write_date():
+    record = updated_record(CURRENT, {"inv_email": "ap@acme.com"}, {"write_date": "2026-02-01 00:00:00"})
+    assert record["inv_email"] == "ap@acme.com"
+    assert record["write_date"] == "2026-02-01 00:00:00"
+    assert CURRENT["inv_email"] is False
+
+
+@pytest.fixture
+def erp(server, monkeypatch):
+    """A fake inSuite holding one customer; records the routes called and what was updated."""
+    customer = {"id": 77, "number": "CUST000077", "name": "Edited In ERP Ltd", "inv_telephone": False,
+                "write_date": "2026-03-01 00:00:00"}
+    calls = []
+
+    def call_langchao(api_route, param, **kwargs):
+        calls.append(api_route)
+        if api_route == server.READ_API_ROUTE:
+            return {"success": True, "data": {"result": {"records": [dict(customer)]}}}
+        customer.update(param[0]["values"])
+        return {"success": True, "data": {"result": {"data": [{"id": 77}]}}}
+
+    monkeypatch.setattr(server, "call_langchao", call_langchao)
+    # The mirror copied the customer before it was edited in inSuite
+    server.customer_mirror.upsert([dict(customer, name="Original Name Ltd", write_date="2026-01-01 00:00:00")])
+    return customer, calls
+
+
+def test_stale_mirror_row_is_not_trusted(server, client, erp):
+    customer, calls = erp
+    # No background sync: the mirror row can't be current, so inSuite is read
+    response = client.patch("/api/customers/CUST000077", json={"name": "Original Name Ltd"})
+    assert response.get_json()["status"] == "updated"
+    assert calls == [server.READ_API_ROUTE, server.UPDATE_API_ROUTE]
+    assert customer["name"] == "Original Name Ltd"
+
+
+def test_mirror_row_is_used_only_while_current(server, client, erp, monkeypatch):
+    customer, calls = erp
+    # As if syncing every 5 minutes, without starting the sync thread
+    monkeypatch.setattr(server, "MIRROR_SYNC_INTERVAL", 300)
+    monkeypatch.setattr(server.customer_mirror, "start_sync_loop", lambda *args, **kwargs: None)
+    monkeypatch.setattr(server.customer_mirror, "last_sync", None)
+    response = client.patch("/api/customers/CUST000077", json={"name": "Original Name Ltd"})
+    assert response.get_json()["status"] == "unchanged"
+    assert calls == []
+
+    with server.customer_mirror._conn:
+        server.customer_mirror._conn.execute(
+            "UPDATE customers SET mirrored_at = mirrored_at - 600 WHERE number = 'CUST000077'")
+    response = client.patch("/api/customers/CUST000077", json={"name": "Original Name Ltd"})
+    assert response.get_json()["status"] == "updated"
+    assert calls == [server.READ_API_ROUTE, server.UPDATE_API_ROUTE]
+
+
+def test_unnormalizable_value_is_sent_with_a_warning(server, client, erp):
+    customer, calls = erp
+    response = client.patch("/api/customers/CUST000077", json={"inv_telephone": "1-310-555-1234"})
+    body = response.get_json()
+    assert (body["status"], body["changed"]) == ("updated", ["inv_telephone"])
+    assert body["warnings"][0].startswith("inv_telephone:")
+    assert customer["inv_telephone"] == "1-310-555-1234"
@@ -0,0 +1,103 @@
+"""Post-create verification of customers against inSuite, and its admin endpoints."""
+
+import pytest
+
+from verifier import MISMATCH, MISSING, PENDING, VERIFIED, SubmissionVerifier
+
+NOW = 1767225600.0
+
+
+@pytest.fixture
+def erp():
+    """Fake read route: records by number, and the reads made."""
+    erp = {"records": {}, "reads": []}
+
+    def fetch(tenant, numbers, names):
+        erp["reads"].append((tenant, numbers, names))
+        return [record for record in erp["records"].values()
+                if record["number"] in numbers or record["name"] in names]
+
+    erp["fetch"] = fetch
+    return erp
+
+
+def _verifier(tmp_path, erp, **kwargs):
+    return SubmissionVerifier(str(tmp_path / "verify.sqlite3"), erp["fetch"], delay=30, **kwargs)
+
+
+def test_one_read_per_tenant_settles_each_record(tmp_path, erp):
+    erp["records"] = {
+        "C1": {"number": "C1", "name": "Acme", "inv_email": "ap@acme.com"},
+        "C2": {"number": "C2", "name": "Beta", "inv_email": "someone@else.com"},
+    }
+    verifier = _verifier(tmp_path, erp)
+    records = [{"name": "Acme", "inv_email": "ap@acme.com"}, {"name": "Beta", "inv_email": "ap@beta.com"},
+               {"name": "Gamma"}]
+    assert verifier.enqueue("default", records, [{"number": "C1"}, {"number": "C2"}, {"number": "C3"}],
+                            audit_seq=1, created_at=NOW) == 3
+
+    assert verifier.run_once(now=NOW + 10)["checked"] == 0
+    result = verifier.run_once(now=NOW + 30)
+    assert (result[VERIFIED], result[MISMATCH], result[PENDING], result["reads"]) == (1, 1, 1, 1)
+    assert erp["reads"] == [("default", ["C1", "C2", "C3"], [])]
+    mismatch = verifier.list(status=MISMATCH)[0]
+    assert mismatch["differences"] == {"inv_email": {"submitted": "ap@beta.com", "erp": "someone@else.com"}}
+
+
+def test_missing_after_max_attempts(tmp_path, erp):
+    verifier = _verifier(tmp_path, erp, max_attempts=2)
+    verifier.enqueue("default", [{"name": "Ghost"}], [{"number": "C9"}], created_at=NOW)
+    assert verifier.run_once(now=NOW + 30)[PENDING] == 1
+    assert verifier.run_once(now=NOW + 60)[MISSING] == 1
+    assert verifier.counts()[MISSING] == 1
+
+
+def test_mirrored_records_are_checked_without_a_read(tmp_path, erp):
+    verifier = _verifier(tmp_path, erp, lookup_local=lambda tenant, number: {"number": number, "name": "Acme"})
+    verifier.enqueue("default", [{"name": "Acme"}], [{"number": "C1"}], created_at=NOW)
+    assert verifier.run_once(now=NOW + 30)[VERIFIED] == 1
+    assert erp["reads"] == []
+
+
+def test_failed_read_postpones_the_batch(tmp_path):
+    def fetch(tenant, numbers, names):
+        raise RuntimeError("read route down")
+
+    verifier = SubmissionVerifier(str(tmp_path / "verify.sqlite3"), fetch, delay=30)
+    verifier.enqueue("default", [{"name": "Acme"}], [{"number": "C1"}], created_at=NOW)
+    assert verifier.run_once(now=NOW + 30)["checked"] == 1
+    assert verifier.last_error == "read route down"
+    assert verifier.list()[0]["attempts"] == 0
+    assert verifier.run_once(now=NOW + 40)["checked"] == 0
+
+
+def test_enqueueing_an_audit_entry_twice_is_a_no_op(tmp_path, erp):
+    verifier = _verifier(tmp_path, erp)
+    assert verifier.enqueue("default", [{"name": "Acme"}], [], audit_seq=7) == 1
+    assert verifier.enqueue("default", [{"name": "Acme"}], [], audit_seq=7) == 0
+
+
+@pytest.mark.parametrize("method,url", [
+    ("get", "/api/verification"), ("get", "/api/verification/status"),
+    ("post", "/api/verification/run"), ("post", "/api/verification/reconcile"),
+])
+def test_verification_endpoints_need_the_admin_secret(client, admin, method, url):
+    assert getattr(client, method)(url).status_code == 403
+
+
+def test_reconcile_queues_only_the_callers_tenant(server, client, admin, other_tenant, erp, tmp_path,
+                                                  monkeypatch):
+    monkeypatch.setattr(server, "submission_verifier", _verifier(tmp_path, erp))
+    other = dict(admin, **{"X-Tenant": other_tenant.name})
+    for tenant, name in ((server.tenant_registry.default.name, "Reconcile Own"),
+                         (other_tenant.name, "Reconcile Other")):
+        server.audit_log.append("create", [{"vendor_id": "reconcile-v", "name": name}],
+                                {"tenant": tenant, "records": [{"name": name}], "response": {"success": True}},
+                                success=True)
+
+    body = client.post("/api/verification/reconcile", headers=other).get_json()
+    assert (body["entries"], body["queued"]) == (1, 1)
+    listed = client.get("/api/verification", headers=other).get_json()
+    assert [(r["tenant"], r["name"]) for r in listed["records"]] == [(other_tenant.name, "Reconcile Other")]
+    assert client.get("/api/verification", headers=admin).get_json()["records"] == []
+
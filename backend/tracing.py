@@ -0,0 +1,129 @@
+"""
+Espressif Vendor Wizard - Request Tracing
+Lightweight per-stage timing for API requests.
+
+Code wraps each stage in `with span("name"):`. The durations are returned to
+the caller in a Server-Timing response header (visible in the browser's
+devtools) and can be appended to a local JSONL trace file. The trace id is
+taken from the caller's X-Trace-Id (or W3C traceparent) header, so a slow
+submission can be followed from the frontend fetch to the Langchao call.
+
+Spans are only recorded inside a Flask request; elsewhere (e.g. background
+batch jobs) `span` is a no-op.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+
+TRACE_HEADER = "X-Trace-Id"
+
+_TRACE_ID = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+_METRIC_NAME = re.compile(r"[^0-9A-Za-z_-]")
+
+
+# =============================================================================
+# SPANS
+# =============================================================================
+
+def current_trace_id():
+    """The trace id of the current request, or None outside a request."""
+    if has_request_context():
+        return getattr(g, "trace_id", None)
+    return None
+
+
+@contextmanager
+def span(name: str):
+    """Time a block of code as a named stage of the current request."""
+    if not has_request_context() or not hasattr(g, "trace_spans"):
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.trace_spans.append((name, (time.perf_counter() - start) * 1000))
+
+
+def server_timing_header(spans: list) -> str:
+    """
+    Format spans as a Server-Timing header value.
+
+    Repeated stages (e.g. one upstream call per batch chunk) are summed.
+    """
+    totals = {}
+    for name, duration in spans:
+        key = _METRIC_NAME.sub("_", name)
+        totals[key] = totals.get(key, 0.0) + duration
+    return ", ".join(f"{name};dur={duration:.1f}" for name, duration in totals.items())
+
+
+# =============================================================================
+# FLASK INTEGRATION
+# =============================================================================
+
+class Tracer:
+    """
+    Installs request hooks that start a trace and emit its timings.
+
+    Args:
+        app: The Flask app
+        trace_file: Optional JSONL file every finished trace is appended to
+    """
+
+    def __init__(self, app, trace_file: str = None):
+        self.trace_file = trace_file
+        self._file_lock = threading.Lock()
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @staticmethod
+    def _incoming_trace_id():
+        trace_id = request.headers.get(TRACE_HEADER, "")
+        if _TRACE_ID.match(trace_id):
+            return trace_id
+        match = _TRACEPARENT.match(request.headers.get("traceparent", ""))
+        if match:
+            return match.group(1)
+        return uuid.uuid4().hex
+
+    def _start(self):
+        g.trace_id = self._incoming_trace_id()
+        g.trace_spans = []
+        g.trace_start = time.perf_counter()
+
+    def _finish(self, response):
+        if not hasattr(g, "trace_spans"):
+            return response
+        total_ms = (time.perf_counter() - g.trace_start) * 1000
+        spans = g.trace_spans + [("total", total_ms)]
+
+        response.headers[TRACE_HEADER] = g.trace_id
+        response.headers["Server-Timing"] = server_timing_header(spans)
+        response.headers["Timing-Allow-Origin"] = "*"
+
+        if self.trace_file:
+            self._export({
+                "trace_id": g.trace_id,
+                "time": time.time(),
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "spans": [{"name": name, "ms": round(ms, 2)} for name, ms in spans],
+            })
+        return response
+
+    def _export(self, trace: dict) -> None:
+        try:
+            with self._file_lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace) + "\n")
+        except OSError as e:
+            print(f"[WARN] Could not write trace file: {e}")
@@ -0,0 +1,282 @@
+"""
+Espressif Vendor Wizard - Upstream HTTP Transport
+The connection layer under call_langchao: how a signed request gets to an
+inSuite host.
+
+Over HTTP/1.1 every in-flight request needs its own connection, so 50
+concurrent calls to one gateway cost it 50 sockets (and handshakes, once
+the pool churns). Over HTTP/2 the same calls are multiplexed as streams on
+one connection.
+
+Two transports, chosen per tenant:
+
+- Http1Transport: requests with a keep-alive connection pool (the
+  behaviour before this module existed).
+- Http2Transport: httpx with HTTP/2. Calls from any number of threads are
+  handed to one asyncio loop thread that owns the connections; httpx's
+  synchronous HTTP/2 client is not safe to share between threads under
+  load. https origins negotiate the protocol via ALPN and fall back to
+  HTTP/1.1 on their own. For cleartext http
+  origins (no ALPN) the first call checks once whether the host speaks
+  HTTP/2 with prior knowledge; hosts that don't (or that can't be reached
+  or don't answer the preface in time) are remembered and served by an
+  Http1Transport from then on. The check never carries a real request, so
+  a create is never replayed because of it, and it runs outside the
+  transport's lock, so calls to other origins are not held up by it.
+
+HTTP/1.1 pipelining is not offered: the Python clients don't implement
+it, and non-idempotent creates must not be pipelined anyway.
+
+httpx (with its http2 extra) is optional; without it "auto" means
+HTTP/1.1. Both transports raise TransportConnectError only when a request
+cannot have reached the server (connection refused, unresolvable host,
+connect timeout), which makes it safe to retry elsewhere. Once a
+connection is up, anything that goes wrong is ambiguous: the request may
+have been received and applied. Those failures raise TransportTimeout (no
+response in time) or TransportConnectionLost (reset, closed mid-response,
+protocol error).
+"""
+
+import asyncio
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+try:
+    import httpx
+except ImportError:   # optional dependency
+    httpx = None
+
+
+HTTP1 = "HTTP/1.1"
+HTTP2 = "HTTP/2"
+HTTP_VERSIONS = ("auto", "1.1", "2")
+
+
+class TransportConnectError(Exception):
+    """The request never reached the server (refused, unresolvable, connect timeout)."""
+
+
+class TransportConnectionLost(Exception):
+    """The connection failed after the request may have been sent (reset, closed early...)."""
+
+
+class TransportTimeout(Exception):
+    """The request was sent but no response arrived within the read timeout."""
+
+
+class Reply:
+    """Protocol-independent view of an upstream response."""
+
+    def __init__(self, response, http_version: str):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.http_version = http_version
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self):
+        return self._response.json()
+
+
+def _never_sent(error: requests.exceptions.ConnectionError) -> bool:
+    """Whether a requests ConnectionError happened before a connection existed."""
+    reason = error.args[0] if error.args else None
+    # requests wraps urllib3's MaxRetryError, whose reason is the real cause
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, NewConnectionError)
+
+
+def origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+# =============================================================================
+# HTTP/1.1
+# =============================================================================
+
+class Http1Transport:
+    """
+    HTTP/1.1 over a blocking keep-alive pool: one connection per in-flight call.
+
+    Args:
+        pool_size: Connections kept per host; further calls wait for one
+    """
+
+    def __init__(self, pool_size: int = 10):
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, url: str, data: bytes, headers: dict, timeout: tuple) -> Reply:
+        """POST `data`; `timeout` is (connect, read) seconds."""
+        try:
+            response = self.session.post(url=url, data=data, headers=headers, timeout=timeout)
+        except requests.exceptions.ConnectTimeout as e:
+            raise TransportConnectError(str(e)) from e
+        except requests.exceptions.ConnectionError as e:
+            if _never_sent(e):
+                raise TransportConnectError(str(e)) from e
+            # Reset or closed by the server: the request may have arrived
+            raise TransportConnectionLost(str(e)) from e
+        except requests.exceptions.Timeout as e:
+            raise TransportTimeout(str(e)) from e
+        return Reply(response, HTTP1)
+
+    def describe(self) -> dict:
+        return {"http_version": "1.1", "pool_size": self.pool_size}
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# =============================================================================
+# HTTP/2
+# =============================================================================
+
+class Http2Transport:
+    """
+    HTTP/2 multiplexing via httpx, falling back to HTTP/1.1 per origin.
+
+    Args:
+        pool_size: Connections per host. With HTTP/2 a single connection
+            usually carries every call; more are only opened once the
+            server's concurrent stream limit is reached.
+        fallback: Http1Transport used for origins without HTTP/2
+    """
+
+    def __init__(self, pool_size: int = 10, fallback: Http1Transport = None):
+        if httpx is None:
+            raise ImportError("httpx is required for HTTP/2 (pip install 'httpx[http2]')")
+        self.pool_size = pool_size
+        self.fallback = fallback or Http1Transport(pool_size)
+        self.origins = {}   # cleartext origin -> HTTP2 / HTTP1, once checked
+        self._checks = {}   # cleartext origin -> Event set when its check is done
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="http2-transport", daemon=True).start()
+        try:
+            # ALPN client for https (negotiates h2 or HTTP/1.1); prior-knowledge
+            # client for cleartext http. Both raise ImportError without h2.
+            self._alpn, self._h2c = self._run(self._clients())
+        except ImportError:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+
+    async def _clients(self) -> tuple:
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        return (httpx.AsyncClient(http1=True, http2=True, limits=limits),
+                httpx.AsyncClient(http1=False, http2=True, limits=limits))
+
+    def _run(self, coroutine):
+        """Run a coroutine on the transport's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _check(self, base: str, timeout: tuple) -> str:
+        """Protocol of a cleartext origin, checked once with a bare GET."""
+        version = self.origins.get(base)
+        if version is not None:
+            return version
+        with self._lock:
+            version = self.origins.get(base)
+            if version is not None:
+                return version
+            done = self._checks.get(base)
+            checking = done is None
+            if checking:
+                done = self._checks[base] = threading.Event()
+        if not checking:
+            # Another call is checking this origin; HTTP/1.1 is always safe
+            done.wait(sum(timeout))
+            return self.origins.get(base, HTTP1)
+
+        version = None
+        try:
+            self._run(self._h2c.get(base + "/", timeout=self._timeout(timeout)))
+            version = HTTP2
+        except (httpx.RemoteProtocolError, httpx.TimeoutException, httpx.NetworkError) as e:
+            # Not an HTTP/2 server: it answered the connection preface with
+            # HTTP/1.1 (e.g. 505), hung up, or never answered it. Only the
+            # bare GET was sent, so the caller's request can still go over
+            # HTTP/1.1, which also reports an unreachable host properly.
+            version = HTTP1
+            print(f"[INFO] {base} did not complete an HTTP/2 preface ({type(e).__name__}), "
+                  f"falling back to HTTP/1.1")
+        finally:
+            with self._lock:
+                if version is not None:
+                    self.origins[base] = version
+                del self._checks[base]
+            done.set()
+        return version
+
+    @staticmethod
+    def _timeout(timeout: tuple):
+        connect, read = timeout
+        # Waiting for a pooled connection/stream counts against the read budget
+        return httpx.Timeout(connect=connect, read=read, write=read, pool=read)
+
+    def post(self, url: str, data: bytes, headers: dict, timeout: tuple) -> Reply:
+        """POST `data`; `timeout` is (connect, read) seconds."""
+        base = origin(url)
+        if base.startswith("https://"):
+            client = self._alpn
+        elif self._check(base, timeout) == HTTP2:
+            client = self._h2c
+        else:
+            return self.fallback.post(url, data, headers, timeout)
+
+        try:
+            response = self._run(client.post(url, content=data, headers=headers,
+                                             timeout=self._timeout(timeout)))
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            raise TransportConnectError(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise TransportTimeout(str(e)) from e
+        except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+            # Dropped connection or stream reset: the request may have arrived
+            raise TransportConnectionLost(str(e)) from e
+        return Reply(response, response.http_version)
+
+    def describe(self) -> dict:
+        return {"http_version": "auto", "pool_size": self.pool_size, "origins": dict(self.origins)}
+
+    def close(self) -> None:
+        self._run(self._alpn.aclose())
+        self._run(self._h2c.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self.fallback.close()
+
+
+def make_transport(http_version: str = "auto", pool_size: int = 10):
+    """
+    Transport for an HTTP version setting.
+
+    Args:
+        http_version: "1.1", "2" or "auto". "2" and "auto" both use HTTP/2
+            where the origin supports it; "auto" quietly uses HTTP/1.1 when
+            httpx is not installed, "2" warns about it.
+        pool_size: Connections per host
+    """
+    if http_version not in HTTP_VERSIONS:
+        raise ValueError(f"http_version must be one of {', '.join(HTTP_VERSIONS)}")
+    if http_version != "1.1":
+        try:
+            return Http2Transport(pool_size)
+        except ImportError as e:
+            if http_version == "2":
+                print(f"[WARN] HTTP/2 unavailable, using HTTP/1.1: {e}")
+    return Http1Transport(pool_size)
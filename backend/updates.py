@@ -0,0 +1,83 @@
+"""
+Espressif Vendor Wizard - Partial Customer Updates
+Updates existing inSuite customers by sending only the fields that changed.
+
+The wizard (or a bulk re-sync) submits the full record it wants a customer
+to have. The record is compared field by field with the customer's current
+record (from the local mirror, see mirror.py, or read upstream), and only
+the differing fields go to the update route. Submissions that match the
+current record are not sent at all, so a re-sync of an unchanged customer
+master costs no upstream calls.
+
+Only fields the current record carries can be compared. Records are
+submitted with lookups by number or name (cust_group_number, country_name,
+...), but the read returns them as many2one ids (cust_group_id: [12,
+"..."]), so those submitted fields are left out of the diff and reported
+as ignored. A lookup is changed by sending its id field instead.
+
+Update protocol (update route, signed like create1):
+
+    param:  [{"id": 12, "number": "CUST000012", "values": {"inv_email": "..."}}, ...]
+    result: {"code": 200, "data": [{"id": 12, "number": ..., "write_date": ...}, ...]}
+
+Like create1 the call runs in one transaction. Setting fields to given
+values is idempotent, so update calls may be retried and failed over.
+emulator.py implements the same contract for local testing.
+"""
+
+
+# Bookkeeping fields owned by inSuite; never compared or sent
+READ_ONLY_FIELDS = {"id", "number", "write_date", "create_date", "_metadata"}
+
+
+def _comparable(value):
+    """
+    Canonical form of a field value for comparison.
+
+    Odoo returns many2one references as [id, name] where the wizard sends
+    the plain id, returns False for empty fields, and numbers may come back
+    as floats or strings; all of these compare equal to their plain form.
+    """
+    if value is None or value is False:
+        return ""
+    if isinstance(value, (list, tuple)):
+        if len(value) == 2 and isinstance(value[1], str):
+            return _comparable(value[0])
+        return tuple(sorted(_comparable(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _comparable(item)) for key, item in value.items()))
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def diff_customer(current: dict, incoming: dict) -> dict:
+    """
+    Fields of `incoming` whose value differs from `current`.
+
+    Only fields present in both are compared, so a partial record updates
+    just those fields (see ignored_fields for the rest); an empty value
+    clears the field.
+
+    Returns:
+        {field: new value}; empty if nothing changed
+    """
+    return {
+        field: value
+        for field, value in incoming.items()
+        if field not in READ_ONLY_FIELDS and field in current
+        and _comparable(value) != _comparable(current[field])
+    }
+
+
+def ignored_fields(current: dict, incoming: dict) -> list:
+    """Fields of `incoming` that diff_customer cannot compare (not in `current`)."""
+    return sorted(field for field in incoming if field not in READ_ONLY_FIELDS and field not in current)
+
+
+def updated_record(current: dict, values: dict, result: dict = None) -> dict:
+    """The current record with an applied update, for the mirror."""
+    record = dict(current, **values)
+    if result and result.get("write_date"):
+        record["write_date"] = result["write_date"]
+    return record
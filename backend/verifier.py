@@ -0,0 +1,312 @@
+"""
+Espressif Vendor Wizard - Post-create Verification
+Confirms that created customers really are in the inSuite customer master,
+with the values that were submitted. A create1 "success" only means the
+call returned a result.
+
+Every record of a successful create is queued here, keyed by the customer
+number create1 returned (or its name when there is none), and checked in
+the background once `delay` seconds have passed:
+
+- records the local mirror (see mirror.py) already holds are compared
+  locally, without an upstream call;
+- the rest of a batch is looked up with one multi-record read per tenant
+  (read route with "numbers"/"names" filters), never one read per create.
+
+Only submitted fields that the ERP record contains are compared (lookup
+fields such as cust_group_number come back in another form), using
+updates.diff_customer. A record ends up verified, mismatch (with the
+differing fields) or, when `max_attempts` reads did not find it, missing.
+Mismatches and missing records are logged and listed for follow-up.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from updates import diff_customer
+
+
+PENDING = "pending"
+VERIFIED = "verified"
+MISMATCH = "mismatch"
+MISSING = "missing"
+STATUSES = (PENDING, VERIFIED, MISMATCH, MISSING)
+
+
+class SubmissionVerifier:
+    """
+    Queue of created customers awaiting confirmation, kept in SQLite.
+
+    Args:
+        path: SQLite database file
+        fetch: Callable(tenant: str, numbers: list, names: list) -> list of
+            ERP records matching any of them, raising RuntimeError on failure
+        lookup_local: Optional callable(tenant: str, number: str) returning
+            the locally mirrored record or None
+        batch_size: Records checked per batch
+        delay: Seconds after a create (and between attempts) before a check
+        max_attempts: Reads that may miss a record before it is flagged missing
+    """
+
+    def __init__(self, path: str, fetch, lookup_local=None, batch_size: int = 100,
+                 delay: float = 30.0, max_attempts: int = 5):
+        self.fetch = fetch
+        self.lookup_local = lookup_local
+        self.batch_size = batch_size
+        self.delay = delay
+        self.max_attempts = max_attempts
+        self.reads = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS verifications (
+                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tenant      TEXT NOT NULL,
+                    number      TEXT,
+                    name        TEXT,
+                    audit_seq   INTEGER,
+                    position    INTEGER,
+                    expected    TEXT NOT NULL,
+                    created_at  REAL NOT NULL,
+                    due_at      REAL NOT NULL,
+                    attempts    INTEGER NOT NULL DEFAULT 0,
+                    status      TEXT NOT NULL,
+                    checked_at  REAL,
+                    differences TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_verifications_due ON verifications(status, due_at);
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_verifications_audit
+                    ON verifications(audit_seq, position);
+            """)
+
+    # -------------------------------------------------------------------------
+    # Queueing
+    # -------------------------------------------------------------------------
+
+    def enqueue(self, tenant: str, records: list, created: list, audit_seq: int = None,
+                created_at: float = None) -> int:
+        """
+        Queue the records of one successful create call.
+
+        Args:
+            tenant: Tenant the records were created in
+            records: The submitted records
+            created: create1's {"id", "number"} per record (may be empty)
+            audit_seq: The call's audit log entry; a call already queued
+                from the same entry is not queued again
+            created_at: When the call was made (default: now)
+
+        Returns:
+            Number of records queued
+        """
+        created_at = time.time() if created_at is None else created_at
+        rows = []
+        for position, record in enumerate(records):
+            number = (created[position] if position < len(created) else {}).get("number") or record.get("number")
+            name = record.get("name")
+            if not number and not name:
+                continue
+            rows.append((tenant, number or None, name or None, audit_seq, position,
+                         json.dumps(record, ensure_ascii=False), created_at, created_at + self.delay, PENDING))
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO verifications "
+                "(tenant, number, name, audit_seq, position, expected, created_at, due_at, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    # -------------------------------------------------------------------------
+    # Checking
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _compare(expected: dict, actual: dict) -> dict:
+        """{field: {"submitted", "erp"}} for the submitted fields the ERP record has."""
+        changed = diff_customer(actual, {k: v for k, v in expected.items() if k in actual})
+        return {field: {"submitted": value, "erp": actual.get(field)} for field, value in changed.items()}
+
+    def _match(self, row, by_number: dict, by_name: dict, expected: dict):
+        if row["number"]:
+            return by_number.get(row["number"])
+        candidates = by_name.get(row["name"]) or []
+        # Names aren't unique: prefer a candidate that matches what was submitted
+        return next((c for c in candidates if not self._compare(expected, c)), candidates[0] if candidates else None)
+
+    def run_once(self, now: float = None, tenant: str = None) -> dict:
+        """
+        Check one batch of due records (only `tenant`'s, if given).
+
+        Returns:
+            Counts of records checked per outcome, and reads made
+        """
+        now = time.time() if now is None else now
+        if not self._run_lock.acquire(blocking=False):
+            return {"success": False, "error": "verification_in_progress"}
+        try:
+            sql = "SELECT * FROM verifications WHERE status = ? AND due_at <= ?"
+            args = [PENDING, now]
+            if tenant:
+                sql += " AND tenant = ?"
+                args.append(tenant)
+            with self._lock:
+                rows = self._conn.execute(sql + " ORDER BY due_at LIMIT ?", args + [self.batch_size]).fetchall()
+
+            counts = {status: 0 for status in STATUSES}
+            reads = failed_reads = 0
+            by_tenant = {}
+            for row in rows:
+                by_tenant.setdefault(row["tenant"], []).append(row)
+
+            for tenant, tenant_rows in by_tenant.items():
+                found = {}
+                if self.lookup_local:
+                    for row in tenant_rows:
+                        if row["number"]:
+                            local = self.lookup_local(tenant, row["number"])
+                            if local is not None:
+                                found[row["id"]] = local
+
+                remote = [row for row in tenant_rows if row["id"] not in found]
+                if remote:
+                    try:
+                        records = self.fetch(tenant,
+                                             sorted({row["number"] for row in remote if row["number"]}),
+                                             sorted({row["name"] for row in remote if not row["number"]}))
+                        reads += 1
+                    except Exception as e:
+                        # Try the whole tenant batch again later; nothing was learned
+                        self.last_error = str(e)
+                        failed_reads += 1
+                        print(f"[WARN] Verification read for tenant {tenant} failed: {e}")
+                        self._postpone([row["id"] for row in remote], now + self.delay)
+                        continue
+                    by_number, by_name = {}, {}
+                    for record in records:
+                        if record.get("number"):
+                            by_number[str(record["number"])] = record
+                        by_name.setdefault(record.get("name"), []).append(record)
+                    for row in remote:
+                        match = self._match(row, by_number, by_name, json.loads(row["expected"]))
+                        if match is not None:
+                            found[row["id"]] = match
+
+                for row in tenant_rows:
+                    status = self._settle(row, found.get(row["id"]), now)
+                    counts[status] += 1
+
+            self.reads += reads
+            if reads and not failed_reads:
+                self.last_error = None
+            return dict(counts, success=True, checked=len(rows), reads=reads)
+        finally:
+            self._run_lock.release()
+
+    def _postpone(self, ids: list, due_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE verifications SET due_at = ? WHERE id = ?",
+                                   [(due_at, row_id) for row_id in ids])
+
+    def _settle(self, row, actual, now: float) -> str:
+        """Record the outcome of checking one row; returns its new status."""
+        attempts = row["attempts"] + 1
+        differences = None
+        if actual is None:
+            status = MISSING if attempts >= self.max_attempts else PENDING
+        else:
+            differences = self._compare(json.loads(row["expected"]), actual)
+            status = MISMATCH if differences else VERIFIED
+        label = row["number"] or row["name"]
+        if status == MISMATCH:
+            print(f"[WARN] Verification: {label} ({row['tenant']}) differs from the submission in "
+                  f"{', '.join(sorted(differences))}")
+        elif status == MISSING:
+            print(f"[WARN] Verification: {label} ({row['tenant']}) not found in inSuite "
+                  f"after {attempts} reads")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE verifications SET status = ?, attempts = ?, checked_at = ?, due_at = ?, "
+                "differences = ? WHERE id = ?",
+                (status, attempts, now, now + self.delay,
+                 json.dumps(differences, ensure_ascii=False) if differences else None, row["id"]),
+            )
+        return status
+
+    def start_loop(self, interval: float) -> None:
+        """Check due records every `interval` seconds on a background thread (once per process)."""
+        if self._thread is not None or interval <= 0:
+            return
+
+        def loop():
+            while True:
+                try:
+                    result = self.run_once()
+                    # Keep going while a backlog is due
+                    if result.get("checked", 0) >= self.batch_size:
+                        continue
+                except Exception as e:
+                    print(f"[ERROR] Verification batch failed: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=loop, name="submission-verifier", daemon=True)
+        self._thread.start()
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def list(self, status: str = None, limit: int = 50, tenant: str = None) -> list:
+        """Queued records, newest first, optionally of one status and tenant."""
+        clauses, args = [], []
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        if tenant:
+            clauses.append("tenant = ?")
+            args.append(tenant)
+        sql = "SELECT * FROM verifications"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [{
+            "tenant": row["tenant"],
+            "number": row["number"],
+            "name": row["name"],
+            "audit_seq": row["audit_seq"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "checked_at": row["checked_at"],
+            "differences": json.loads(row["differences"]) if row["differences"] else None,
+        } for row in rows]
+
+    def counts(self, tenant: str = None) -> dict:
+        sql, args = "SELECT status, COUNT(*) AS n FROM verifications", []
+        if tenant:
+            sql, args = sql + " WHERE tenant = ?", [tenant]
+        with self._lock:
+            rows = self._conn.execute(sql + " GROUP BY status", args).fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def status(self, tenant: str = None) -> dict:
+        """Record counts (of `tenant`, if given), reads made and the last read error."""
+        return {
+            "records": self.counts(tenant),
+            "reads": self.reads,
+            "last_error": self.last_error,
+            "running": self._run_lock.locked(),
+        }
@@ -1,10 +1,11 @@
-import { useState, useCallback, useEffect } from 'react';
+import { useState, useCallback, useEffect, useRef } from 'react';
 import { Steps, Button, Space } from '@arco-design/web-react';
 import { IconLeft, IconRight } from '@arco-design/web-react/icon';
 import type { VendorFormData, WizardStep, VendorSubmissionData } from '../types/vendor';
-import { WIZARD_STEPS, TECHNICAL_SERVICE_VALUE } from '../types/vendor';
-import { generateVendorId, prepareSubmissionData, toJsonFormat, toApiPayload, downloadJson } from '../utils/vendorUtils';
-import { createCustomer, isApiConfigured } from '../services/langchaoApi';
+import { WIZARD_STEPS, TECHNICAL_SERVICE_VALUE, applyProductCatalog } from '../types/vendor';
+import { generateVendorId, prepareSubmissionData, toJsonFormat, downloadJson, diffFields } from '../utils/vendorUtils';
+import { createCustomer, commitDraft, fetchProductCatalog, isApiConfigured, loadDraft, saveDraft } from '../services/langchaoApi';
+import type { DraftDelta } from '../services/langchaoApi';
 import { validators, getInvalidEmails } from '../utils/validationUtils';
 import { useLanguage } from '../contexts/LanguageContext';
 import { useToast } from './Toast';
@@ -25,6 +26,17 @@ interface VendorWizardProps {
   businessSupport?: string;
 }
 
+// localStorage key remembering the vendor ID of the in-progress backend draft
+const DRAFT_STORAGE_KEY = 'vendorWizardDraftId';
+
+interface DraftSnapshot {
+  record: Record<string, unknown>;
+  form: Record<string, unknown>;
+  metadata: Record<string, unknown>;
+}
+
+const emptyDraftSnapshot = (): DraftSnapshot => ({ record: {}, form: {}, metadata: {} });
+
 const initialFormData: VendorFormData = {
   businessSpecialist: '',
   companyLegalName: '',
@@ -59,6 +71,22 @@ export default function VendorWizard({ businessSupport }: VendorWizardProps) {
   });
   const [submissionData, setSubmissionData] = useState<VendorSubmissionData | null>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const [vendorId, setVendorId] = useState<string>(
+    () => localStorage.getItem(DRAFT_STORAGE_KEY) || generateVendorId()
+  );
+  // Last state saved to the backend draft, used to send only changed fields
+  const lastSavedDraft = useRef<DraftSnapshot>(emptyDraftSnapshot());
+  // Version of the backend product catalog in use (built-in until loaded)
+  const [, setCatalogVersion] = useState<string | null>(null);
+
+  // Use the backend's product catalog so catalog changes need no rebuild
+  useEffect(() => {
+    fetchProductCatalog().then(catalog => {
+      if (!catalog) return;
+      applyProductCatalog(catalog);
+      setCatalogVersion(catalog.version);
+    });
+  }, []);
 
   // Sync businessSupport prop with formData when it changes (URL params load async)
   useEffect(() => {
@@ -67,8 +95,52 @@ export default function VendorWizard({ businessSupport }: VendorWizardProps) {
     }
   }, [businessSupport]);
 
+  // Remember the draft across reloads and resume it if the tab was lost
+  useEffect(() => {
+    localStorage.setItem(DRAFT_STORAGE_KEY, vendorId);
+
+    loadDraft(vendorId).then(draft => {
+      if (!draft) return;
+      if (draft.status === 'committed') {
+        setVendorId(generateVendorId());
+        return;
+      }
+      lastSavedDraft.current = { record: draft.record, form: draft.form, metadata: draft.metadata };
+      setFormData(prev => ({ ...prev, ...(draft.form as Partial<VendorFormData>) }));
+      if (draft.step && WIZARD_STEPS.some(s => s.key === draft.step)) {
+        setCurrentStep(draft.step as WizardStep);
+      }
+    });
+  }, [vendorId]);
+
   const currentStepIndex = WIZARD_STEPS.findIndex(s => s.key === currentStep);
 
+  // Fields changed since the last draft save, plus the snapshot to remember once saved
+  const buildDraftDelta = (submission: VendorSubmissionData): { delta: DraftDelta; snapshot: DraftSnapshot } => {
+    const { _metadata, ...record } = toJsonFormat(submission) as Record<string, unknown>;
+    const snapshot: DraftSnapshot = {
+      record,
+      form: { ...formData } as Record<string, unknown>,
+      metadata: (_metadata || {}) as Record<string, unknown>,
+    };
+    const previous = lastSavedDraft.current;
+    return {
+      delta: {
+        record: diffFields(previous.record, snapshot.record),
+        form: diffFields(previous.form, snapshot.form),
+        metadata: diffFields(previous.metadata, snapshot.metadata),
+      },
+      snapshot,
+    };
+  };
+
+  const saveDraftStep = async (step: WizardStep) => {
+    const { delta, snapshot } = buildDraftDelta(prepareSubmissionData(formData, vendorId));
+    if (await saveDraft(vendorId, { ...delta, step })) {
+      lastSavedDraft.current = snapshot;
+    }
+  };
+
   const updateFormData = useCallback((updates: Partial<VendorFormData>) => {
     setFormData(prev => ({ ...prev, ...updates }));
   }, []);
@@ -220,6 +292,10 @@ export default function VendorWizard({ businessSupport }: VendorWizardProps) {
     const nextIndex = currentStepIndex + 1;
     if (nextIndex < WIZARD_STEPS.length) {
       setCurrentStep(WIZARD_STEPS[nextIndex].key);
+      if (currentStep !== 'welcome') {
+        // Fire and forget: a failed save only means a larger delta next time
+        void saveDraftStep(WIZARD_STEPS[nextIndex].key);
+      }
     }
   };
 
@@ -234,7 +310,6 @@ export default function VendorWizard({ businessSupport }: VendorWizardProps) {
     setIsSubmitting(true);
 
     try {
-      const vendorId = generateVendorId();
       const submission = prepareSubmissionData(formData, vendorId);
       setSubmissionData(submission);
 
@@ -243,14 +318,19 @@ export default function VendorWizard({ businessSupport }: VendorWizardProps) {
 
       // Check if API is configured
       if (isApiConfigured()) {
-        // Call the Langchao API
-        const apiPayload = toApiPayload(submission);
-        console.log('API payload:', apiPayload);
-
-        const response = await createCustomer(apiPayload);
+        // Commit the backend draft, sending only the fields changed since the last step
+        const { delta } = buildDraftDelta(submission);
+        let response = await commitDraft(vendorId, delta);
+
+        if (!response.success && response.error?.code === 'not_found') {
+          // No draft was saved (e.g. backend was down earlier) - send the full record.
+          // The backend strips _metadata before calling Langchao and keeps it in its audit log.
+          response = await createCustomer([jsonData]);
+        }
 
         if (response.success) {
           console.log('Customer created successfully:', response.data);
+          localStorage.removeItem(DRAFT_STORAGE_KEY);
           showToast('success', t('validation.submitSuccess'));
           setCurrentStep('success');
         } else {
@@ -290,6 +370,8 @@ export default function VendorWizard({ businessSupport }: VendorWizardProps) {
       businessSpecialist: businessSupport || '',
     });
     setSubmissionData(null);
+    lastSavedDraft.current = emptyDraftSnapshot();
+    setVendorId(generateVendorId());
     setCurrentStep('welcome');
   };
 
@@ -3,8 +3,107 @@
  * Calls the local Python backend which handles the Langchao API communication
  */
 
+import type { ProductCatalogData } from '../types/vendor';
+
 // Local Python backend URL
-const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://localhost:5001';
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL ?? 'http://localhost:5001';
+
+/**
+ * How long a submission may take before the wizard gives up (ms)
+ * Sent to the backend as X-Request-Timeout, so it stops waiting on Langchao
+ * (and skips work not yet started) once nobody is waiting for the answer.
+ */
+const SUBMIT_TIMEOUT_MS = 30000;
+
+/**
+ * Headers and abort signal for a request with a deadline
+ */
+function withDeadline(timeoutMs: number): { headers: Record<string, string>; signal: AbortSignal } {
+  return {
+    headers: { 'X-Request-Timeout': String(timeoutMs) },
+    signal: AbortSignal.timeout(timeoutMs),
+  };
+}
+
+/**
+ * How often a submission shed by the backend's admission control (503 with
+ * Retry-After) is tried in total, and the backoff used when the backend
+ * suggests no delay. Shed requests were not processed, so resubmitting is
+ * safe; all attempts share one SUBMIT_TIMEOUT_MS budget.
+ */
+const SUBMIT_MAX_ATTEMPTS = 4;
+const RETRY_BASE_DELAY_MS = 1000;
+
+/**
+ * Delay before retrying a shed request: the backend's Retry-After, or
+ * exponential backoff, plus up to 50% jitter so shed clients don't all
+ * come back at the same moment
+ */
+function retryDelay(response: Response, attempt: number): number {
+  const retryAfter = Number(response.headers.get('Retry-After'));
+  const base = retryAfter > 0 ? retryAfter * 1000 : RETRY_BASE_DELAY_MS * 2 ** attempt;
+  return base * (1 + Math.random() * 0.5);
+}
+
+/**
+ * POST with a deadline, retrying while the backend sheds load
+ * Each attempt sends the budget still left as X-Request-Timeout.
+ */
+async function submitWithRetry(url: string, init: RequestInit, label: string): Promise<Response> {
+  const giveUpAt = Date.now() + SUBMIT_TIMEOUT_MS;
+  for (let attempt = 1; ; attempt++) {
+    const deadline = withDeadline(Math.max(giveUpAt - Date.now(), 1));
+    const response = await fetch(url, {
+      ...init,
+      headers: { ...(init.headers as Record<string, string>), ...deadline.headers },
+      signal: deadline.signal,
+    });
+    if (response.status !== 503 || !response.headers.has('Retry-After') || attempt >= SUBMIT_MAX_ATTEMPTS) {
+      return response;
+    }
+    const delay = retryDelay(response, attempt - 1);
+    if (Date.now() + delay >= giveUpAt) {
+      return response;
+    }
+    console.warn(`[Backend API] ${label}: backend busy, retrying in ${Math.round(delay)} ms (attempt ${attempt})`);
+    await new Promise((resolve) => setTimeout(resolve, delay));
+  }
+}
+
+/**
+ * Network error response (TIMEOUT when our own deadline aborted the request)
+ */
+function networkError(error: unknown): LangchaoApiResponse {
+  const timedOut = error instanceof DOMException && error.name === 'TimeoutError';
+  return {
+    success: false,
+    error: {
+      code: timedOut ? 'TIMEOUT' : 'NETWORK_ERROR',
+      message: timedOut
+        ? 'The backend did not answer in time'
+        : error instanceof Error ? error.message : 'Failed to connect to backend server',
+    },
+  };
+}
+
+/**
+ * Generate a trace id for a backend request
+ * Sent as X-Trace-Id so backend logs, trace files and the Langchao call of
+ * one submission can be correlated.
+ */
+export function newTraceId(): string {
+  return crypto.randomUUID().replace(/-/g, '');
+}
+
+/**
+ * Log the backend's per-stage timings (Server-Timing header) for a response
+ */
+function logServerTiming(label: string, response: Response): void {
+  const timing = response.headers.get('Server-Timing');
+  if (timing) {
+    console.log(`[Backend API] ${label} timing (trace ${response.headers.get('X-Trace-Id')}):`, timing);
+  }
+}
 
 /**
  * API Response interface
@@ -13,6 +112,7 @@ export interface LangchaoApiResponse {
   success: boolean;
   message?: string;
   data?: any;
+  traceId?: string;
   error?: {
     code: string;
     message: string;
@@ -28,34 +128,40 @@ export interface LangchaoApiResponse {
  */
 export async function createCustomer(customerData: object | object[]): Promise<LangchaoApiResponse> {
   const url = `${BACKEND_URL}/api/create-customer`;
+  const traceId = newTraceId();
 
   console.log('[Backend API] Creating customer via Python backend:', {
     url,
+    traceId,
     customerData,
   });
 
   try {
-    const response = await fetch(url, {
+    const response = await submitWithRetry(url, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        'X-Trace-Id': traceId,
       },
       body: JSON.stringify(customerData),
-    });
+    }, 'Create customer');
 
     const result = await response.json();
 
     console.log('[Backend API] Response:', result);
+    logServerTiming('Create customer', response);
 
     if (result.success) {
       return {
         success: true,
         message: result.message,
         data: result.data,
+        traceId,
       };
     } else {
       return {
         success: false,
+        traceId,
         error: {
           code: result.error || 'API_ERROR',
           message: result.message || 'Unknown error',
@@ -64,6 +170,191 @@ export async function createCustomer(customerData: object | object[]): Promise<L
     }
   } catch (error) {
     console.error('[Backend API] Request failed:', error);
+    return networkError(error);
+  }
+}
+
+/**
+ * Fields changed since the last draft save (JSON merge patch: null removes a field)
+ */
+export interface DraftDelta {
+  record?: Record<string, unknown>;
+  form?: Record<string, unknown>;
+  metadata?: Record<string, unknown>;
+  step?: string;
+}
+
+/**
+ * Server-side wizard draft, as returned by the backend
+ */
+export interface WizardDraft {
+  vendor_id: string;
+  record: Record<string, unknown>;
+  form: Record<string, unknown>;
+  metadata: Record<string, unknown>;
+  step: string | null;
+  version: number;
+  status: 'draft' | 'committing' | 'committed';
+}
+
+/**
+ * Save the fields changed at a wizard step to the backend draft
+ *
+ * @param vendorId - Draft key (the wizard's vendor ID)
+ * @param delta - Only the fields that changed since the last save
+ * @returns true if the draft was updated
+ */
+export async function saveDraft(vendorId: string, delta: DraftDelta): Promise<boolean> {
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/drafts/${encodeURIComponent(vendorId)}`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(delta),
+    });
+    return response.ok;
+  } catch (error) {
+    console.warn('[Backend API] Draft save failed:', error);
+    return false;
+  }
+}
+
+/**
+ * Load a backend draft, e.g. to resume a wizard after the tab was closed
+ *
+ * @returns The draft, or null if none exists or the backend is unreachable
+ */
+export async function loadDraft(vendorId: string): Promise<WizardDraft | null> {
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/drafts/${encodeURIComponent(vendorId)}`);
+    if (!response.ok) return null;
+    const result = await response.json();
+    return result.draft;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Submit a stored draft to Langchao
+ * Only the final delta is sent; the backend reuses the stored record.
+ *
+ * @param vendorId - Draft key (the wizard's vendor ID)
+ * @param delta - Fields changed since the last draft save
+ * @returns API response with success status and data/error
+ */
+export async function commitDraft(vendorId: string, delta: DraftDelta = {}): Promise<LangchaoApiResponse> {
+  const url = `${BACKEND_URL}/api/drafts/${encodeURIComponent(vendorId)}/commit`;
+  const traceId = newTraceId();
+
+  try {
+    const response = await submitWithRetry(url, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-Trace-Id': traceId,
+      },
+      body: JSON.stringify(delta),
+    }, 'Draft commit');
+
+    const result = await response.json();
+
+    console.log('[Backend API] Draft commit response:', result);
+    logServerTiming('Draft commit', response);
+
+    if (result.success) {
+      return {
+        success: true,
+        message: result.message,
+        data: result.data,
+        traceId,
+      };
+    } else {
+      return {
+        success: false,
+        traceId,
+        error: {
+          code: result.error || 'API_ERROR',
+          message: result.message || 'Unknown error',
+        },
+      };
+    }
+  } catch (error) {
+    console.error('[Backend API] Draft commit failed:', error);
+    return networkError(error);
+  }
+}
+
+/**
+ * Progress event emitted by a background batch job
+ * (see /api/batches/<job_id>/events on the backend)
+ */
+export interface BatchProgressEvent {
+  id: number;
+  type: 'started' | 'snapshot' | 'record' | 'invalid' | 'chunk' | 'done';
+  data: any;
+}
+
+/**
+ * Submit many customers as a background batch and follow its progress
+ *
+ * Records are uploaded as NDJSON, then per-record and per-chunk results are
+ * streamed back over Server-Sent Events. EventSource reconnects on its own
+ * and resumes from the last event id it received, so a dropped connection
+ * does not replay progress. If the missed events are no longer kept, a
+ * 'snapshot' event with the job's counts so far arrives first.
+ *
+ * @param records - Customer data objects (same shape as createCustomer)
+ * @param onProgress - Called for every progress event as it arrives
+ * @returns Final batch summary once the job is done
+ */
+export async function createCustomersBatch(
+  records: object[],
+  onProgress?: (event: BatchProgressEvent) => void
+): Promise<LangchaoApiResponse> {
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/batches`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/x-ndjson',
+      },
+      body: records.map(record => JSON.stringify(record)).join('\n'),
+    });
+    const started = await response.json();
+
+    if (!started.success) {
+      return {
+        success: false,
+        error: {
+          code: started.error || 'API_ERROR',
+          message: started.message || 'Failed to start batch',
+        },
+      };
+    }
+
+    return await new Promise<LangchaoApiResponse>((resolve) => {
+      const source = new EventSource(`${BACKEND_URL}${started.events_url}`);
+      const eventTypes: BatchProgressEvent['type'][] = ['started', 'snapshot', 'record', 'invalid', 'chunk', 'done'];
+
+      eventTypes.forEach(type => {
+        source.addEventListener(type, (message) => {
+          const event = message as MessageEvent;
+          const data = JSON.parse(event.data);
+          onProgress?.({ id: Number(event.lastEventId), type, data });
+
+          if (type === 'done') {
+            source.close();
+            resolve({
+              success: data.status === 'completed' && data.summary?.success,
+              data: data.summary,
+            });
+          }
+        });
+      });
+    });
+  } catch (error) {
+    console.error('[Backend API] Batch request failed:', error);
     return {
       success: false,
       error: {
@@ -74,12 +365,48 @@ export async function createCustomer(customerData: object | object[]): Promise<L
   }
 }
 
+const CATALOG_CACHE_KEY = 'productCatalog';
+
+/**
+ * Load the product catalog from the backend
+ *
+ * The last catalog is kept in localStorage and revalidated with its ETag, so
+ * an unchanged catalog costs a 304 with no body.
+ *
+ * @returns The current catalog, or null if the backend is unreachable and
+ *   nothing is cached (callers keep the built-in catalog)
+ */
+export async function fetchProductCatalog(): Promise<ProductCatalogData | null> {
+  let cached: ProductCatalogData | null = null;
+  try {
+    cached = JSON.parse(localStorage.getItem(CATALOG_CACHE_KEY) || 'null');
+  } catch {
+    cached = null;
+  }
+
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/catalog`, {
+      headers: cached ? { 'If-None-Match': `"${cached.version}"` } : {},
+    });
+    if (response.status === 304 && cached) return cached;
+    if (!response.ok) return cached;
+    const catalog: ProductCatalogData = await response.json();
+    localStorage.setItem(CATALOG_CACHE_KEY, JSON.stringify(catalog));
+    return catalog;
+  } catch {
+    return cached;
+  }
+}
+
 /**
  * Check if the backend is available
+ *
+ * @param deep - Also require a reachable Langchao upstream. The backend answers
+ *   from its cached background probe, so this is cheap to poll.
  */
-export async function checkBackendHealth(): Promise<boolean> {
+export async function checkBackendHealth(deep: boolean = false): Promise<boolean> {
   try {
-    const response = await fetch(`${BACKEND_URL}/api/health`);
+    const response = await fetch(`${BACKEND_URL}/api/health${deep ? '?deep=1' : ''}`);
     const data = await response.json();
     return data.status === 'ok';
   } catch {
@@ -212,6 +212,8 @@ export interface ProductFamily {
   groups: ProductGroup[];
 }
 
+// Built-in fallback: the live catalog is served by the backend from
+// backend/data/product_catalog.json and applied with applyProductCatalog()
 export const PRODUCT_CATALOG: ProductFamily[] = [
   {
     family: 'ESP32-P4',
@@ -308,27 +310,36 @@ export function getAllProducts(): string[] {
   return products;
 }
 
-// Helper to determine if a product is a SoC (for BVI routing)
-export function isSoCProduct(productName: string): boolean {
-  for (const family of PRODUCT_CATALOG) {
-    const socGroup = family.groups.find(g => g.label === 'SoCs');
-    if (socGroup && socGroup.products.includes(productName)) {
-      return true;
-    }
-  }
-  return false;
+// Product name -> family and group, rebuilt whenever the catalog changes
+interface ProductInfo {
+  family: string;
+  group: string;
 }
 
-// Helper to get the family for a product
-export function getProductFamily(productName: string): string | null {
-  for (const family of PRODUCT_CATALOG) {
+function buildProductIndex(catalog: ProductFamily[]): Map<string, ProductInfo> {
+  const index = new Map<string, ProductInfo>();
+  for (const family of catalog) {
     for (const group of family.groups) {
-      if (group.products.includes(productName)) {
-        return family.family;
+      for (const product of group.products) {
+        if (!index.has(product)) {
+          index.set(product, { family: family.family, group: group.label });
+        }
       }
     }
   }
-  return null;
+  return index;
+}
+
+let productIndex = buildProductIndex(PRODUCT_CATALOG);
+
+// Helper to determine if a product is a SoC (for BVI routing)
+export function isSoCProduct(productName: string): boolean {
+  return productIndex.get(productName)?.group === 'SoCs';
+}
+
+// Helper to get the family for a product
+export function getProductFamily(productName: string): string | null {
+  return productIndex.get(productName)?.family ?? null;
 }
 
 // BVI List - Products handled by BVI vendor (SoC/chip variants)
@@ -352,6 +363,29 @@ export const BVI_PRODUCT_LIST: string[] = [
   'ESP8266EX',
 ];
 
+// Catalog data as served by the backend (/api/catalog)
+export interface ProductCatalogData {
+  version: string;
+  families: ProductFamily[];
+  variants: Record<string, string[]>;
+  soc_variants: Record<string, string[]>;
+  bvi_products: string[];
+}
+
+/**
+ * Replace the built-in catalog with one loaded from the backend
+ * The exported collections are updated in place so existing imports see it.
+ */
+export function applyProductCatalog(catalog: ProductCatalogData): void {
+  PRODUCT_CATALOG.splice(0, PRODUCT_CATALOG.length, ...catalog.families);
+  BVI_PRODUCT_LIST.splice(0, BVI_PRODUCT_LIST.length, ...catalog.bvi_products);
+  for (const [target, source] of [[PRODUCT_VARIANTS, catalog.variants], [SOC_VARIANTS, catalog.soc_variants]]) {
+    Object.keys(target).forEach(key => delete target[key]);
+    Object.assign(target, source);
+  }
+  productIndex = buildProductIndex(PRODUCT_CATALOG);
+}
+
 // Form data structure matching Excel columns
 export interface VendorFormData {
   // Col F - Business Specialist (from URL)
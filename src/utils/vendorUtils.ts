@@ -402,14 +402,27 @@ export function toJsonFormat(data: VendorSubmissionData): object {
 }
 
 /**
- * Convert submission data to API payload format
- * Returns the exact structure expected by Langchao inSuite API
+ * Compute a shallow JSON merge patch between two flat objects
+ * Returns only the keys whose values changed; removed keys map to null.
  */
-export function toApiPayload(data: VendorSubmissionData): object[] {
-  const jsonData = toJsonFormat(data);
-  // Remove _metadata for API call
-  const { _metadata, ...apiData } = jsonData as any;
-  return [apiData];
+export function diffFields(
+  previous: Record<string, unknown>,
+  next: Record<string, unknown>
+): Record<string, unknown> {
+  const delta: Record<string, unknown> = {};
+
+  for (const [key, value] of Object.entries(next)) {
+    if (JSON.stringify(previous[key]) !== JSON.stringify(value)) {
+      delta[key] = value === undefined ? null : value;
+    }
+  }
+  for (const key of Object.keys(previous)) {
+    if (!(key in next)) {
+      delta[key] = null;
+    }
+  }
+
+  return delta;
 }
 
 /**